@@ -1,16 +1,24 @@
+import hashlib
 import os
 from datetime import datetime, timedelta
 
 import jwt
 
+from app.auth import revocation
 from app.db import models
 from app.utils.api_exception import APIException
 from app.utils.constants import EXPIRED_TOKEN_ERROR, INVALID_CREDENTIALS_ERROR
+from app.utils.tracing import traced
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# "typ" claim: a refresh token must never pass as a bearer token
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
+
+@traced("jwt")
 def create_access_token(data: dict, expires_delta: int | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -20,7 +28,8 @@ def create_access_token(data: dict, expires_delta: int | None = None) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def authorize_token(token: str) -> models.User:
+@traced("jwt")
+def verify_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, key=SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -30,18 +39,51 @@ def authorize_token(token: str) -> models.User:
             raise APIException(
                 code=INVALID_CREDENTIALS_ERROR, msg="Could not validate credentials"
             )
+        if payload.get("typ") == REFRESH_TOKEN_TYPE:
+            raise APIException(
+                code=INVALID_CREDENTIALS_ERROR, msg="Refresh tokens are not accepted"
+            )
+        if revocation.is_revoked(payload.get("jti")) or revocation.is_session_revoked(
+            payload.get("sid")
+        ):
+            raise APIException(
+                code=INVALID_CREDENTIALS_ERROR, msg="Token has been revoked"
+            )
 
-        return user_id
+        return payload
     except Exception as e:
         raise APIException(code=EXPIRED_TOKEN_ERROR, msg=str(e))
 
 
+def authorize_token(token: str) -> int:
+    return verify_token(token).get("sub")
+
+
+@traced("jwt")
 def get_current_user(token: str) -> int | None:
     try:
         payload = jwt.decode(token, key=SECRET_KEY, algorithms=[ALGORITHM])
-        if not payload:
+        if not payload or payload.get("typ") == REFRESH_TOKEN_TYPE:
             return None
+        if revocation.is_revoked(payload.get("jti")) or revocation.is_session_revoked(
+            payload.get("sid")
+        ):
+            raise APIException(
+                code=INVALID_CREDENTIALS_ERROR, msg="Token has been revoked"
+            )
 
         return payload.get("sub")
     except Exception as e:
         raise APIException(code=EXPIRED_TOKEN_ERROR, msg=str(e))
+
+
+@traced("jwt")
+def decode_token(token: str) -> dict:
+    try:
+        return jwt.decode(token, key=SECRET_KEY, algorithms=[ALGORITHM])
+    except Exception as e:
+        raise APIException(code=EXPIRED_TOKEN_ERROR, msg=str(e))
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
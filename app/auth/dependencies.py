@@ -0,0 +1,89 @@
+import hmac
+from typing import Annotated
+
+from fastapi import Depends, Request
+from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+
+from app.auth import authentication as auth
+from app.db import models, user_crud
+from app.db.database import get_db
+from app.utils.api_exception import APIException, APIExceptionToHTTP
+from app.utils.config import env_str
+from app.utils.constants import INVALID_HEADER_ERROR, USER_DOES_NOT_EXISTS_ERROR
+from app.utils.logger import Logger
+
+# Service-to-service key for the admin endpoints, which stay closed while unset
+ADMIN_API_KEY = env_str("ADMIN_API_KEY")
+
+security = HTTPBearer()
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+admin_bearer = HTTPBearer(auto_error=False)
+
+
+# Async so the decode runs on the event loop instead of taking a threadpool hop
+async def get_token_claims(
+    request: Request,
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+) -> dict:
+    claims = getattr(request.state, "token_claims", None)
+    if claims is not None:
+        return claims
+
+    try:
+        if credentials.scheme != "Bearer":
+            raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
+        claims = auth.verify_token(credentials.credentials)
+    except APIException as e:
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
+
+    request.state.token_claims = claims
+    return claims
+
+
+async def get_current_user_id(
+    claims: Annotated[dict, Depends(get_token_claims)]
+) -> int:
+    return claims["sub"]
+
+
+def get_current_user(
+    request: Request,
+    user_id: Annotated[int, Depends(get_current_user_id)],
+    db: Session = Depends(get_db),
+) -> models.User:
+    db_user = getattr(request.state, "user", None)
+    if db_user is not None:
+        return db_user
+
+    db_user = user_crud.get_user(db, user_id)
+    if not db_user:
+        e = APIException(code=USER_DOES_NOT_EXISTS_ERROR, msg="User does not exist")
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
+
+    request.state.user = db_user
+    return db_user
+
+
+def require_admin_key(
+    key: Annotated[str | None, Depends(admin_key_header)],
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(admin_bearer)],
+) -> None:
+    # Scrapers that can only send "Authorization: Bearer" use the same key
+    if key is None and credentials is not None:
+        key = credentials.credentials
+    if (
+        not ADMIN_API_KEY
+        or not key
+        or not hmac.compare_digest(key.encode(), ADMIN_API_KEY.encode())
+    ):
+        e = APIException(code=INVALID_HEADER_ERROR, msg="Invalid admin key")
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
+
+
+TokenClaims = Annotated[dict, Depends(get_token_claims)]
+CurrentUserId = Annotated[int, Depends(get_current_user_id)]
+CurrentUser = Annotated[models.User, Depends(get_current_user)]
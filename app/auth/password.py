@@ -1,18 +1,34 @@
+from concurrent.futures import Executor
+
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.db import models, user_crud
+from app.utils.executors import run_cpu
+from app.utils.tracing import traced
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@traced("hash")
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return run_cpu(pwd_context.hash, password)
+
+
+@traced("hash")
+def get_password_hashes(passwords: list[str], pool: Executor) -> list[str]:
+    # bcrypt releases the GIL, so the pool's threads hash on every core
+    return list(pool.map(pwd_context.hash, passwords))
+
+
+def is_password_hash(value: str) -> bool:
+    return pwd_context.identify(value) is not None
 
 
+@traced("hash")
 def verify_password(plain_password, hashed_password):
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return run_cpu(pwd_context.verify, plain_password, hashed_password)
     except:
         return False
 
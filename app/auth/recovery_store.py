@@ -0,0 +1,180 @@
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.db import pwd_recover_crud
+from app.schemas.password import PasswordRecoverCreate
+from app.utils.config import env_str
+
+# Where password recovery PINs live: "sql" is the password_recover table,
+# "memory" only works with a single worker, "redis" keeps them off the
+# primary database with native expiry
+RECOVERY_STORE_BACKEND = env_str("RECOVERY_STORE_BACKEND", "sql")
+
+# Spends an attempt and returns the recovery as it is afterwards, nil once the
+# key expired or no attempt is left
+CONSUME_ATTEMPT_SCRIPT = """
+local left = tonumber(redis.call('HGET', KEYS[1], 'leftover_attempts'))
+if not left or left <= 0 then
+    return nil
+end
+redis.call('HINCRBY', KEYS[1], 'leftover_attempts', -1)
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+@dataclass
+class RecoveryState:
+    user_id: int
+    pin: str
+    emited_datetime: datetime
+    expires_at: datetime
+    leftover_attempts: int
+
+
+def _state(recover: PasswordRecoverCreate) -> RecoveryState:
+    return RecoveryState(
+        user_id=recover.user_id,
+        pin=str(recover.pin),
+        emited_datetime=recover.emited_datetime,
+        expires_at=recover.expires_at,
+        leftover_attempts=recover.leftover_attempts,
+    )
+
+
+# consume_attempt is atomic in every store and returns the recovery after the
+# attempt was spent (None when none was left): the PIN is only compared once
+# the guess has been paid for
+
+
+class SQLStore:
+    def create(self, db: Session, recover: PasswordRecoverCreate):
+        return pwd_recover_crud.new_pwd_recover(db, recover)
+
+    def get(self, db: Session, user_id: int):
+        return pwd_recover_crud.get_recover(db, user_id)
+
+    def consume_attempt(self, db: Session, user_id: int):
+        return pwd_recover_crud.update_recover_attemps(db, user_id)
+
+    def delete(self, db: Session, user_id: int):
+        pwd_recover_crud.delete_recover(db, user_id)
+
+
+class MemoryStore:
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._states: dict[int, RecoveryState] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _active(self, user_id: int, now: datetime) -> RecoveryState | None:
+        state = self._states.get(user_id)
+        if state and state.expires_at <= now:
+            del self._states[user_id]
+            return None
+        return state
+
+    def create(self, db: Session, recover: PasswordRecoverCreate) -> RecoveryState:
+        state = _state(recover)
+        with self._lock:
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(datetime.now())
+            self._states[state.user_id] = state
+        return replace(state)
+
+    def get(self, db: Session, user_id: int) -> RecoveryState | None:
+        with self._lock:
+            state = self._active(user_id, datetime.now())
+            return replace(state) if state else None
+
+    def consume_attempt(self, db: Session, user_id: int) -> RecoveryState | None:
+        with self._lock:
+            state = self._active(user_id, datetime.now())
+            if state is None or state.leftover_attempts <= 0:
+                return None
+            state.leftover_attempts -= 1
+            return replace(state)
+
+    def delete(self, db: Session, user_id: int):
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    def _prune(self, now: datetime):
+        expired = [
+            user_id
+            for user_id, state in self._states.items()
+            if state.expires_at <= now
+        ]
+        for user_id in expired:
+            del self._states[user_id]
+
+
+class RedisStore:
+    def _key(self, user_id: int) -> str:
+        return f"pwd_recover:{user_id}"
+
+    def create(self, db: Session, recover: PasswordRecoverCreate) -> RecoveryState:
+        from app.ext.redis import get_client
+
+        state = _state(recover)
+        key = self._key(state.user_id)
+        pipe = get_client().pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={
+                "pin": state.pin,
+                "emited_datetime": state.emited_datetime.isoformat(),
+                "expires_at": state.expires_at.isoformat(),
+                "leftover_attempts": state.leftover_attempts,
+            },
+        )
+        pipe.expireat(key, state.expires_at)
+        pipe.execute()
+        return state
+
+    def get(self, db: Session, user_id: int) -> RecoveryState | None:
+        from app.ext.redis import get_client
+
+        return self._state(user_id, get_client().hgetall(self._key(user_id)))
+
+    def consume_attempt(self, db: Session, user_id: int) -> RecoveryState | None:
+        from app.ext.redis import get_client
+
+        reply = get_client().eval(CONSUME_ATTEMPT_SCRIPT, 1, self._key(user_id))
+        # HGETALL comes back from a script as a flat [field, value, ...] list
+        return self._state(user_id, dict(zip(reply[::2], reply[1::2])) if reply else {})
+
+    def _state(self, user_id: int, fields: dict) -> RecoveryState | None:
+        if not fields:
+            return None
+        fields = {key.decode(): value.decode() for key, value in fields.items()}
+        return RecoveryState(
+            user_id=user_id,
+            pin=fields["pin"],
+            emited_datetime=datetime.fromisoformat(fields["emited_datetime"]),
+            expires_at=datetime.fromisoformat(fields["expires_at"]),
+            leftover_attempts=int(fields["leftover_attempts"]),
+        )
+
+    def delete(self, db: Session, user_id: int):
+        from app.ext.redis import get_client
+
+        get_client().delete(self._key(user_id))
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = {"memory": MemoryStore, "redis": RedisStore}.get(
+            RECOVERY_STORE_BACKEND, SQLStore
+        )()
+    return _store
@@ -0,0 +1,126 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.db import revocation_crud
+from app.db.database import SessionLocal
+from app.utils.bloom import BloomFilter
+from app.utils.config import env_float, env_int
+
+REVOCATION_SYNC_SECONDS = env_float("REVOCATION_SYNC_SECONDS", 5.0)
+REVOCATION_PURGE_SECONDS = env_float("REVOCATION_PURGE_SECONDS", 3600.0)
+REVOCATION_BLOOM_CAPACITY = env_int("REVOCATION_BLOOM_CAPACITY", 100_000)
+REVOCATION_BLOOM_ERROR_RATE = env_float("REVOCATION_BLOOM_ERROR_RATE", 0.001)
+
+# Re-read a little before the last revocation seen so rows written by workers
+# with a skewed clock, or committed late, are not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+PRUNE_EVERY = timedelta(minutes=1)
+
+
+class Denylist:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._revoked: dict[str, datetime] = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_until: datetime | None = None
+        self._pruned_at = datetime.min
+
+    def is_revoked(self, jti: str | None) -> bool:
+        # The filter answers the common case with a few hashes, the exact set
+        # rules out its false positives
+        if not jti or jti not in self._filter:
+            return False
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def sync(self, db: Session, now: datetime | None = None):
+        now = now or datetime.now()
+        since = self._synced_until - SYNC_OVERLAP if self._synced_until else None
+        rows = revocation_crud.get_revoked_since(db, since, now)
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._add(jti, expires_at)
+                if self._synced_until is None or revoked_at > self._synced_until:
+                    self._synced_until = revoked_at
+
+            if now - self._pruned_at >= PRUNE_EVERY:
+                self._prune(now)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _add(self, jti: str, expires_at: datetime):
+        if jti in self._revoked:
+            return
+        self._revoked[jti] = expires_at
+        self._filter.add(jti)
+        if len(self._filter) > self._filter.capacity:
+            self._rebuild()
+
+    def _prune(self, now: datetime):
+        self._pruned_at = now
+        expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+        if not expired:
+            return
+        for jti in expired:
+            del self._revoked[jti]
+        # Bloom filters cannot forget, start a fresh one from the live entries
+        self._rebuild()
+
+    def _rebuild(self):
+        fresh = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+        for jti in self._revoked:
+            fresh.add(jti)
+        self._filter = fresh
+
+
+denylist = Denylist(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+
+
+def expiration(payload: dict) -> datetime:
+    # Tokens are issued with naive local datetimes that PyJWT encodes as UTC
+    exp = payload.get("exp")
+    if exp is None:
+        return datetime.max
+    return datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+
+
+def session_key(session_id: str) -> str:
+    return f"sid:{session_id}"
+
+
+def is_revoked(jti: str | None) -> bool:
+    return denylist.is_revoked(jti)
+
+
+def is_session_revoked(session_id: str | None) -> bool:
+    return bool(session_id) and denylist.is_revoked(session_key(session_id))
+
+
+def revoke(db: Session, jti: str, expires_at: datetime):
+    revocation_crud.revoke_token(db, jti, expires_at, datetime.now())
+    denylist.add(jti, expires_at)
+
+
+def revoke_session(db: Session, session_id: str, expires_at: datetime):
+    # Shares the denylist with the jtis: every token of the session stops
+    # working, not only the one presented at logout
+    revoke(db, session_key(session_id), expires_at)
+
+
+def sync():
+    with SessionLocal() as db:
+        denylist.sync(db)
+
+
+def purge():
+    with SessionLocal() as db:
+        revocation_crud.delete_expired(db, datetime.now())
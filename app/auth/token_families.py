@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+
+from app.utils.config import env_int, env_str
+
+# Where the highest generation issued per token family is tracked: "memory"
+# only sees the refreshes served by this worker, "redis" is shared
+REFRESH_GENERATION_BACKEND = env_str("REFRESH_GENERATION_BACKEND", "memory")
+REFRESH_GENERATION_CACHE_SIZE = env_int("REFRESH_GENERATION_CACHE_SIZE", 100_000)
+
+# Returns 0 when the presented generation was already rotated, else records the
+# next generation as the new high-water mark
+ADVANCE_SCRIPT = """
+local issued = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) < issued then
+    return 0
+end
+redis.call('SET', KEYS[1], tonumber(ARGV[1]) + 1, 'EX', ARGV[2])
+return 1
+"""
+
+
+class MemoryBackend:
+    def __init__(self, size: int = REFRESH_GENERATION_CACHE_SIZE):
+        self._issued: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = size
+
+    def advance(self, family: str, generation: int, ttl: int) -> bool:
+        with self._lock:
+            issued = self._issued.get(family, 0)
+            if generation < issued:
+                return False
+
+            self._issued[family] = generation + 1
+            self._issued.move_to_end(family)
+            if len(self._issued) > self._size:
+                self._issued.popitem(last=False)
+            return True
+
+    def forget(self, family: str):
+        with self._lock:
+            self._issued.pop(family, None)
+
+
+class RedisBackend:
+    def advance(self, family: str, generation: int, ttl: int) -> bool:
+        from app.ext.redis import get_client
+
+        key = f"refresh_family:{family}"
+        return bool(get_client().eval(ADVANCE_SCRIPT, 1, key, generation, ttl))
+
+    def forget(self, family: str):
+        from app.ext.redis import get_client
+
+        get_client().delete(f"refresh_family:{family}")
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = (
+            RedisBackend() if REFRESH_GENERATION_BACKEND == "redis" else MemoryBackend()
+        )
+    return _backend
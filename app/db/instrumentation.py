@@ -0,0 +1,70 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils import request_context
+from app.utils.config import env_bool, env_float, env_int
+from app.utils.logger import Logger
+
+SQL_INSTRUMENTATION = env_bool("SQL_INSTRUMENTATION")
+SQL_SLOW_QUERY_MS = env_float("SQL_SLOW_QUERY_MS", 200.0)
+# Dev mode keeps a per-request counter of statements to spot N+1 patterns
+SQL_DEV_MODE = env_bool("SQL_DEV_MODE")
+SQL_REPEATED_QUERY_THRESHOLD = env_int("SQL_REPEATED_QUERY_THRESHOLD", 3)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    ctx = request_context.current()
+
+    if ctx:
+        ctx.record_query(statement, elapsed, SQL_DEV_MODE)
+
+    if elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+        route = ctx.route if ctx else "<no request>"
+        Logger().warn(
+            f"Slow query ({elapsed * 1000:.1f} ms) on {route}: {_one_line(statement)}"
+        )
+
+
+def _handle_error(exception_context):
+    starts = (
+        exception_context.connection.info.get("query_start")
+        if exception_context.connection
+        else None
+    )
+    if starts:
+        starts.pop()
+
+
+def _one_line(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+def setup(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def report(ctx: request_context.RequestContext) -> None:
+    if not ctx.query_count:
+        return
+
+    route = ctx.route
+    Logger().debug(
+        f"{route} executed {ctx.query_count} statements "
+        f"in {ctx.query_time * 1000:.1f} ms"
+    )
+
+    for statement, count in ctx.statements.items():
+        if count >= SQL_REPEATED_QUERY_THRESHOLD:
+            Logger().warn(
+                f"Possible N+1 on {route}: statement executed {count} times: "
+                f"{_one_line(statement)}"
+            )
@@ -0,0 +1,48 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+from .models import PasswordRecover, User
+
+# create_all only creates missing tables: columns added to existing tables
+# after the first deploy are listed here and applied on startup
+ADDED_COLUMNS = [
+    (User.__table__, "deleted_at"),
+    (User.__table__, "updated_at"),
+    (PasswordRecover.__table__, "expires_at"),
+]
+
+# Constraints replaced by an index declared on the model
+DROPPED_CONSTRAINTS = [
+    ("users", "users_email_key"),
+]
+
+
+def upgrade(engine: Engine):
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table, name in ADDED_COLUMNS:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=engine.dialect)
+            conn.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}")
+            )
+
+        if engine.dialect.name == "postgresql":
+            for table_name, constraint in DROPPED_CONSTRAINTS:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table_name} DROP CONSTRAINT IF EXISTS {constraint}"
+                    )
+                )
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
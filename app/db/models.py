@@ -1,4 +1,15 @@
-from sqlalchemy import JSON, Column, Date, DateTime, Integer, String
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 
 from .database import Base
 
@@ -8,16 +19,40 @@ class User(Base):
 
     id = Column(Integer, primary_key=True)
     username = Column(String)
-    email = Column(String, unique=True)
+    email = Column(String)
     city = Column(String)
     birth_date = Column(Date)
     preferences = Column(JSON, default=None)
     hashed_password = Column(String)
-    refresh_token = Column(String, nullable=True, default=None)
     thread_id = Column(String, nullable=True, default=None)
     assistant_id = Column(String, nullable=True, default=None)
     avatar_link = Column(String, nullable=True, default=None)
     fcm_token = Column(String, nullable=True, default=None)
+    deleted_at = Column(DateTime, nullable=True, default=None)
+    # Bumped on every UPDATE, ORM or Core, that does not set it itself; rows
+    # older than the column stay NULL until they change again
+    updated_at = Column(
+        DateTime, nullable=True, default=datetime.now, onupdate=datetime.now
+    )
+
+    __table_args__ = (
+        # Emails are unique among live users only, and the partial index keeps
+        # soft-deleted rows out of the lookups
+        Index(
+            "ix_users_email_active",
+            "email",
+            unique=True,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        Index(
+            "ix_users_deleted_at",
+            "deleted_at",
+            postgresql_where=deleted_at.isnot(None),
+            sqlite_where=deleted_at.isnot(None),
+        ),
+        Index("ix_users_updated_at", "updated_at"),
+    )
 
 
 class PasswordRecover(Base):
@@ -27,4 +62,30 @@ class PasswordRecover(Base):
     user_id = Column(Integer, primary_key=True)
     pin = Column(String)
     emited_datetime = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
     leftover_attempts = Column(Integer, default=3)
+
+
+class UserSession(Base):
+
+    __tablename__ = "user_sessions"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    hashed_token = Column(String, nullable=False)
+    device = Column(String, nullable=True, default=None)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class RevokedToken(Base):
+
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, index=True)
@@ -1,25 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.orm import Session
 
 import app.schemas.password as schemas
+from app.utils.tracing import traced
 
 from . import models
 
 
-def get_recover(db: Session, user_id: int):
+def active_recovers(db: Session, now: datetime | None = None):
+    # Expired rows wait for the purge job but are never loaded
+    return db.query(models.PasswordRecover).filter(
+        models.PasswordRecover.expires_at > (now or datetime.now())
+    )
+
+
+@traced("db")
+def get_recover(db: Session, user_id: int, now: datetime | None = None):
     return (
-        db.query(models.PasswordRecover)
+        active_recovers(db, now)
         .filter(models.PasswordRecover.user_id == user_id)
         .first()
     )
 
 
+@traced("db")
 def new_pwd_recover(
     db: Session, recover: schemas.PasswordRecoverCreate
 ) -> models.PasswordRecover:
+    # Replaces the user's previous recovery, expired or not, in the same
+    # transaction
+    db.execute(
+        delete(models.PasswordRecover).where(
+            models.PasswordRecover.user_id == recover.user_id
+        )
+    )
     db_pwd_recover = models.PasswordRecover(
         user_id=recover.user_id,
         pin=recover.pin,
         emited_datetime=recover.emited_datetime,
+        expires_at=recover.expires_at,
+        leftover_attempts=recover.leftover_attempts,
     )
 
     db.add(db_pwd_recover)
@@ -28,26 +50,56 @@ def new_pwd_recover(
     return db_pwd_recover
 
 
-def update_recover_attemps(db: Session, id: int):
-    db_recover = (
-        db.query(models.PasswordRecover)
-        .filter(models.PasswordRecover.user_id == id)
-        .first()
-    )
-
-    setattr(db_recover, "leftover_attempts", db_recover.leftover_attempts - 1)
+@traced("db")
+def update_recover_attemps(db: Session, id: int) -> models.PasswordRecover | None:
+    # Spends an attempt before the PIN is compared, in one statement, so
+    # concurrent guesses can never be evaluated more times than allowed
+    db_recover = db.scalars(
+        update(models.PasswordRecover)
+        .where(
+            models.PasswordRecover.user_id == id,
+            models.PasswordRecover.expires_at > datetime.now(),
+            models.PasswordRecover.leftover_attempts > 0,
+        )
+        .values(leftover_attempts=models.PasswordRecover.leftover_attempts - 1)
+        .returning(models.PasswordRecover)
+    ).first()
 
+    if db_recover:
+        db.expunge(db_recover)
     db.commit()
-    db.refresh(db_recover)
     return db_recover
 
 
-def delete_recover(db: Session, id: int) -> models.PasswordRecover | None:
-    db_recover = get_recover(db, id)
+@traced("db")
+def delete_recover(db: Session, id: int) -> bool:
+    result = db.execute(
+        delete(models.PasswordRecover)
+        .where(models.PasswordRecover.user_id == id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
 
-    if db_recover:
-        db.delete(db_recover)
-        db.commit()
-        return db_recover
 
-    return None
+@traced("db")
+def delete_expired(db: Session, now: datetime, limit: int) -> int:
+    expired = (
+        select(models.PasswordRecover.user_id)
+        .where(
+            or_(
+                models.PasswordRecover.expires_at <= now,
+                # Rows created before the column existed
+                models.PasswordRecover.expires_at.is_(None),
+            )
+        )
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        delete(models.PasswordRecover)
+        .where(models.PasswordRecover.user_id.in_(expired))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.utils.tracing import traced
+
+from . import models
+
+
+@traced("db")
+def revoke_token(db: Session, jti: str, expires_at: datetime, revoked_at: datetime):
+    values = {"jti": jti, "expires_at": expires_at, "revoked_at": revoked_at}
+    if db.get_bind().dialect.name == "postgresql":
+        # Revoking twice (e.g. a retried logout) is not an error
+        db.execute(
+            postgresql.insert(models.RevokedToken)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["jti"])
+        )
+    elif not db.get(models.RevokedToken, jti):
+        db.add(models.RevokedToken(**values))
+    db.commit()
+
+
+@traced("db")
+def get_revoked_since(
+    db: Session, since: datetime | None, now: datetime
+) -> list[tuple[str, datetime, datetime]]:
+    query = select(
+        models.RevokedToken.jti,
+        models.RevokedToken.expires_at,
+        models.RevokedToken.revoked_at,
+    ).where(models.RevokedToken.expires_at > now)
+    if since is not None:
+        query = query.where(models.RevokedToken.revoked_at > since)
+
+    return [tuple(row) for row in db.execute(query)]
+
+
+@traced("db")
+def delete_expired(db: Session, now: datetime) -> int:
+    result = db.execute(
+        delete(models.RevokedToken)
+        .where(models.RevokedToken.expires_at <= now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
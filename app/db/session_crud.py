@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.utils.tracing import traced
+
+from . import models
+
+
+@traced("db")
+def create_session(
+    db: Session,
+    session_id: str,
+    user_id: int,
+    hashed_token: str,
+    expires_at: datetime,
+    device: str | None = None,
+) -> models.UserSession:
+    db_session = models.UserSession(
+        id=session_id,
+        user_id=user_id,
+        hashed_token=hashed_token,
+        device=device,
+        expires_at=expires_at,
+    )
+
+    db.add(db_session)
+    db.commit()
+    return db_session
+
+
+def live_users():
+    return select(models.User.id).where(models.User.deleted_at.is_(None))
+
+
+@traced("db")
+def get_session(db: Session, session_id: str) -> models.UserSession | None:
+    # Sessions of a deleted account are dead even before the purger runs
+    return db.scalars(
+        select(models.UserSession).where(
+            models.UserSession.id == session_id,
+            models.UserSession.user_id.in_(live_users()),
+        )
+    ).first()
+
+
+@traced("db")
+def rotate_session(
+    db: Session,
+    session_id: str,
+    user_id: int,
+    hashed_token: str,
+    new_hashed_token: str,
+    expires_at: datetime,
+) -> bool:
+    # Single conditional UPDATE by primary key: the token only rotates if it is
+    # still the current one for a live session of a live user
+    result = db.execute(
+        update(models.UserSession)
+        .where(
+            models.UserSession.id == session_id,
+            models.UserSession.user_id == user_id,
+            models.UserSession.hashed_token == hashed_token,
+            models.UserSession.expires_at > datetime.now(),
+            models.UserSession.user_id.in_(live_users()),
+        )
+        .values(hashed_token=new_hashed_token, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+@traced("db")
+def delete_session(db: Session, session_id: str) -> bool:
+    result = db.execute(
+        delete(models.UserSession)
+        .where(models.UserSession.id == session_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+@traced("db")
+def delete_user_sessions(db: Session, user_id: int) -> int:
+    result = db.execute(
+        delete(models.UserSession)
+        .where(models.UserSession.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -1,23 +1,55 @@
+import csv
+import io
+from datetime import date, datetime
+
+import orjson
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 import app.schemas.users as schemas
 from app.schemas.chat import Chat
+from app.utils.tracing import traced
 
 from . import models
 
+IMPORT_COLUMNS = (
+    "username",
+    "email",
+    "city",
+    "birth_date",
+    "preferences",
+    "hashed_password",
+    "fcm_token",
+    "updated_at",
+)
+
+
+def active_users(db: Session):
+    return db.query(models.User).filter(models.User.deleted_at.is_(None))
+
 
+@traced("db")
 def get_user(db: Session, user_id: int) -> models.User | None:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    # Primary key lookup through the identity map: a user already loaded in
+    # this session (e.g. by the auth dependency) costs no extra query
+    db_user = db.get(models.User, user_id)
+    if db_user is None or db_user.deleted_at is not None:
+        return None
+    return db_user
 
 
+@traced("db")
 def get_user_by_email(db: Session, email: str) -> models.User | None:
-    return db.query(models.User).filter(models.User.email == email).first()
+    return active_users(db).filter(models.User.email == email).first()
 
 
+@traced("db")
 def get_user_by_username(db: Session, username: str) -> models.User | None:
-    return db.query(models.User).filter(models.User.username == username).first()
+    return active_users(db).filter(models.User.username == username).first()
 
 
+@traced("db")
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     db_user = models.User(
         username=user.username,
@@ -33,18 +65,48 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     return db_user
 
 
-def update_user(db: Session, user_id: int, user: schemas.UserUpdate) -> models.User:
+@traced("db")
+def update_user_fields(
+    db: Session, user_id: int, changes: dict
+) -> tuple[models.User | None, list[str]]:
     db_user = get_user(db, user_id)
-
-    for var, value in vars(user).items():
-        if value or (var == "preferences" and len(value) > 0):
-            setattr(db_user, var, value)
-
-    db.commit()
-    db.refresh(db_user)
+    if not db_user:
+        return None, []
+
+    changed = [
+        field for field, value in changes.items() if getattr(db_user, field) != value
+    ]
+    if not changed:
+        return db_user, []
+
+    # Only the changed attributes are dirty, so the flush emits a single UPDATE
+    # with just those columns
+    for field in changed:
+        setattr(db_user, field, changes[field])
+
+    # The loaded row plus what we just wrote (updated_at included, it is set
+    # in Python) is the new state: keep it across the commit instead of
+    # reloading it with a second SELECT
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = True
+    return db_user, changed
+
+
+@traced("db")
+def update_user(
+    db: Session, user_id: int, user: schemas.UserUpdate
+) -> models.User | None:
+    # PATCH semantics: only the fields the client sent, which may clear a value
+    db_user, _ = update_user_fields(
+        db, user_id, user.model_dump(include=user.model_fields_set)
+    )
     return db_user
 
 
+@traced("db")
 def update_user_fcm_token(db: Session, user_id: int, fcm_token: str) -> models.User:
     db_user = get_user(db, user_id)
 
@@ -55,6 +117,7 @@ def update_user_fcm_token(db: Session, user_id: int, fcm_token: str) -> models.U
     return db_user
 
 
+@traced("db")
 def update_user_pwd(db: Session, user_id: int, new_password: str) -> models.User:
     db_user = get_user(db, user_id)
 
@@ -65,17 +128,74 @@ def update_user_pwd(db: Session, user_id: int, new_password: str) -> models.User
     return db_user
 
 
-def delete_user(db: Session, user_id: int) -> models.User | None:
-    db_user = get_user(db, user_id)
+@traced("db")
+def delete_user(db: Session, user_id: int) -> tuple[models.User | None, list[str]]:
+    # Soft delete in one UPDATE, the remaining rows and assets are removed
+    # later by the purger. The sessions go in the same transaction so no
+    # refresh token outlives the account
+    db_user = db.scalars(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.deleted_at.is_(None))
+        .values(deleted_at=datetime.now())
+        .returning(models.User)
+    ).first()
 
+    session_ids = []
     if db_user:
-        db.delete(db_user)
-        db.commit()
-        return db_user
-
-    return None
+        # Detached, the row keeps the returned values instead of being expired
+        # by the commit and reloaded
+        db.expunge(db_user)
+        session_ids = list(
+            db.scalars(
+                delete(models.UserSession)
+                .where(models.UserSession.user_id == user_id)
+                .returning(models.UserSession.id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+    db.commit()
+    return db_user, session_ids
+
+
+@traced("db")
+def get_deleted_users(
+    db: Session, deleted_before: datetime, limit: int
+) -> list[tuple[int, str | None]]:
+    query = (
+        select(models.User.id, models.User.avatar_link)
+        .where(
+            models.User.deleted_at.isnot(None),
+            models.User.deleted_at <= deleted_before,
+        )
+        .order_by(models.User.deleted_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return [tuple(row) for row in db.execute(query)]
+
+
+@traced("db")
+def purge_users(db: Session, user_ids: list[int]) -> int:
+    for model, column in (
+        (models.PasswordRecover, models.PasswordRecover.user_id),
+        (models.UserSession, models.UserSession.user_id),
+    ):
+        db.execute(
+            delete(model)
+            .where(column.in_(user_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    result = db.execute(
+        delete(models.User)
+        .where(models.User.id.in_(user_ids), models.User.deleted_at.isnot(None))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
 
 
+@traced("db")
 def update_user_chat(db: Session, chat: Chat) -> models.User | None:
     db_user = get_user(db, chat.user_id)
 
@@ -87,8 +207,9 @@ def update_user_chat(db: Session, chat: Chat) -> models.User | None:
     return db_user
 
 
+@traced("db")
 def get_user_chat(db: Session, user_id: int) -> Chat:
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = get_user(db, user_id)
     thread_id = db_user.thread_id
     assistant_id = db_user.assistant_id
     return Chat.model_construct(
@@ -96,11 +217,102 @@ def get_user_chat(db: Session, user_id: int) -> Chat:
     )
 
 
+@traced("db")
 def get_user_preferences(db: Session, user_id: int) -> list[str]:
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = get_user(db, user_id)
     return db_user.preferences
 
 
+@traced("db")
 def get_user_fcm_token(db: Session, user_id: int) -> str:
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = get_user(db, user_id)
     return db_user.fcm_token
+
+
+@traced("db")
+def stream_users(
+    db: Session,
+    columns: list[str],
+    since: datetime | None,
+    after_id: int | None,
+    include_deleted: bool,
+    limit: int | None,
+    batch_size: int,
+):
+    # Keyset on the primary key: each page starts where the last one stopped
+    # instead of skipping OFFSET rows. yield_per turns on a server-side cursor
+    # so rows are fetched batch_size at a time whatever the table size
+    query = select(*(getattr(models.User, column) for column in columns)).order_by(
+        models.User.id
+    )
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+    if since is not None:
+        query = query.where(models.User.updated_at >= since)
+    if not include_deleted:
+        query = query.where(models.User.deleted_at.is_(None))
+    if limit is not None:
+        query = query.limit(limit)
+    return db.execute(query.execution_options(yield_per=batch_size))
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return orjson.dumps(value).decode()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    # None is written unquoted, which COPY's csv format reads as NULL
+    return value
+
+
+def _copy_users_postgres(db: Session, rows: list[dict]) -> list[tuple[str, int]]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row.get(column)) for column in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    # COPY cannot skip conflicting rows, so the chunk lands in a temp table
+    # first and moves over with a single INSERT ... ON CONFLICT
+    columns = ", ".join(IMPORT_COLUMNS)
+    db.execute(
+        text(
+            f"CREATE TEMP TABLE users_import ON COMMIT DROP AS "
+            f"SELECT {columns} FROM users WITH NO DATA"
+        )
+    )
+    with db.connection().connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY users_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    return db.execute(
+        text(
+            f"INSERT INTO users ({columns}) SELECT {columns} FROM users_import "
+            f"ON CONFLICT (email) WHERE deleted_at IS NULL DO NOTHING "
+            f"RETURNING email, id"
+        )
+    ).all()
+
+
+def _insert_users_sqlite(db: Session, rows: list[dict]) -> list[tuple[str, int]]:
+    statement = (
+        sqlite_insert(models.User.__table__)
+        .on_conflict_do_nothing(
+            index_elements=["email"], index_where=models.User.deleted_at.is_(None)
+        )
+        .returning(models.User.email, models.User.id)
+    )
+    params = [{column: row.get(column) for column in IMPORT_COLUMNS} for row in rows]
+    return db.execute(statement, params).all()
+
+
+@traced("db")
+def copy_users(db: Session, rows: list[dict]) -> dict[str, int]:
+    # Rows whose email belongs to a live user are skipped, the result maps the
+    # emails actually inserted to their new ids
+    if db.get_bind().dialect.name == "postgresql":
+        created = _copy_users_postgres(db, rows)
+    else:
+        created = _insert_users_sqlite(db, rows)
+    db.commit()
+    return dict(created)
@@ -0,0 +1,11 @@
+import os
+
+from app.utils.resilience import DownstreamClient
+
+ATTRACTIONS_SERVICE = os.getenv("ATTRACTIONS_SERVICE")
+EXTERNAL_SERVICES = os.getenv("EXTERNAL_SERVICES")
+
+attractions = DownstreamClient.from_env(
+    "attractions", ATTRACTIONS_SERVICE, "ATTRACTIONS"
+)
+chatbot = DownstreamClient.from_env("chatbot", EXTERNAL_SERVICES, "CHATBOT")
@@ -1,9 +1,12 @@
 import json
 import os
+import urllib.parse
 
 import firebase_admin
 from firebase_admin import credentials, storage
 
+from app.utils.tracing import traced
+
 
 def setup() -> None:
     cert = json.loads(os.getenv("FIREBASE_CREDENTIALS_JSON"), strict=False)
@@ -16,6 +19,12 @@ def setup() -> None:
     bucket.make_public()
 
 
+def warm_up() -> None:
+    # Fetches the access token and opens the TLS connection to the bucket
+    storage.bucket().exists()
+
+
+@traced("storage")
 def upload_image(folder, content_type, file, id) -> str:
     bucket = storage.bucket()
     blob = bucket.blob(f"{folder}/{id}")
@@ -25,7 +34,17 @@ def upload_image(folder, content_type, file, id) -> str:
     return blob.public_url
 
 
+@traced("storage")
 def delete_image(folder, id):
     bucket = storage.bucket()
     blob = bucket.blob(f"{folder}/{id}")
     blob.delete()
+
+
+def image_id_from_url(folder, url) -> str | None:
+    path = urllib.parse.urlparse(url).path
+    marker = f"/{folder}/"
+    if marker not in path:
+        return None
+
+    return urllib.parse.unquote(path.split(marker, 1)[1])
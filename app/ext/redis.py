@@ -0,0 +1,14 @@
+import redis
+
+from app.utils.config import env_str
+
+REDIS_URL = env_str("REDIS_URL", "redis://localhost:6379/0")
+
+_client = None
+
+
+def get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, socket_timeout=1.0)
+    return _client
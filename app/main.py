@@ -1,33 +1,144 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
-from app.db import models
+from app.auth import revocation
+from app.db import instrumentation, migrations, models
 from app.db.database import engine
 from app.ext import firebase as fb
+from app.middlewares.admission import ADMISSION_CONTROL, AdmissionControlMiddleware
+from app.middlewares.in_flight import InFlightMiddleware
+from app.middlewares.loop_monitor import LoopMonitorMiddleware
+from app.middlewares.profiler import ProfilerMiddleware
+from app.middlewares.request_context import RequestContextMiddleware
+from app.middlewares.server_timing import ServerTimingMiddleware
+from app.middlewares.tracing import TracingMiddleware
+from app.routes.admin_router import router as admin_router
 from app.routes.auth_router import router as auth_router
+from app.routes.debug_router import router as debug_router
+from app.routes.health_router import router as health_router
+from app.routes.metrics_router import router as metrics_router
 from app.routes.password_router import router as password_router
 from app.routes.user_router import router as user_router
+from app.services import purge_services, warmup_services
+from app.utils import (
+    executors,
+    loop_monitor,
+    metrics,
+    profiler,
+    responses,
+    server_timing,
+    tracing,
+)
+from app.utils.periodic import PeriodicTask
+from app.utils.sampler import SAMPLER_ENABLED, sampler
 
 models.Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
+
+if instrumentation.SQL_INSTRUMENTATION:
+    instrumentation.setup(engine)
+
+if profiler.PROFILER_ENABLED:
+    profiler.setup(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        PeriodicTask(
+            "revocation-sync", revocation.REVOCATION_SYNC_SECONDS, revocation.sync
+        ),
+        PeriodicTask(
+            "revocation-purge", revocation.REVOCATION_PURGE_SECONDS, revocation.purge
+        ),
+        PeriodicTask(
+            "user-purge", purge_services.USER_PURGE_SECONDS, purge_services.purge
+        ),
+        PeriodicTask(
+            "recovery-purge",
+            purge_services.RECOVERY_PURGE_SECONDS,
+            purge_services.purge_recoveries,
+        ),
+    ]
+    if tracing.TRACING_ENABLED:
+        tasks.append(
+            PeriodicTask("trace-export", tracing.TRACING_EXPORT_SECONDS, tracing.flush)
+        )
+    if warmup_services.WARMUP_ENABLED:
+        # Runs before startup completes, so no traffic reaches a cold worker
+        await executors.to_io(warmup_services.warm_up, app.routes)
+    for task in tasks:
+        task.start()
+    if loop_monitor.LOOP_MONITOR:
+        loop_monitor.monitor.start()
+    if SAMPLER_ENABLED:
+        sampler.start(app.routes)
+    yield
+    if SAMPLER_ENABLED:
+        sampler.stop()
+    if loop_monitor.LOOP_MONITOR:
+        loop_monitor.monitor.stop()
+    for task in tasks:
+        task.stop()
+    if tracing.TRACING_ENABLED:
+        tracing.flush()
+    executors.shutdown()
+
 
 app = FastAPI(
     title="Users",
+    lifespan=lifespan,
+    default_response_class=responses.default_response_class(),
 )
 fb.setup()
 
+# Added before CORS so CORS wraps it: browsers must see the shed 503 and its
+# Retry-After, not a CORS failure
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Not a safelisted response header, scripts could not read it otherwise
+    expose_headers=["Retry-After"],
     max_age=3600,
 )
 
+app.add_middleware(InFlightMiddleware)
+
+if instrumentation.SQL_INSTRUMENTATION:
+    app.add_middleware(RequestContextMiddleware)
+
+if loop_monitor.LOOP_MONITOR:
+    app.add_middleware(LoopMonitorMiddleware)
+
+if profiler.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+if tracing.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+if server_timing.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(password_router)
+app.include_router(health_router)
+app.include_router(admin_router)
+
+if metrics.METRICS_ENABLED:
+    app.include_router(metrics_router)
+
+if SAMPLER_ENABLED:
+    app.include_router(debug_router)
 
 
 @app.get("/", include_in_schema=False)
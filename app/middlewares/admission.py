@@ -0,0 +1,160 @@
+import asyncio
+import math
+from collections import deque
+
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils import metrics
+from app.utils.config import env_bool, env_float, env_str
+from app.utils.constants import SERVICE_OVERLOADED_ERROR
+from app.utils.logger import Logger
+
+ADMISSION_CONTROL = env_bool("ADMISSION_CONTROL")
+# "<class>=<concurrency>:<queue>" per route class
+ADMISSION_LIMITS = env_str(
+    "ADMISSION_LIMITS",
+    "auth=4:16,uploads=4:8,reads=32:128,writes=16:64,exports=2:0",
+)
+ADMISSION_QUEUE_TIMEOUT = env_float("ADMISSION_QUEUE_TIMEOUT", 2.0)
+
+# Routes not listed here are "reads" for GET and "writes" otherwise
+ROUTE_CLASSES = {
+    "POST /users/signup": "auth",
+    "POST /users/login": "auth",
+    "PUT /users/password/recover": "auth",
+    "PATCH /users/password/update": "auth",
+    "POST /users/avatar": "uploads",
+    # A dump holds its slot for the whole stream, keep it off the reads pool
+    "GET /admin/users/export": "exports",
+    "POST /admin/users/import": "exports",
+}
+
+# Probes must keep answering while the service sheds load
+UNLIMITED_PATHS = {"/metrics", "/healthz", "/readyz", "/saturation"}
+
+
+def parse_limits(value: str) -> dict[str, tuple[int, int]]:
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.strip().partition("=")
+        concurrency, _, queue = limit.partition(":")
+        limits[name] = (int(concurrency), int(queue or 0))
+    return limits
+
+
+def route_class(method: str, path: str) -> str:
+    return ROUTE_CLASSES.get(
+        f"{method} {path}", "reads" if method in ("GET", "HEAD") else "writes"
+    )
+
+
+class Limiter:
+    def __init__(self, name: str, concurrency: int, queue_size: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        # Freed slots go to the oldest waiter, a new arrival never jumps ahead
+        # of the queue
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> str | None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return None
+
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.ADMISSION_QUEUED.labels(self.name).inc()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            # A slot handed over just as the wait timed out is still ours
+            if waiter.done() and not waiter.cancelled():
+                return None
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            # The request went away: pass on a slot it was handed meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            metrics.ADMISSION_QUEUED.labels(self.name).dec()
+        return None
+
+    def release(self):
+        # The slot passes straight to the next waiter, so active stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, limits: str = ADMISSION_LIMITS):
+        self.app = app
+        self.limiters = {
+            name: Limiter(name, concurrency, queue, ADMISSION_QUEUE_TIMEOUT)
+            for name, (concurrency, queue) in parse_limits(limits).items()
+        }
+        self._routes = None
+
+    def _classify(self, scope: Scope) -> str | None:
+        if self._routes is None:
+            self._routes = [
+                (route, method, route_class(method, route.path))
+                for route in scope["app"].routes
+                if getattr(route, "methods", None) and route.include_in_schema
+                for method in route.methods
+            ]
+
+        for route, method, name in self._routes:
+            if method != scope["method"]:
+                continue
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return name
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters.get(self._classify(scope))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await limiter.acquire()
+        if rejected:
+            metrics.ADMISSION_REJECTED.labels(limiter.name, rejected).inc()
+            Logger().warn(f"Shedding {scope['method']} {scope['path']}: {rejected}")
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": f"{SERVICE_OVERLOADED_ERROR}: Server overloaded"},
+                headers={"Retry-After": str(math.ceil(limiter.timeout) or 1)},
+            )
+            await response(scope, receive, send)
+            return
+
+        metrics.ADMISSION_IN_FLIGHT.labels(limiter.name).inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.ADMISSION_IN_FLIGHT.labels(limiter.name).dec()
+            limiter.release()
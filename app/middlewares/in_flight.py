@@ -0,0 +1,20 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class InFlightMiddleware:
+    # Only touched from the event loop thread, no lock needed
+    count = 0
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        InFlightMiddleware.count += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            InFlightMiddleware.count -= 1
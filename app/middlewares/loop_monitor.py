@@ -0,0 +1,14 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.loop_monitor import monitor
+
+
+class LoopMonitorMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            # Lets the watchdog name the route whose task is blocking the loop
+            monitor.track(scope)
+        await self.app(scope, receive, send)
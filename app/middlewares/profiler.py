@@ -0,0 +1,35 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import profiler
+from app.utils.executors import to_io
+from app.utils.logger import Logger
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp, directory: str = profiler.PROFILER_DIR):
+        self.app = app
+        self.directory = directory
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.Profile(scope)
+
+        async def send_with_profile(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile", profile.name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = profiler.activate(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop()
+            profiler.deactivate(token)
+            path = await to_io(profile.write, self.directory)
+            Logger().info(f"Profiled {profile.request_id} into {path}.*")
@@ -0,0 +1,22 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db import instrumentation
+from app.utils import request_context
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = request_context.RequestContext(scope)
+        token = request_context.activate(ctx)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_context.deactivate(token)
+            instrumentation.report(ctx)
@@ -0,0 +1,28 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import server_timing
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = server_timing.Timings()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = server_timing.activate(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            server_timing.deactivate(token)
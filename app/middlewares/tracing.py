@@ -0,0 +1,41 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import tracing
+from app.utils.request_context import route_name
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        root = tracing.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_status(message: Message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        with tracing.activate(root):
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Routing has run by now, name the span after the route template
+                root.name = route_name(scope)
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+from app.auth.dependencies import require_admin_key
+from app.services import export_services as srv
+from app.services import import_services
+from app.utils.api_exception import APIException, APIExceptionToHTTP
+from app.utils.logger import Logger
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+
+@router.get(
+    "/admin/users/export",
+    tags=["Admin"],
+    status_code=200,
+    response_class=StreamingResponse,
+    description="Stream users as NDJSON, gzipped when the client accepts it",
+)
+def export_users(
+    request: Request,
+    fields: str | None = Query(None, description="Comma separated field names"),
+    since: datetime | None = Query(None, description="Only users updated since"),
+    token: str | None = Query(None, description="Continuation token"),
+    include_deleted: bool = False,
+    limit: int | None = Query(None, gt=0),
+):
+    try:
+        columns = srv.parse_fields(fields)
+        after_id = srv.decode_token(token) if token else None
+    except APIException as e:
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
+
+    body = srv.export_users(columns, since, after_id, include_deleted, limit)
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = srv.gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+
+    Logger().info(f"Exporting users {columns} since={since} after={after_id}")
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
+@router.post(
+    "/admin/users/import",
+    tags=["Admin"],
+    status_code=200,
+    description="Create users from a CSV or NDJSON file and report conflicts",
+)
+def import_users(
+    file: Annotated[UploadFile, File()],
+    format: str | None = Query(None, description="csv or ndjson, else by filename"),
+    side_effects: bool = Query(True, description="Notify the downstream services"),
+):
+    try:
+        file_format = import_services.import_format(format, file.filename)
+        return import_services.import_users(file.file, file_format, side_effects)
+    except APIException as e:
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
@@ -1,19 +1,20 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 import app.services.users_services as srv
+from app.auth.dependencies import CurrentUserId, TokenClaims, security
 from app.db.database import get_db
 from app.schemas.token import *
 from app.schemas.users import *
 from app.utils.api_exception import APIException, APIExceptionToHTTP
 from app.utils.logger import Logger
+from app.utils.rate_limit import login_rate_limit
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter()
-
-security = HTTPBearer()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post(
@@ -39,10 +40,12 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     status_code=200,
     response_model=Token,
     description="Generate a token for valid credentials",
+    dependencies=[Depends(login_rate_limit)],
 )
-def login_user(user: UserLogin, db: Session = Depends(get_db)):
+def login_user(user: UserLogin, request: Request, db: Session = Depends(get_db)):
     try:
-        tokens = srv.new_login(db, user)
+        device = user.device or request.headers.get("user-agent")
+        tokens = srv.new_login(db, user, device)
         Logger().info(f"User {user.email} logged in")
         return tokens
     except APIException as e:
@@ -56,16 +59,9 @@ def login_user(user: UserLogin, db: Session = Depends(get_db)):
     status_code=200,
     description="Authenticate user by the jwt token",
 )
-def verify_id_token(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]
-):
-    try:
-        authenticated_id = srv.auth_user(credentials)
-        Logger().info(f"User id {authenticated_id} authenticated")
-        return authenticated_id
-    except APIException as e:
-        Logger().err(str(e))
-        raise APIExceptionToHTTP().convert(e)
+def verify_id_token(user_id: CurrentUserId):
+    Logger().info(f"User id {user_id} authenticated")
+    return user_id
 
 
 @router.post(
@@ -86,3 +82,19 @@ def refresh_token(
     except APIException as e:
         Logger().err(str(e))
         raise APIExceptionToHTTP().convert(e)
+
+
+@router.post(
+    "/users/logout",
+    tags=["Auth"],
+    status_code=204,
+    description="Revoke the token and end its session",
+)
+def logout(claims: TokenClaims, db: Session = Depends(get_db)):
+    try:
+        srv.logout_user(db, claims)
+        Logger().info(f"Logout credentials")
+        return Response(status_code=204)
+    except APIException as e:
+        Logger().err(str(e))
+        raise APIExceptionToHTTP().convert(e)
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Response
+
+from app.auth.dependencies import require_admin_key
+from app.utils.sampler import sampler
+
+# Stacks expose code paths and arguments, same key as the admin endpoints
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+
+@router.get("/debug/stacks", include_in_schema=False)
+def collapsed_stacks():
+    return Response(
+        content=sampler.collapsed(),
+        media_type="text/plain",
+        headers={
+            "X-Window-Start": datetime.fromtimestamp(sampler.window_started).isoformat(
+                timespec="seconds"
+            )
+        },
+    )
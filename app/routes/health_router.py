@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services import health_services as srv
+from app.utils.executors import to_io
+
+router = APIRouter()
+
+
+@router.get("/healthz", tags=["Health"], status_code=200)
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/readyz", tags=["Health"], status_code=200)
+async def readiness():
+    ready, checks = await to_io(srv.readiness)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "unavailable", "checks": checks},
+    )
+
+
+@router.get("/saturation", tags=["Health"], status_code=200)
+async def saturation():
+    return srv.saturation()
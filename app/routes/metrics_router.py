@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, Response
+
+from app.auth.dependencies import require_admin_key
+from app.utils import metrics
+
+router = APIRouter(dependencies=[Depends(require_admin_key)])
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
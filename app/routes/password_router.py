@@ -1,20 +1,18 @@
-from typing import Annotated
-
 from fastapi import APIRouter, Depends
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 import app.services.password_services as srv
+from app.auth.dependencies import CurrentUser
 from app.db.database import get_db
 from app.schemas.password import *
 from app.schemas.token import *
 from app.schemas.users import *
 from app.utils.api_exception import APIException, APIExceptionToHTTP
 from app.utils.logger import Logger
+from app.utils.rate_limit import recover_confirm_rate_limit, recover_rate_limit
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter()
-
-security = HTTPBearer()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post(
@@ -23,6 +21,7 @@ security = HTTPBearer()
     status_code=200,
     response_model=PasswordRecover,
     description="Send code by email to recover the password",
+    dependencies=[Depends(recover_rate_limit)],
 )
 def init_recover_password(
     recover_data: InitRecoverPassword,
@@ -42,6 +41,7 @@ def init_recover_password(
     tags=["Password"],
     status_code=200,
     description="Receive the code and the new password and update it if the code match",
+    dependencies=[Depends(recover_confirm_rate_limit)],
 )
 def recover_password(
     recover_data: UpdateRecoverPassword,
@@ -64,12 +64,12 @@ def recover_password(
 )
 def update_password(
     update_data: UpdatePassword,
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db_user: CurrentUser,
     db: Session = Depends(get_db),
 ):
     try:
         user_id = srv.update_password(
-            db, credentials, update_data.current_password, update_data.new_password
+            db, db_user, update_data.current_password, update_data.new_password
         )
         Logger().info(f"User {user_id} recovered the password")
         return {"user_id": user_id}
@@ -1,37 +1,37 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 import app.services.users_services as srv
+from app.auth.dependencies import CurrentUserId
 from app.db.database import get_db
 from app.schemas.chat import Chat
 from app.schemas.token import *
 from app.schemas.users import *
 from app.utils.api_exception import APIException, APIExceptionToHTTP
+from app.utils.executors import to_io
 from app.utils.logger import Logger
+from app.utils.responses import FastJSONRoute
 
-router = APIRouter()
-
-security = HTTPBearer()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.patch(
     "/users",
     tags=["Users"],
     status_code=200,
-    response_model=User,
-    description="Update user profile",
+    response_model=UpdatedUser,
+    description="Update the fields sent and report which ones changed",
 )
 def update_user_profile(
     updated_user: UserBase,
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    user_id: CurrentUserId,
     db: Session = Depends(get_db),
 ):
     try:
-        user = srv.update_user(db, credentials, updated_user)
-        Logger().info(f"User {user.id} updated")
+        user = srv.update_user(db, user_id, updated_user)
+        Logger().info(f"User {user.id} updated {user.changed_fields}")
         return user
     except APIException as e:
         Logger().err(str(e))
@@ -46,11 +46,11 @@ def update_user_profile(
     description="Delete user profile",
 )
 def delete_user_profile(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    user_id: CurrentUserId,
     db: Session = Depends(get_db),
 ):
     try:
-        db_user = srv.delete_user(db, credentials)
+        db_user = srv.delete_user(db, user_id)
         Logger().info(f"User {db_user.id} deleted")
         return db_user
     except APIException as e:
@@ -143,11 +143,11 @@ def user_preferences(
 )
 async def upload_avatar(
     avatar: Annotated[UploadFile, File()],
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_id: CurrentUserId,
     db: Session = Depends(get_db),
 ):
     try:
-        user = srv.update_avatar(db, credentials, avatar)
+        user = await to_io(srv.update_avatar, db, user_id, avatar)
         Logger().info(f"User {user.id} update avatar {user.avatar_link}")
         return user
     except APIException as e:
@@ -168,7 +168,7 @@ async def update_fcm_token(
         user_id = fcm_token.user_id
         token = fcm_token.fcm_token
 
-        db_user = srv.update_fcm_token(db, user_id, token)
+        db_user = await to_io(srv.update_fcm_token, db, user_id, token)
         Logger().info(f"User {user_id} update fcm_token")
         return db_user.fcm_token
     except APIException as e:
@@ -21,6 +21,7 @@ class UpdatePassword(BaseModel):
 class PasswordRecover(BaseModel):
     user_id: int
     emited_datetime: datetime
+    expires_at: datetime | None = None
     leftover_attempts: int
 
     class Config:
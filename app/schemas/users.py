@@ -15,10 +15,10 @@ class UserBase(BaseModel):
 class UserLogin(BaseModel):
     email: EmailStr = Field("user@example.com")
     password: str = Field("password", min_length=8)
+    device: Optional[str] = None
 
 
 class UserUpdate(UserBase):
-    refresh_token: Optional[str] = None
     avatar_link: Optional[str] = None
 
 
@@ -27,9 +27,21 @@ class UserCreate(UserBase):
     fcm_token: str
 
 
+class UserImport(UserBase):
+    email: EmailStr
+    # Either a plain password to hash or a bcrypt hash carried over as is
+    password: Optional[str] = Field(None, min_length=8)
+    hashed_password: Optional[str] = None
+    fcm_token: Optional[str] = None
+
+
 class User(UserBase):
     id: int
     avatar_link: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class UpdatedUser(User):
+    changed_fields: List[str] = []
@@ -0,0 +1,101 @@
+import base64
+import binascii
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import orjson
+
+from app.db import user_crud
+from app.db.database import SessionLocal
+from app.utils.api_exception import APIException
+from app.utils.config import env_int
+from app.utils.constants import INVALID_EXPORT_REQUEST_ERROR
+
+EXPORT_BATCH_SIZE = env_int("EXPORT_BATCH_SIZE", 1000)
+
+# Credentials, push tokens and chat handles never leave the service
+EXPORT_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "city",
+    "birth_date",
+    "preferences",
+    "avatar_link",
+    "updated_at",
+    "deleted_at",
+)
+
+
+def parse_fields(value: str | None) -> list[str]:
+    if not value:
+        return list(EXPORT_FIELDS)
+
+    fields = list(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise APIException(
+            code=INVALID_EXPORT_REQUEST_ERROR,
+            msg=f"Unknown export fields: {', '.join(unknown)}",
+        )
+    # The id always goes out, continuation tokens are built from it
+    return ["id"] + [field for field in fields if field != "id"]
+
+
+def encode_token(last_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps({"after": last_id})).decode()
+
+
+def decode_token(token: str) -> int:
+    try:
+        after = orjson.loads(base64.urlsafe_b64decode(token.encode()))["after"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        after = None
+    if not isinstance(after, int):
+        raise APIException(
+            code=INVALID_EXPORT_REQUEST_ERROR, msg="Invalid continuation token"
+        )
+    return after
+
+
+def export_users(
+    fields: list[str],
+    since: datetime | None = None,
+    after_id: int | None = None,
+    include_deleted: bool = False,
+    limit: int | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    # The generator owns its session: the request's one is closed before the
+    # body is streamed
+    with SessionLocal() as db:
+        result = user_crud.stream_users(
+            db, fields, since, after_id, include_deleted, limit, batch_size
+        )
+        sent = 0
+        last_id = None
+        # One chunk per fetched batch, only that batch is ever held in memory
+        for rows in result.partitions():
+            yield b"".join(
+                orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE)
+                for row in rows
+            )
+            sent += len(rows)
+            last_id = rows[-1].id
+
+    # A full page may not be the last one: the trailer tells the client where
+    # to pick up
+    if limit is not None and sent == limit:
+        yield orjson.dumps(
+            {"next_token": encode_token(last_id)}, option=orjson.OPT_APPEND_NEWLINE
+        )
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,99 @@
+import time
+
+from anyio.to_thread import current_default_thread_limiter
+from sqlalchemy import text
+
+from app.auth.recovery_store import RECOVERY_STORE_BACKEND
+from app.auth.token_families import REFRESH_GENERATION_BACKEND
+from app.db.database import engine
+from app.middlewares.in_flight import InFlightMiddleware
+from app.services import warmup_services
+from app.utils.config import env_float
+from app.utils.executors import cpu_pool, io_pool
+from app.utils.logger import Logger
+from app.utils.rate_limit import RATE_LIMIT_BACKEND
+
+READINESS_CACHE_SECONDS = env_float("READINESS_CACHE_SECONDS", 5.0)
+
+_readiness = None
+_readiness_checked = 0.0
+
+
+def check_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def check_redis():
+    from app.ext.redis import get_client
+
+    get_client().ping()
+
+
+def checks() -> dict:
+    critical = {"database": check_database}
+    if "redis" in (
+        REFRESH_GENERATION_BACKEND,
+        RATE_LIMIT_BACKEND,
+        RECOVERY_STORE_BACKEND,
+    ):
+        critical["redis"] = check_redis
+    return critical
+
+
+def readiness(now: float | None = None) -> tuple[bool, dict]:
+    global _readiness, _readiness_checked
+    now = time.monotonic() if now is None else now
+    # Probes hit every worker every few seconds, don't turn them into load
+    if _readiness is not None and now - _readiness_checked < READINESS_CACHE_SECONDS:
+        return _readiness
+
+    results = {}
+    for name, check in checks().items():
+        try:
+            check()
+            results[name] = "ok"
+        except Exception as e:
+            Logger().err(f"Readiness check {name} failed: {str(e)}")
+            results[name] = "unavailable"
+
+    if warmup_services.WARMUP_ENABLED:
+        results["warmup"] = "ok" if warmup_services.warmed_up else "pending"
+
+    ready = all(result == "ok" for result in results.values())
+    _readiness, _readiness_checked = (ready, results), now
+    return _readiness
+
+
+def db_pool_stats() -> dict:
+    pool = engine.pool
+    stats = {"status": pool.status()}
+    if hasattr(pool, "checkedout"):
+        size = pool.size()
+        checked_out = pool.checkedout()
+        # Above 1 the pool is into overflow connections, once those run out
+        # new requests block waiting for a connection
+        stats.update(
+            {
+                "size": size,
+                "checked_out": checked_out,
+                "overflow": max(pool.overflow(), 0),
+                "utilization": round(checked_out / size, 3) if size else 0,
+            }
+        )
+    return stats
+
+
+def saturation() -> dict:
+    # Must run on the event loop, the anyio limiter belongs to it
+    limiter = current_default_thread_limiter()
+    return {
+        "in_flight": InFlightMiddleware.count,
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "busy": limiter.borrowed_tokens,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+        "db_pool": db_pool_stats(),
+        "executors": {"cpu": cpu_pool.stats(), "io": io_pool.stats()},
+    }
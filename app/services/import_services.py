@@ -0,0 +1,202 @@
+import csv
+import os
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+import orjson
+from pydantic import ValidationError
+
+from app.auth import password as pwd
+from app.db import user_crud
+from app.db.database import SessionLocal
+from app.schemas.users import UserImport
+from app.services import users_services
+from app.utils.api_exception import APIException
+from app.utils.config import env_int
+from app.utils.constants import INVALID_IMPORT_REQUEST_ERROR
+from app.utils.executors import InstrumentedExecutor
+from app.utils.logger import Logger
+
+IMPORT_CHUNK_SIZE = env_int("IMPORT_CHUNK_SIZE", 1000)
+IMPORT_HASH_WORKERS = env_int("IMPORT_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+IMPORT_SIDE_EFFECT_WORKERS = env_int("IMPORT_SIDE_EFFECT_WORKERS", 2)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Imports hash on their own threads: queued behind a chunk on the shared cpu
+# pool, interactive logins would wait for thousands of hashes
+hash_pool = InstrumentedExecutor("import_hash", IMPORT_HASH_WORKERS)
+
+# Downstream calls for imported users drain here, one task per chunk, so a
+# large import cannot take over the io pool the requests rely on
+side_effects = InstrumentedExecutor("import", IMPORT_SIDE_EFFECT_WORKERS)
+
+
+def import_format(file_format: str | None, filename: str | None) -> str:
+    if file_format is None:
+        return "csv" if (filename or "").lower().endswith(".csv") else "ndjson"
+    if file_format not in IMPORT_FORMATS:
+        raise APIException(
+            code=INVALID_IMPORT_REQUEST_ERROR, msg=f"Unsupported format {file_format}"
+        )
+    return file_format
+
+
+def _csv_record(row: dict) -> dict:
+    record = {key: value or None for key, value in row.items() if key}
+    preferences = record.get("preferences")
+    if preferences:
+        # A JSON list or "a;b;c"
+        record["preferences"] = (
+            orjson.loads(preferences)
+            if preferences.startswith("[")
+            else preferences.split(";")
+        )
+    return record
+
+
+def read_records(file: BinaryIO, file_format: str) -> Iterator[tuple[int, dict | str]]:
+    # Yields (line, record), or (line, error message) for unreadable lines.
+    # Lines are decoded one by one: on 3.10 an upload's SpooledTemporaryFile
+    # cannot be wrapped in a TextIOWrapper
+    source = (line.decode("utf-8") for line in file)
+    if file_format == "csv":
+        reader = csv.DictReader(source)
+        for row in reader:
+            try:
+                yield reader.line_num, _csv_record(row)
+            except orjson.JSONDecodeError:
+                yield reader.line_num, "Invalid preferences"
+        return
+
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield line_number, "Invalid JSON"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Not an object"
+
+
+def validate(record: dict) -> UserImport | str:
+    try:
+        user = UserImport.model_validate(record)
+    except ValidationError as e:
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in e.errors()
+        )
+
+    if (user.password is None) == (user.hashed_password is None):
+        return "Exactly one of password and hashed_password is required"
+    if user.hashed_password is not None and not pwd.is_password_hash(
+        user.hashed_password
+    ):
+        return "Unsupported password hash"
+    return user
+
+
+def run_side_effects(users: list[tuple[int, UserImport]]):
+    # Same calls as a signup; the FCM token already went in with the row
+    for user_id, user in users:
+        users_services.update_recommendations(user_id, user.city, user.preferences)
+        users_services.create_assistant(user_id)
+
+
+def load_chunk(
+    chunk: list[tuple[int, UserImport]], report: dict, with_side_effects: bool
+):
+    plain = [user.password for _, user in chunk if user.hashed_password is None]
+    hashes = iter(pwd.get_password_hashes(plain, hash_pool))
+
+    now = datetime.now()
+    rows = [
+        {
+            **user.model_dump(exclude={"password"}),
+            "hashed_password": user.hashed_password or next(hashes),
+            "updated_at": now,
+        }
+        for _, user in chunk
+    ]
+    with SessionLocal() as db:
+        created = user_crud.copy_users(db, rows)
+
+    report["created"] += len(created)
+    report["conflicts"].extend(
+        {"line": line, "email": user.email, "reason": "Email already used"}
+        for line, user in chunk
+        if user.email not in created
+    )
+    if with_side_effects and created:
+        side_effects.submit(
+            run_side_effects,
+            [(created[user.email], user) for _, user in chunk if user.email in created],
+        )
+
+
+def _import_users(
+    file: BinaryIO,
+    file_format: str,
+    with_side_effects: bool,
+    chunk_size: int,
+    report: dict,
+    chunk: list,
+) -> dict:
+    emails = set()
+
+    for line, record in read_records(file, file_format):
+        report["received"] += 1
+        user = validate(record) if isinstance(record, dict) else record
+        if isinstance(user, str):
+            report["errors"].append({"line": line, "detail": user})
+            continue
+        if user.email in emails:
+            report["conflicts"].append(
+                {"line": line, "email": user.email, "reason": "Duplicated in file"}
+            )
+            continue
+
+        emails.add(user.email)
+        chunk.append((line, user))
+        if len(chunk) >= chunk_size:
+            load_chunk(chunk, report, with_side_effects)
+            chunk.clear()
+
+    if chunk:
+        load_chunk(chunk, report, with_side_effects)
+        chunk.clear()
+
+    Logger().info(
+        f"Imported {report['created']} of {report['received']} users, "
+        f"{len(report['conflicts'])} conflicts, {len(report['errors'])} errors"
+    )
+    return report
+
+
+def import_users(
+    file: BinaryIO,
+    file_format: str,
+    with_side_effects: bool = True,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> dict:
+    report = {"received": 0, "created": 0, "conflicts": [], "errors": []}
+    # The chunk being loaded when a failure stops the import
+    chunk = []
+
+    try:
+        return users_services.exception_handler(
+            lambda: _import_users(
+                file, file_format, with_side_effects, chunk_size, report, chunk
+            )
+        )
+    except APIException as e:
+        # Chunks before the failing one are committed: say where to resume
+        processed = report["received"] - len(chunk)
+        raise APIException(
+            code=e.get_code(),
+            msg=f"{str(e)} ({processed} lines processed, {report['created']} "
+            f"users created, {len(chunk)} lines failed from line "
+            f"{chunk[0][0] if chunk else '-'})",
+        ) from e
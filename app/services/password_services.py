@@ -5,23 +5,30 @@ import ssl
 from datetime import datetime, timedelta
 from email.message import EmailMessage
 
-from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.auth import authentication as auth
 from app.auth import password as pwd
-from app.db import pwd_recover_crud, user_crud
+from app.auth.recovery_store import get_store
+from app.db import models, user_crud
 from app.schemas.password import *
 from app.services import users_services as user_srv
 from app.utils.api_exception import APIException
+from app.utils.config import env_bool, env_int, env_str
 from app.utils.constants import *
+from app.utils.tracing import traced
 
 EMAIL = os.getenv("EMAIL_SENDER")
 PASSWORD = os.getenv("EMAIL_PASSWORD")
 
-EXPIRE_MINUTES = os.getenv("RECOVERY_PWD_CODE_EXPIRE_MINUTES")
+SMTP_HOST = env_str("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = env_int("SMTP_PORT", 465)
+SMTP_SSL = env_bool("SMTP_SSL", True)
 
+EXPIRE_MINUTES = env_int("RECOVERY_PWD_CODE_EXPIRE_MINUTES", 30)
+RECOVERY_ATTEMPTS = env_int("RECOVERY_ATTEMPTS", 3)
 
+
+@traced("smtp")
 def send_email(pin: int, email: str):
     body = f"""
           <!DOCTYPE html>
@@ -71,9 +78,13 @@ def send_email(pin: int, email: str):
     em.set_content(body)
     em.set_content(body, subtype="html")
 
-    context = ssl.create_default_context()
+    if SMTP_SSL:
+        context = ssl.create_default_context()
+        smtp_client = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context)
+    else:
+        smtp_client = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
+    with smtp_client as smtp:
         smtp.login(user=EMAIL, password=PASSWORD)
         smtp.sendmail(EMAIL, email, em.as_string())
 
@@ -82,24 +93,13 @@ def send_email(pin: int, email: str):
 
 def update_password(
     db: Session,
-    credentials: HTTPAuthorizationCredentials,
+    db_user: models.User,
     current_pwd: str,
     new_password: str,
 ) -> int:
-    user_id = auth.get_current_user(credentials.credentials)
-    if not user_id or credentials.scheme != "Bearer":
-        raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
-
-    db_user = user_crud.get_user(db, user_id)
-    if not db_user:
-        raise APIException(
-            code=USER_DOES_NOT_EXISTS_ERROR,
-            msg="User ID does not match with any valid user",
-        )
-
     if pwd.verify_password(current_pwd, db_user.hashed_password):
         hashed_password = pwd.get_password_hash(new_password)
-        db_user = user_srv.update_password(db, user_id, hashed_password)
+        db_user = user_srv.update_password(db, db_user.id, hashed_password)
         return db_user.id
 
     raise APIException(code=WRONG_PASSWORD_ERROR, msg="Current password does not match")
@@ -113,17 +113,19 @@ def init_recover_password(db: Session, email: str) -> PasswordRecover:
             msg="The received email does not correspond to any valid account",
         )
 
-    if pwd_recover_crud.get_recover(db, db_user.id):
-        pwd_recover_crud.delete_recover(db, db_user.id)
-
     pin = random.randint(100000, 999999)
     send_email(pin, email)
 
+    emited_datetime = datetime.now()
     recover = PasswordRecoverCreate.model_construct(
-        user_id=db_user.id, emited_datetime=datetime.now(), pin=pin
+        user_id=db_user.id,
+        emited_datetime=emited_datetime,
+        expires_at=emited_datetime + timedelta(minutes=EXPIRE_MINUTES),
+        leftover_attempts=RECOVERY_ATTEMPTS,
+        pin=pin,
     )
 
-    return pwd_recover_crud.new_pwd_recover(db, recover)
+    return get_store().create(db, recover)
 
 
 def recover_password(
@@ -138,16 +140,18 @@ def recover_password(
         )
     user_id = db_user.id
 
-    db_recover = pwd_recover_crud.get_recover(db, user_id)
+    # The attempt is spent before the PIN is compared, so concurrent guesses
+    # cannot all be checked against the same remaining count
+    store = get_store()
+    db_recover = store.consume_attempt(db, user_id)
     if not db_recover:
-        raise APIException(
-            code=RECOVERY_NOT_INITIATED_ERROR,
-            msg="The user did not initiate the password recovery process",
-        )
-
-    diff = datetime.now() - db_recover.emited_datetime
-    if (diff / timedelta(minutes=1)) > 30:
-        pwd_recover_crud.delete_recover(db, user_id)
+        # Expired recoveries are never returned by the store
+        if not store.get(db, user_id):
+            raise APIException(
+                code=RECOVERY_NOT_INITIATED_ERROR,
+                msg="The user has no active password recovery process",
+            )
+        store.delete(db, user_id)
         raise APIException(
             code=INVALID_RECOVERY_CODE_ERROR,
             msg="The code is no longer valid",
@@ -156,12 +160,11 @@ def recover_password(
     if db_recover.pin == recover_data.code:
         hashed_password = pwd.get_password_hash(recover_data.new_password)
         user_srv.update_password(db, user_id, hashed_password)
-        pwd_recover_crud.delete_recover(db, user_id)
+        store.delete(db, user_id)
         return user_id
 
-    db_recover = pwd_recover_crud.update_recover_attemps(db, user_id)
-    if db_recover.leftover_attempts == 0:
-        pwd_recover_crud.delete_recover(db, user_id)
+    if not db_recover.leftover_attempts:
+        store.delete(db, user_id)
         raise APIException(
             code=INVALID_RECOVERY_CODE_ERROR,
             msg="The code is no longer valid",
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from google.api_core.exceptions import NotFound
+from sqlalchemy.orm import Session
+
+from app.db import pwd_recover_crud, user_crud
+from app.db.database import SessionLocal
+from app.ext import firebase as fb
+from app.utils.config import env_float, env_int
+from app.utils.logger import Logger
+
+USER_PURGE_SECONDS = env_float("USER_PURGE_SECONDS", 60.0)
+USER_PURGE_BATCH_SIZE = env_int("USER_PURGE_BATCH_SIZE", 100)
+USER_PURGE_GRACE_SECONDS = env_int("USER_PURGE_GRACE_SECONDS", 0)
+RECOVERY_PURGE_SECONDS = env_float("RECOVERY_PURGE_SECONDS", 300.0)
+RECOVERY_PURGE_BATCH_SIZE = env_int("RECOVERY_PURGE_BATCH_SIZE", 500)
+
+
+def delete_avatar(avatar_link: str | None) -> bool:
+    image_id = fb.image_id_from_url("avatars", avatar_link) if avatar_link else None
+    if image_id is None:
+        return True
+
+    try:
+        fb.delete_image("avatars", image_id)
+    except NotFound:
+        pass
+    except Exception as e:
+        Logger().err(f"Error deleting avatar {image_id}: {str(e)}")
+        return False
+
+    return True
+
+
+def purge_deleted_users(db: Session, now: datetime | None = None) -> int:
+    deleted_before = (now or datetime.now()) - timedelta(
+        seconds=USER_PURGE_GRACE_SECONDS
+    )
+    purged = 0
+
+    while True:
+        batch = user_crud.get_deleted_users(db, deleted_before, USER_PURGE_BATCH_SIZE)
+        if not batch:
+            break
+
+        # Users whose avatar could not be removed stay soft-deleted and are
+        # retried on the next run
+        user_ids = [user_id for user_id, avatar in batch if delete_avatar(avatar)]
+        if user_ids:
+            purged += user_crud.purge_users(db, user_ids)
+        else:
+            db.rollback()
+
+        if len(user_ids) < len(batch) or len(batch) < USER_PURGE_BATCH_SIZE:
+            break
+
+    return purged
+
+
+def purge():
+    with SessionLocal() as db:
+        purged = purge_deleted_users(db)
+    if purged:
+        Logger().info(f"Purged {purged} deleted users")
+
+
+def purge_expired_recoveries(db: Session, now: datetime | None = None) -> int:
+    now = now or datetime.now()
+    purged = 0
+
+    # Small batches keep each delete's locks short
+    while True:
+        deleted = pwd_recover_crud.delete_expired(db, now, RECOVERY_PURGE_BATCH_SIZE)
+        purged += deleted
+        if deleted < RECOVERY_PURGE_BATCH_SIZE:
+            return purged
+
+
+def purge_recoveries():
+    with SessionLocal() as db:
+        purged = purge_expired_recoveries(db)
+    if purged:
+        Logger().info(f"Purged {purged} expired password recoveries")
@@ -1,26 +1,33 @@
 import os
 import secrets
+import uuid
+from datetime import datetime, timedelta
 
-import requests
 from fastapi import UploadFile
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.auth import authentication as auth
 from app.auth import password as pwd
-from app.db import models, user_crud
+from app.auth import revocation, token_families
+from app.db import models, session_crud, user_crud
+from app.ext import downstream
 from app.ext import firebase as fb
 from app.schemas.chat import Chat
 from app.schemas.token import *
 from app.schemas.users import *
 from app.utils.api_exception import APIException
+from app.utils.config import env_int, env_str
 from app.utils.constants import *
 from app.utils.logger import Logger
+from app.utils.resilience import DownstreamError
 
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
-ATTRACTIONS_SERVICE = os.getenv("ATTRACTIONS_SERVICE")
-EXTERNAL_SERVICES = os.getenv("EXTERNAL_SERVICES")
+REFRESH_TOKEN_EXPIRE_DAYS = env_int("REFRESH_TOKEN_EXPIRE_DAYS", 30)
+# "rotating" writes the session row on every refresh, "stateless" validates the
+# token generation in memory and only writes on revocation or reuse
+REFRESH_TOKEN_MODE = env_str("REFRESH_TOKEN_MODE", "rotating")
 
 # COMMON
 
@@ -39,14 +46,21 @@ def exception_handler(action):
 
 
 def update_recommendations(user_id: int, default_city: str, preferences: List[str]):
-    response = requests.put(
-        f"{ATTRACTIONS_SERVICE}/update_recommendations",
-        json={
-            "user_id": user_id,
-            "default_city": default_city,
-            "preferences": preferences,
-        },
-    )
+    # A slow or failing downstream must not fail the request, the breaker
+    # and bulkhead keep it from holding our threads
+    try:
+        response = downstream.attractions.request(
+            "PUT",
+            "/update_recommendations",
+            json={
+                "user_id": user_id,
+                "default_city": default_city,
+                "preferences": preferences,
+            },
+        )
+    except DownstreamError as e:
+        Logger().err(f"Error updating user {user_id} recommendations: {str(e)}")
+        return
 
     if response.status_code == 200:
         Logger().info(f"User {user_id} update recommendations")
@@ -55,10 +69,13 @@ def update_recommendations(user_id: int, default_city: str, preferences: List[st
 
 
 def create_assistant(user_id: int):
-    response = requests.post(
-        f"{EXTERNAL_SERVICES}/chatbot/create",
-        params={"user_id": user_id},
-    )
+    try:
+        response = downstream.chatbot.request(
+            "POST", "/chatbot/create", params={"user_id": user_id}
+        )
+    except DownstreamError as e:
+        Logger().err(f"Error creating user {user_id} assitant: {str(e)}")
+        return
 
     if response.status_code == 201:
         Logger().info(f"User {user_id} assistant created")
@@ -66,29 +83,134 @@ def create_assistant(user_id: int):
         Logger().err(f"Error creating user {user_id} assitant")
 
 
-def create_session_tokens(db: Session, user: models.User):
-    token = auth.create_access_token(
-        data={"sub": user.id}, expires_delta=int(ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
+def new_refresh_token(
+    user_id: int,
+    session_id: str,
+    generation: int = 0,
+    expires_at: datetime | None = None,
+) -> tuple[str, datetime]:
+    if expires_at is None:
+        expires_at = datetime.now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
 
-    random_secret = secrets.token_hex(8)
     refresh_token = auth.create_access_token(
-        data={"sub": user.id, "secret": random_secret}
+        data={
+            "sub": user_id,
+            "sid": session_id,
+            "typ": auth.REFRESH_TOKEN_TYPE,
+            "gen": generation,
+            "secret": secrets.token_hex(8),
+            "exp": expires_at,
+        }
+    )
+
+    return refresh_token, expires_at
+
+
+def new_access_token(user_id: int, session_id: str | None = None) -> str:
+    return auth.create_access_token(
+        data={
+            "sub": user_id,
+            "sid": session_id,
+            "typ": auth.ACCESS_TOKEN_TYPE,
+            "jti": uuid.uuid4().hex,
+        },
+        expires_delta=int(ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+
+def create_session_tokens(db: Session, user: models.User, device: str | None = None):
+    session_id = uuid.uuid4().hex
+    refresh_token, expires_at = new_refresh_token(user.id, session_id)
+
+    session_crud.create_session(
+        db,
+        session_id,
+        user.id,
+        auth.hash_token(refresh_token),
+        expires_at,
+        device=device,
     )
 
-    user_update = UserUpdate.model_construct(
-        username=user.username,
-        email=user.email,
-        birth_date=user.birth_date,
-        preferences=user.preferences,
+    return Token.model_construct(
+        token=new_access_token(user.id, session_id),
         refresh_token=refresh_token,
+        token_type="jwt",
     )
 
-    user_crud.update_user(db, user.id, user_update)
+
+def invalid_refresh_token():
+    return APIException(code=INVALID_CREDENTIALS_ERROR, msg="Invalid refresh token")
+
+
+def rotate_session_tokens(db: Session, refresh_token: str) -> Token:
+    payload = auth.decode_token(refresh_token)
+    user_id = payload.get("sub")
+    session_id = payload.get("sid")
+    if (
+        user_id is None
+        or session_id is None
+        or payload.get("typ") != auth.REFRESH_TOKEN_TYPE
+    ):
+        raise invalid_refresh_token()
+
+    if REFRESH_TOKEN_MODE == "stateless":
+        new_token = rotate_stateless(db, user_id, session_id, payload)
+    else:
+        new_token = rotate_stateful(db, user_id, session_id, refresh_token)
 
     return Token.model_construct(
-        token=token, refresh_token=refresh_token, token_type="jwt"
+        token=new_access_token(user_id, session_id),
+        refresh_token=new_token,
+        token_type="jwt",
+    )
+
+
+def rotate_stateful(
+    db: Session, user_id: int, session_id: str, refresh_token: str
+) -> str:
+    new_token, expires_at = new_refresh_token(user_id, session_id)
+    rotated = session_crud.rotate_session(
+        db,
+        session_id,
+        user_id,
+        auth.hash_token(refresh_token),
+        auth.hash_token(new_token),
+        expires_at,
+    )
+    if not rotated:
+        raise invalid_refresh_token()
+
+    return new_token
+
+
+def rotate_stateless(db: Session, user_id: int, session_id: str, payload: dict) -> str:
+    # The session row is the token family: it is only read here, and written
+    # when the family gets revoked
+    generation = payload.get("gen")
+    if generation is None:
+        raise invalid_refresh_token()
+
+    db_session = session_crud.get_session(db, session_id)
+    if (
+        not db_session
+        or db_session.user_id != user_id
+        or db_session.expires_at <= datetime.now()
+    ):
+        raise invalid_refresh_token()
+
+    ttl = int((db_session.expires_at - datetime.now()).total_seconds()) + 1
+    if not token_families.get_backend().advance(session_id, generation, ttl):
+        session_crud.delete_session(db, session_id)
+        token_families.get_backend().forget(session_id)
+        Logger().warn(
+            f"Refresh token reuse for user {user_id}, session {session_id} revoked"
+        )
+        raise invalid_refresh_token()
+
+    new_token, _ = new_refresh_token(
+        user_id, session_id, generation + 1, db_session.expires_at
     )
+    return new_token
 
 
 # SERVICES
@@ -112,25 +234,18 @@ def new_user(db: Session, user: UserCreate) -> UserCreate:
     return exception_handler(create_user_logic)
 
 
-def new_login(db: Session, user: UserLogin) -> Token:
+def new_login(db: Session, user: UserLogin, device: str | None = None) -> Token:
     def log_user_logic():
         db_user = pwd.authenticate_user(db, user.email, user.password)
 
         if not db_user:
             raise APIException(code=LOGIN_ERROR, msg=f"Invalid credentials")
 
-        return create_session_tokens(db, db_user)
+        return create_session_tokens(db, db_user, device)
 
     return exception_handler(log_user_logic)
 
 
-def auth_user(credentials: HTTPAuthorizationCredentials) -> int:
-    if credentials.scheme != "Bearer":
-        raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
-
-    return auth.authorize_token(credentials.credentials)
-
-
 def refresh_user_tokens(
     db: Session, credentials: HTTPAuthorizationCredentials
 ) -> Token:
@@ -138,40 +253,75 @@ def refresh_user_tokens(
         if credentials.scheme != "Bearer":
             raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
 
-        user_id = auth.get_current_user(credentials.credentials)
+        return rotate_session_tokens(db, credentials.credentials)
+
+    return exception_handler(refresh_token_logic)
+
 
-        db_user = user_crud.get_user(db, user_id)
-        if db_user.refresh_token != credentials.credentials:
+def logout_user(db: Session, claims: dict):
+    def logout_logic():
+        jti = claims.get("jti")
+        session_id = claims.get("sid")
+        if jti is None and session_id is None:
             raise APIException(
-                code=INVALID_CREDENTIALS_ERROR, msg="Invalid refresh token"
+                code=INVALID_CREDENTIALS_ERROR, msg="Could not validate credentials"
             )
 
-        return create_session_tokens(db, db_user)
+        if jti:
+            revocation.revoke(db, jti, revocation.expiration(claims))
+        if session_id:
+            session_crud.delete_session(db, session_id)
+            token_families.get_backend().forget(session_id)
+            # Access tokens refreshed earlier in the session outlive the row
+            revocation.revoke_session(
+                db,
+                session_id,
+                datetime.now() + timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES)),
+            )
 
-    return exception_handler(refresh_token_logic)
+    return exception_handler(logout_logic)
+
+
+RECOMMENDATION_FIELDS = {"city", "preferences"}
+# Sent as null these would lock the user out or break the recommendations,
+# only the optional profile fields can be cleared
+REQUIRED_FIELDS = ("email", "username", "preferences")
 
 
-def update_user(
-    db: Session,
-    credentials: HTTPAuthorizationCredentials,
-    updated_user: UserBase,
-) -> User:
+def update_user(db: Session, user_id: int, updated_user: UserBase) -> UpdatedUser:
     def update_user_logic():
-        if credentials.scheme != "Bearer":
-            raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
+        changes = updated_user.model_dump(include=updated_user.model_fields_set)
+        cleared = [
+            field
+            for field in REQUIRED_FIELDS
+            if field in changes and changes[field] is None
+        ]
+        if cleared:
+            raise APIException(
+                code=INVALID_UPDATE_REQUEST_ERROR,
+                msg=f"{', '.join(cleared)} cannot be cleared",
+            )
 
-        user_id = auth.get_current_user(credentials.credentials)
+        try:
+            db_user, changed = user_crud.update_user_fields(db, user_id, changes)
+        except IntegrityError:
+            # The unique index on live emails
+            db.rollback()
+            raise APIException(
+                code=USER_EXISTS_ERROR, msg=f"Email {changes.get('email')} already used"
+            )
 
-        db_user = user_crud.update_user(db, user_id, updated_user)
         if not db_user:
             raise APIException(
                 code=USER_DOES_NOT_EXISTS_ERROR, msg="User does not exist"
             )
 
-        if updated_user.preferences or updated_user.city:
+        if RECOMMENDATION_FIELDS.intersection(changed):
             update_recommendations(user_id, db_user.city, db_user.preferences)
 
-        return db_user
+        return UpdatedUser.model_validate(db_user).model_copy(
+            update={"changed_fields": changed}
+        )
 
     return exception_handler(update_user_logic)
 
@@ -180,19 +330,21 @@ def update_password(db: Session, user_id: int, new_password_hashed: str) -> User
     return user_crud.update_user_pwd(db, user_id, new_password_hashed)
 
 
-def delete_user(db: Session, credentials: HTTPAuthorizationCredentials) -> User:
+def delete_user(db: Session, user_id: int) -> User:
     def delete_user_logic():
-        if credentials.scheme != "Bearer":
-            raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
-
-        user_id = auth.get_current_user(credentials.credentials)
-
-        db_user = user_crud.delete_user(db, user_id)
+        db_user, session_ids = user_crud.delete_user(db, user_id)
         if not db_user:
             raise APIException(
                 code=USER_DOES_NOT_EXISTS_ERROR, msg="User does not exist"
             )
 
+        # Access tokens of the deleted sessions stay valid until they expire
+        expires_at = datetime.now() + timedelta(
+            minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        for session_id in session_ids:
+            token_families.get_backend().forget(session_id)
+            revocation.revoke_session(db, session_id, expires_at)
         return db_user
 
     return exception_handler(delete_user_logic)
@@ -252,15 +404,8 @@ def get_user_preferences(db: Session, user_id: int) -> list[str]:
     return exception_handler(get_user_preferences_logic)
 
 
-def update_avatar(
-    db: Session, credentials: HTTPAuthorizationCredentials, avatar: UploadFile
-) -> User:
+def update_avatar(db: Session, user_id: int, avatar: UploadFile) -> User:
     def get_user_preferences_logic():
-        if credentials.scheme != "Bearer":
-            raise APIException(code=INVALID_HEADER_ERROR, msg="Not authenticated")
-
-        user_id = auth.get_current_user(credentials.credentials)
-
         avatar_link = fb.upload_image(
             "avatars",
             avatar.content_type,
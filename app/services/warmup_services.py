@@ -0,0 +1,96 @@
+import time
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.auth import authentication as auth
+from app.auth import password as pwd
+from app.auth.recovery_store import RECOVERY_STORE_BACKEND
+from app.auth.token_families import REFRESH_GENERATION_BACKEND
+from app.db.database import engine
+from app.ext import downstream
+from app.ext import firebase as fb
+from app.services import users_services
+from app.utils.config import env_bool, env_int
+from app.utils.logger import Logger
+from app.utils.rate_limit import RATE_LIMIT_BACKEND
+from app.utils.responses import serializer_for
+
+WARMUP_ENABLED = env_bool("WARMUP_ENABLED")
+WARMUP_DB_CONNECTIONS = env_int("WARMUP_DB_CONNECTIONS", 5)
+
+warmed_up = False
+
+
+def warm_database(connections: int = WARMUP_DB_CONNECTIONS):
+    # Hold them all at once so the pool ends up with that many open connections
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def warm_downstream():
+    for client in (downstream.attractions, downstream.chatbot):
+        if not client.base_url:
+            continue
+        # Straight through the session: a cold service must not trip the breaker
+        try:
+            client.session.head(client.base_url, timeout=client.timeout)
+        except Exception as e:
+            Logger().warn(f"Warm-up could not reach {client.name}: {str(e)}")
+
+
+def warm_storage():
+    fb.warm_up()
+
+
+def warm_redis():
+    if "redis" not in (
+        REFRESH_GENERATION_BACKEND,
+        RATE_LIMIT_BACKEND,
+        RECOVERY_STORE_BACKEND,
+    ):
+        return
+    from app.ext.redis import get_client
+
+    get_client().ping()
+
+
+def warm_crypto():
+    hashed = pwd.get_password_hash("warm-up")
+    pwd.verify_password("warm-up", hashed)
+    auth.decode_token(users_services.new_access_token(0))
+
+
+def warm_serializers(routes):
+    for route in routes:
+        if getattr(route, "response_model", None) is not None:
+            serializer_for(route.response_model)
+
+
+def _step(name: str, action: Callable[[], None]):
+    start = time.perf_counter()
+    try:
+        action()
+        Logger().info(
+            f"Warm-up {name} took {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+    except Exception as e:
+        Logger().warn(f"Warm-up {name} failed: {str(e)}")
+
+
+def warm_up(routes):
+    global warmed_up
+    _step("database", warm_database)
+    _step("downstream", warm_downstream)
+    _step("storage", warm_storage)
+    _step("redis", warm_redis)
+    _step("crypto", warm_crypto)
+    _step("serializers", lambda: warm_serializers(routes))
+    warmed_up = True
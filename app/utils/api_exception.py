@@ -28,6 +28,11 @@ class APIExceptionToHTTP:
             RECOVERY_NOT_INITIATED_ERROR: status.HTTP_404_NOT_FOUND,
             INVALID_RECOVERY_CODE_ERROR: status.HTTP_400_BAD_REQUEST,
             WRONG_PASSWORD_ERROR: status.HTTP_400_BAD_REQUEST,
+            TOO_MANY_REQUESTS_ERROR: status.HTTP_429_TOO_MANY_REQUESTS,
+            SERVICE_OVERLOADED_ERROR: status.HTTP_503_SERVICE_UNAVAILABLE,
+            INVALID_EXPORT_REQUEST_ERROR: status.HTTP_400_BAD_REQUEST,
+            INVALID_IMPORT_REQUEST_ERROR: status.HTTP_400_BAD_REQUEST,
+            INVALID_UPDATE_REQUEST_ERROR: status.HTTP_400_BAD_REQUEST,
         }
 
     def convert(
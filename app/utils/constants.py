@@ -14,3 +14,10 @@ WRONG_PASSWORD_ERROR = "WRONG_PASSWORD_ERROR"
 
 RECOVERY_NOT_INITIATED_ERROR = "RECOVERY_NOT_INITIATED_ERROR"
 INVALID_RECOVERY_CODE_ERROR = "INVALID_RECOVERY_CODE_ERROR"
+
+TOO_MANY_REQUESTS_ERROR = "TOO_MANY_REQUESTS_ERROR"
+SERVICE_OVERLOADED_ERROR = "SERVICE_OVERLOADED_ERROR"
+
+INVALID_EXPORT_REQUEST_ERROR = "INVALID_EXPORT_REQUEST_ERROR"
+INVALID_IMPORT_REQUEST_ERROR = "INVALID_IMPORT_REQUEST_ERROR"
+INVALID_UPDATE_REQUEST_ERROR = "INVALID_UPDATE_REQUEST_ERROR"
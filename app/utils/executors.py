@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.utils import metrics, profiler
+from app.utils.config import env_int
+from app.utils.sampler import sampler
+
+CPU_POOL_SIZE = env_int("CPU_POOL_SIZE", os.cpu_count() or 1)
+IO_POOL_SIZE = env_int("IO_POOL_SIZE", 32)
+
+# Every pool, wherever it was created, so the lifespan teardown stops them all
+_executors: "weakref.WeakSet[InstrumentedExecutor]" = weakref.WeakSet()
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+        self.queued = 0
+        self.active = 0
+        self._counts = threading.Lock()
+        self._local = threading.local()
+        metrics.EXECUTOR_WORKERS.labels(name).set(max_workers)
+        _executors.add(self)
+
+    @property
+    def in_worker(self) -> bool:
+        return getattr(self._local, "active", False)
+
+    def _count(self, queued: int, active: int):
+        with self._counts:
+            self.queued += queued
+            self.active += active
+
+    def stats(self) -> dict:
+        with self._counts:
+            return {
+                "workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+            }
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        submitted = time.perf_counter()
+        self._count(queued=1, active=0)
+        metrics.EXECUTOR_QUEUED.labels(self.name).inc()
+        # Carry the request context over, like anyio does for its threadpool
+        context = contextvars.copy_context()
+        fn = profiler.bound(fn)
+        route = sampler.current_route()
+
+        def task():
+            started = time.perf_counter()
+            self._count(queued=-1, active=1)
+            metrics.EXECUTOR_QUEUED.labels(self.name).dec()
+            metrics.EXECUTOR_ACTIVE.labels(self.name).inc()
+            metrics.EXECUTOR_WAIT.labels(self.name).observe(started - submitted)
+            self._local.active = True
+            if route:
+                sampler.thread_routes[threading.get_ident()] = route
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                self._local.active = False
+                if route:
+                    sampler.thread_routes.pop(threading.get_ident(), None)
+                self._count(queued=0, active=-1)
+                metrics.EXECUTOR_ACTIVE.labels(self.name).dec()
+                metrics.EXECUTOR_RUN.labels(self.name).observe(
+                    time.perf_counter() - started
+                )
+
+        return super().submit(task)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        # Nested calls run inline, waiting on our own pool could deadlock it
+        if self.in_worker:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run_async(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(fn, *args, **kwargs))
+
+
+# bcrypt and other hashing, sized to the cores so it cannot crowd out I/O
+cpu_pool = InstrumentedExecutor("cpu", CPU_POOL_SIZE)
+# Blocking clients (Firebase, SQL) called from async handlers
+io_pool = InstrumentedExecutor("io", IO_POOL_SIZE)
+
+
+def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    return cpu_pool.run(fn, *args, **kwargs)
+
+
+def run_io(fn: Callable, *args, **kwargs) -> Any:
+    return io_pool.run(fn, *args, **kwargs)
+
+
+async def to_cpu(fn: Callable, *args, **kwargs) -> Any:
+    return await cpu_pool.run_async(fn, *args, **kwargs)
+
+
+async def to_io(fn: Callable, *args, **kwargs) -> Any:
+    return await io_pool.run_async(fn, *args, **kwargs)
+
+
+def shutdown():
+    for pool in list(_executors):
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,16 @@
 class Logger:
     RED = "\033[91m"
     GREEN = "\033[92m"
+    YELLOW = "\033[93m"
     BLUE = "\033[34m"
     END = "\033[0m"
 
     def err(self, msg: str):
         print(f"{Logger.RED}[ERROR]{Logger.END} - {msg}")
 
+    def warn(self, msg: str):
+        print(f"{Logger.YELLOW}[WARN]{Logger.END} - {msg}")
+
     def debug(self, msg: str):
         print(f"{Logger.GREEN}[DEBUG]{Logger.END} - {msg}")
 
@@ -0,0 +1,106 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from starlette.types import Scope
+
+from app.utils import metrics
+from app.utils.config import env_bool, env_float
+from app.utils.logger import Logger
+from app.utils.request_context import route_name
+
+LOOP_MONITOR = env_bool("LOOP_MONITOR")
+# asyncio debug mode also logs every slow callback, too noisy for production
+LOOP_MONITOR_DEBUG = env_bool("LOOP_MONITOR_DEBUG")
+LOOP_LAG_THRESHOLD_MS = env_float("LOOP_LAG_THRESHOLD_MS", 100)
+LOOP_MONITOR_INTERVAL = env_float("LOOP_MONITOR_INTERVAL", 0.05)
+# Fraction of stalls whose stack gets captured and logged
+LOOP_STACK_SAMPLE_RATE = env_float("LOOP_STACK_SAMPLE_RATE", 1.0)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        threshold: float = LOOP_LAG_THRESHOLD_MS / 1000,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        sample_rate: float = LOOP_STACK_SAMPLE_RATE,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self._scopes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def track(self, scope: Scope):
+        task = asyncio.current_task()
+        if task is not None:
+            self._scopes[task] = scope
+
+    def start(self, debug: bool = LOOP_MONITOR_DEBUG):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._watchdog:
+            self._watchdog.join(1.0)
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            metrics.LOOP_LAG.observe(max(0.0, self._beat - expected))
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            # One report per stall, the heartbeat histogram has the full length
+            if blocked < self.threshold or reported == beat:
+                continue
+            reported = beat
+            self.report(blocked)
+
+    def current_route(self) -> str:
+        task = asyncio.current_task(self._loop)
+        scope = self._scopes.get(task) if task is not None else None
+        return route_name(scope) if scope else "unknown"
+
+    def report(self, blocked: float):
+        route = self.current_route()
+        metrics.LOOP_STALLS.labels(route).inc()
+        if random.random() >= self.sample_rate:
+            return
+
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        Logger().warn(
+            f"Event loop blocked for over {blocked * 1000:.0f}ms by {route}\n{stack}"
+        )
+
+
+monitor = LoopMonitor()
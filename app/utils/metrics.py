@@ -0,0 +1,100 @@
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from app.utils.config import env_bool
+
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+
+DOWNSTREAM_REQUESTS = Counter(
+    "downstream_requests_total",
+    "Calls to downstream services by outcome",
+    ["service", "outcome"],
+)
+DOWNSTREAM_LATENCY = Histogram(
+    "downstream_request_seconds",
+    "Latency of downstream calls that got a response",
+    ["service"],
+)
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["service"],
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ["service", "state"],
+)
+BULKHEAD_IN_USE = Gauge(
+    "bulkhead_in_use",
+    "Calls currently holding a bulkhead slot",
+    ["service"],
+)
+BULKHEAD_REJECTED = Counter(
+    "bulkhead_rejected_total",
+    "Calls rejected because the bulkhead was full",
+    ["service"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests admitted and running per route class",
+    ["route_class"],
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Requests waiting for admission per route class",
+    ["route_class"],
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed with 503 per route class",
+    ["route_class", "reason"],
+)
+EXECUTOR_WORKERS = Gauge(
+    "executor_workers",
+    "Configured worker threads per executor",
+    ["executor"],
+)
+EXECUTOR_ACTIVE = Gauge(
+    "executor_active",
+    "Tasks currently running per executor",
+    ["executor"],
+)
+EXECUTOR_QUEUED = Gauge(
+    "executor_queued",
+    "Tasks waiting for a worker per executor",
+    ["executor"],
+)
+EXECUTOR_WAIT = Histogram(
+    "executor_wait_seconds",
+    "Time tasks spend queued before a worker picks them up",
+    ["executor"],
+)
+EXECUTOR_RUN = Histogram(
+    "executor_run_seconds",
+    "Time tasks spend running on a worker",
+    ["executor"],
+)
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop heartbeat past its scheduled wake up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Times the event loop was blocked past the threshold",
+    ["route"],
+)
+SAMPLER_SECONDS = Counter(
+    "stack_sampler_seconds_total",
+    "Time the continuous stack sampler spent taking samples",
+)
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,34 @@
+import threading
+from typing import Callable
+
+from app.utils.logger import Logger
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, action: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.action = action
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                self.action()
+            except Exception as e:
+                Logger().err(f"Periodic task {self.name} failed: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,257 @@
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import Scope
+
+from app.utils.config import env_bool, env_float, env_str
+from app.utils.request_context import route_name
+
+PROFILER_ENABLED = env_bool("PROFILER_ENABLED")
+# Key for the X-Debug-Profile header, "<expires unix ts>.<hex hmac-sha256>"
+PROFILER_SECRET = env_str("PROFILER_SECRET")
+PROFILER_SAMPLE_RATE = env_float("PROFILER_SAMPLE_RATE", 0.0)
+PROFILER_INTERVAL = env_float("PROFILER_INTERVAL", 0.005)
+PROFILER_DIR = env_str("PROFILER_DIR", "/tmp/profiles")
+
+PROFILE_HEADER = b"x-debug-profile"
+REQUEST_ID_MAX_LENGTH = 64
+
+_active: ContextVar["Profile | None"] = ContextVar("profile", default=None)
+
+
+def sign(expires: int, secret: str) -> str:
+    digest = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256)
+    return f"{expires}.{digest.hexdigest()}"
+
+
+def valid_signature(value: str, secret: str | None) -> bool:
+    if not secret:
+        return False
+    expires, _, _ = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(value, sign(int(expires), secret))
+
+
+def should_profile(scope: Scope) -> bool:
+    for key, value in scope.get("headers", []):
+        if key == PROFILE_HEADER:
+            return valid_signature(value.decode("latin-1"), PROFILER_SECRET)
+    return random.random() < PROFILER_SAMPLE_RATE
+
+
+def _thread_cpu_time(thread_id: int) -> float | None:
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profile:
+    def __init__(self, scope: Scope, interval: float = PROFILER_INTERVAL):
+        self.scope = scope
+        self.interval = interval
+        self.request_id = self._request_id()
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.threads: Counter = Counter()
+        self.wall: Counter = Counter()
+        # Microseconds of CPU time per stack
+        self.cpu: Counter = Counter()
+        self.statements: list[tuple[str, float]] = []
+        self.calls: list[tuple[str, str, str, float]] = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._cpu_times: dict[int, float] = {}
+        self._name = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def _request_id(self) -> str:
+        for key, value in self.scope.get("headers", []):
+            if key == b"x-request-id":
+                # Client supplied and part of the file name: keep it to a
+                # short run of safe characters
+                request_id = re.sub(r"[^A-Za-z0-9]+", "_", value.decode("latin-1"))
+                request_id = request_id.strip("_")[:REQUEST_ID_MAX_LENGTH]
+                if request_id:
+                    return request_id
+        return uuid.uuid4().hex
+
+    @property
+    def name(self) -> str:
+        # Fixed on first use, the route is only known once routing has run
+        if self._name is None:
+            route = re.sub(r"[^A-Za-z0-9]+", "_", route_name(self.scope)).strip("_")
+            self._name = f"{int(time.time())}-{route}-{self.request_id}"
+        return self._name
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+
+    def bind_thread(self, thread_id: int):
+        self.threads[thread_id] += 1
+
+    def unbind_thread(self, thread_id: int):
+        self.threads[thread_id] -= 1
+        if self.threads[thread_id] <= 0:
+            del self.threads[thread_id]
+
+    def _sampled_threads(self) -> list[int]:
+        threads = list(self.threads)
+        # The loop thread only counts while our request task is the one running
+        if asyncio.current_task(self.loop) is self.task:
+            threads.append(self.loop_thread)
+        return threads
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id in self._sampled_threads():
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = fold(frame)
+            self.wall[stack] += 1
+
+            cpu_time = _thread_cpu_time(thread_id)
+            previous = self._cpu_times.get(thread_id)
+            self._cpu_times[thread_id] = cpu_time
+            if cpu_time is not None and previous is not None and cpu_time > previous:
+                self.cpu[stack] += round((cpu_time - previous) * 1_000_000)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def write(self, directory: str = PROFILER_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.name)
+
+        for kind, stacks in (("wall", self.wall), ("cpu", self.cpu)):
+            with open(f"{base}.{kind}.folded", "w") as out:
+                for stack, count in stacks.most_common():
+                    out.write(f"{stack} {count}\n")
+
+        with open(f"{base}.json", "w") as out:
+            json.dump(
+                {
+                    "route": route_name(self.scope),
+                    "request_id": self.request_id,
+                    "elapsed_ms": round(self.elapsed * 1000, 3),
+                    "interval_ms": self.interval * 1000,
+                    "statements": [
+                        {"statement": statement, "ms": round(elapsed * 1000, 3)}
+                        for statement, elapsed in self.statements
+                    ],
+                    "calls": [
+                        {
+                            "service": service,
+                            "method": method,
+                            "path": path,
+                            "ms": round(elapsed * 1000, 3),
+                        }
+                        for service, method, path, elapsed in self.calls
+                    ],
+                },
+                out,
+                indent=2,
+            )
+
+        return base
+
+
+def current() -> Profile | None:
+    return _active.get()
+
+
+def activate(profile: Profile):
+    return _active.set(profile)
+
+
+def deactivate(token):
+    _active.reset(token)
+
+
+def bound(fn: Callable) -> Callable:
+    # Worker threads see the request context but the sampler has to be told
+    # which threads are busy with the profiled request
+    if not PROFILER_ENABLED or asyncio.iscoroutinefunction(fn):
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+
+        thread_id = threading.get_ident()
+        profile.bind_thread(thread_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.unbind_thread(thread_id)
+
+    return wrapper
+
+
+def record_call(service: str, method: str, path: str, elapsed: float):
+    profile = _active.get()
+    if profile is not None:
+        profile.calls.append((service, method, path, elapsed))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    starts = conn.info.get("profile_start")
+    if profile is not None and starts:
+        profile.statements.append((statement, time.perf_counter() - starts.pop()))
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    starts = connection.info.get("profile_start") if connection else None
+    if starts:
+        starts.pop()
+
+
+def setup(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
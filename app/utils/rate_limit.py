@@ -0,0 +1,213 @@
+import ipaddress
+import math
+import threading
+import time
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.api_exception import APIException, APIExceptionToHTTP
+from app.utils.config import env_bool, env_str
+from app.utils.constants import TOO_MANY_REQUESTS_ERROR
+from app.utils.logger import Logger
+
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_BACKEND = env_str("RATE_LIMIT_BACKEND", "memory")
+
+# Comma separated addresses or CIDRs of the proxies in front of the service
+# (e.g. the load balancer's subnet). X-Forwarded-For is only read from them
+RATE_LIMIT_TRUSTED_PROXIES = env_str("RATE_LIMIT_TRUSTED_PROXIES", "")
+# Behind an unconfigured proxy every client shares the proxy's address, so
+# per-IP limits stay off until the proxies are listed or this is set
+RATE_LIMIT_PER_IP = env_bool("RATE_LIMIT_PER_IP", bool(RATE_LIMIT_TRUSTED_PROXIES))
+
+# "<requests>/<seconds>" per client IP and per email. With the memory backend
+# every worker counts on its own, so the effective limit is multiplied by the
+# number of workers; use the redis backend for a shared count
+RATE_LIMIT_LOGIN_IP = env_str("RATE_LIMIT_LOGIN_IP", "30/60")
+RATE_LIMIT_LOGIN_EMAIL = env_str("RATE_LIMIT_LOGIN_EMAIL", "5/60")
+RATE_LIMIT_RECOVER_IP = env_str("RATE_LIMIT_RECOVER_IP", "10/900")
+RATE_LIMIT_RECOVER_EMAIL = env_str("RATE_LIMIT_RECOVER_EMAIL", "3/900")
+
+
+def parse_limit(value: str) -> tuple[int, int]:
+    requests, _, seconds = value.partition("/")
+    return int(requests), int(seconds)
+
+
+def retry_after(
+    current: int, previous: int, elapsed: float, limit: int, window: int
+) -> int:
+    # Sliding window counter: the previous window weighs in proportionally to
+    # how much of it still overlaps the sliding window
+    estimate = previous * (1 - elapsed / window) + current
+    if estimate <= limit:
+        return 0
+
+    if current > limit or not previous:
+        wait = window - elapsed
+    else:
+        wait = window * (1 - (limit - current) / previous) - elapsed
+    return max(1, math.ceil(wait))
+
+
+class MemoryBackend:
+    blocking = False
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._windows: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key: str, limit: int, window: int) -> int:
+        now = time.time()
+        index = int(now // window)
+
+        with self._lock:
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+            entry = self._windows.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = [index, 0, 0, window]
+            elif entry[0] == index - 1:
+                entry = [index, 0, entry[1], window]
+            entry[1] += 1
+            self._windows[key] = entry
+            current, previous = entry[1], entry[2]
+
+        return retry_after(current, previous, now - index * window, limit, window)
+
+    def _prune(self, now: float):
+        stale = [
+            key
+            for key, (index, _, _, window) in self._windows.items()
+            if index < int(now // window) - 1
+        ]
+        for key in stale:
+            del self._windows[key]
+
+
+class RedisBackend:
+    blocking = True
+
+    def hit(self, key: str, limit: int, window: int) -> int:
+        from app.ext.redis import get_client
+
+        now = time.time()
+        index = int(now // window)
+        current_key = f"rate_limit:{key}:{index}"
+        previous_key = f"rate_limit:{key}:{index - 1}"
+
+        pipe = get_client().pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+
+        return retry_after(
+            int(current), int(previous or 0), now - index * window, limit, window
+        )
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = RedisBackend() if RATE_LIMIT_BACKEND == "redis" else MemoryBackend()
+    return _backend
+
+
+class RateLimit:
+    def __init__(self, name: str, per_ip: str, per_email: str):
+        self.name = name
+        self.per_ip = parse_limit(per_ip)
+        self.per_email = parse_limit(per_email)
+
+    async def __call__(self, request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+
+        checks = []
+        if RATE_LIMIT_PER_IP:
+            checks.append((f"{self.name}:ip:{_client_ip(request)}", self.per_ip))
+        email = await _request_email(request)
+        if email:
+            checks.append((f"{self.name}:email:{email}", self.per_email))
+
+        if not checks:
+            return
+
+        backend = get_backend()
+        if backend.blocking:
+            wait = await run_in_threadpool(self._check, backend, checks)
+        else:
+            wait = self._check(backend, checks)
+
+        if wait:
+            Logger().err(f"Rate limit exceeded on {self.name} for {checks[-1][0]}")
+            raise APIExceptionToHTTP().convert(
+                APIException(code=TOO_MANY_REQUESTS_ERROR, msg="Too many requests"),
+                headers={"Retry-After": str(wait)},
+            )
+
+    def _check(self, backend, checks) -> int:
+        wait = 0
+        for key, (limit, window) in checks:
+            wait = max(wait, backend.hit(key, limit, window))
+        return wait
+
+
+def parse_proxies(value: str) -> list:
+    return [
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in value.split(",")
+        if item.strip()
+    ]
+
+
+trusted_proxies = parse_proxies(RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def _client_ip(request: Request) -> str:
+    host = request.client.host if request.client else "unknown"
+    if not _trusted(host):
+        return host
+
+    # Walk the chain from the closest hop: the first address not added by one
+    # of our proxies is the client, anything left of it is client supplied
+    forwarded = request.headers.get("x-forwarded-for", "")
+    for hop in reversed([item.strip() for item in forwarded.split(",")]):
+        if hop and not _trusted(hop):
+            return hop
+    return host
+
+
+async def _request_email(request: Request) -> str | None:
+    try:
+        body = await request.json()
+    except Exception:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+login_rate_limit = RateLimit("login", RATE_LIMIT_LOGIN_IP, RATE_LIMIT_LOGIN_EMAIL)
+recover_rate_limit = RateLimit(
+    "recover", RATE_LIMIT_RECOVER_IP, RATE_LIMIT_RECOVER_EMAIL
+)
+recover_confirm_rate_limit = RateLimit(
+    "recover_confirm", RATE_LIMIT_RECOVER_IP, RATE_LIMIT_RECOVER_EMAIL
+)
@@ -0,0 +1,73 @@
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+
+from starlette.types import Scope
+
+_current: ContextVar["RequestContext | None"] = ContextVar(
+    "request_context", default=None
+)
+
+_route_paths: dict[int, dict] = {}
+
+
+def route_name(scope: Scope) -> str:
+    method = scope.get("method", "")
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+
+    if path is None and "endpoint" in scope and "app" in scope:
+        app = scope["app"]
+        paths = _route_paths.get(id(app))
+        if paths is None:
+            paths = {
+                route.endpoint: route.path
+                for route in app.routes
+                if hasattr(route, "endpoint")
+            }
+            _route_paths[id(app)] = paths
+        path = paths.get(scope["endpoint"])
+
+    return f"{method} {path or scope.get('path', '')}".strip()
+
+
+class RequestContext:
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.request_id = self._header(b"x-request-id") or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.statements: Counter = Counter()
+
+    def _header(self, name: bytes) -> str | None:
+        for key, value in self.scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    @property
+    def route(self) -> str:
+        return route_name(self.scope)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record_query(self, statement: str, elapsed: float, track_statements: bool):
+        self.query_count += 1
+        self.query_time += elapsed
+        if track_statements:
+            self.statements[statement] += 1
+
+
+def current() -> RequestContext | None:
+    return _current.get()
+
+
+def activate(ctx: RequestContext):
+    return _current.set(ctx)
+
+
+def deactivate(token):
+    _current.reset(token)
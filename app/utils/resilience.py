@@ -0,0 +1,226 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from app.utils import metrics, profiler, server_timing, tracing
+from app.utils.config import env_float, env_int
+
+
+class DownstreamError(Exception):
+    pass
+
+
+class CircuitOpenError(DownstreamError):
+    pass
+
+
+class BulkheadFullError(DownstreamError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    STATE_NAMES = {CLOSED: "closed", HALF_OPEN: "half_open", OPEN: "open"}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        metrics.CIRCUIT_STATE.labels(name).set(self.CLOSED)
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._transition(self.HALF_OPEN)
+
+            if self._state == self.HALF_OPEN:
+                # Let a few probe calls through, everything else keeps failing
+                # fast until a probe succeeds
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    return True
+                return False
+
+            return self._state == self.CLOSED
+
+    def release_probe(self):
+        # A probe that never reached the downstream proves nothing either way
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def _transition(self, state: int):
+        if state == self._state and state != self.OPEN:
+            return
+        self._state = state
+        self._probes = 0
+        if state == self.CLOSED:
+            self._failures = 0
+        metrics.CIRCUIT_STATE.labels(self.name).set(state)
+        metrics.CIRCUIT_TRANSITIONS.labels(self.name, self.STATE_NAMES[state]).inc()
+
+
+class Bulkhead:
+    def __init__(self, name: str, max_concurrent: int, max_wait: float = 0.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    @contextmanager
+    def acquire(self):
+        if self.max_wait > 0:
+            acquired = self._slots.acquire(timeout=self.max_wait)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+
+        if not acquired:
+            metrics.BULKHEAD_REJECTED.labels(self.name).inc()
+            raise BulkheadFullError(f"{self.name} bulkhead is full")
+
+        metrics.BULKHEAD_IN_USE.labels(self.name).inc()
+        try:
+            yield
+        finally:
+            metrics.BULKHEAD_IN_USE.labels(self.name).dec()
+            self._slots.release()
+
+
+class DownstreamClient:
+    def __init__(
+        self,
+        name: str,
+        base_url: str | None,
+        connect_timeout: float,
+        read_timeout: float,
+        breaker: CircuitBreaker,
+        bulkhead: Bulkhead,
+    ):
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+        # Keep-alive connections instead of a new TCP handshake per call
+        self.session = requests.Session()
+
+    @classmethod
+    def from_env(cls, name: str, base_url: str | None, prefix: str):
+        return cls(
+            name,
+            base_url,
+            connect_timeout=env_float(f"{prefix}_CONNECT_TIMEOUT", 1.0),
+            read_timeout=env_float(f"{prefix}_TIMEOUT", 3.0),
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=env_int(f"{prefix}_BREAKER_FAILURES", 5),
+                reset_timeout=env_float(f"{prefix}_BREAKER_RESET_SECONDS", 30.0),
+            ),
+            bulkhead=Bulkhead(
+                name,
+                max_concurrent=env_int(f"{prefix}_MAX_CONCURRENCY", 10),
+                max_wait=env_float(f"{prefix}_BULKHEAD_WAIT", 0.0),
+            ),
+        )
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        with server_timing.timed("downstream"), tracing.span(
+            f"{self.name} {method} {path}",
+            "client",
+            **{"http.method": method, "peer.service": self.name},
+        ) as client_span:
+            # Downstream services continue the trace from the traceparent header
+            if client_span is not None:
+                kwargs["headers"] = tracing.inject(kwargs.get("headers"))
+            try:
+                response = self.session.request(
+                    method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs
+                )
+            finally:
+                profiler.record_call(
+                    self.name, method, path, time.perf_counter() - start
+                )
+            if client_span is not None:
+                client_span.attributes["http.status_code"] = response.status_code
+        return response
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        if not self.breaker.allow():
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "short_circuited").inc()
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        try:
+            with self.bulkhead.acquire():
+                start = time.perf_counter()
+                response = self._send(method, path, **kwargs)
+        except BulkheadFullError:
+            self.breaker.release_probe()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "rejected").inc()
+            raise
+        except requests.Timeout as e:
+            self.breaker.record_failure()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "timeout").inc()
+            raise DownstreamError(f"{self.name} timed out") from e
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "error").inc()
+            raise DownstreamError(f"{self.name} request failed: {str(e)}") from e
+        except Exception:
+            # Anything else still has to settle the call, or a half-open
+            # breaker would keep its probe slot forever
+            self.breaker.record_failure()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "error").inc()
+            raise
+
+        metrics.DOWNSTREAM_LATENCY.labels(self.name).observe(
+            time.perf_counter() - start
+        )
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "server_error").inc()
+        else:
+            self.breaker.record_success()
+            metrics.DOWNSTREAM_REQUESTS.labels(self.name, "ok").inc()
+
+        return response
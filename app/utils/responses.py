@@ -0,0 +1,96 @@
+import asyncio
+import functools
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils import profiler, server_timing
+from app.utils.config import env_bool
+
+FAST_JSON_RESPONSES = env_bool("FAST_JSON_RESPONSES")
+
+
+def _dump_plain(content: Any) -> bytes:
+    try:
+        return orjson.dumps(content)
+    except TypeError:
+        return orjson.dumps(jsonable_encoder(content))
+
+
+def _model_serializer(model: type[BaseModel]) -> Callable[[Any], bytes]:
+    fields = tuple(model.model_fields)
+    to_json = model.__pydantic_serializer__.to_json
+
+    def serialize(content: Any) -> bytes:
+        if isinstance(content, model):
+            return to_json(content)
+        if isinstance(content, dict):
+            return to_json(model.model_validate(content))
+        # ORM rows already hold the right types, read the attributes and skip
+        # the validation pass FastAPI would run on them
+        values = {
+            name: getattr(content, name) for name in fields if hasattr(content, name)
+        }
+        return to_json(model.model_construct(**values))
+
+    return serialize
+
+
+@functools.lru_cache(maxsize=None)
+def serializer_for(response_model: Any) -> Callable[[Any], bytes]:
+    if response_model is None:
+        return _dump_plain
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return _model_serializer(response_model)
+    return TypeAdapter(response_model).dump_json
+
+
+def _render(content: Any, serialize: Callable[[Any], bytes], status_code: int):
+    if isinstance(content, Response):
+        return content
+    with server_timing.timed("serialization"):
+        body = serialize(content)
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def fast_endpoint(call: Callable, response_model: Any, status_code: int) -> Callable:
+    serialize = serializer_for(response_model)
+
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(**kwargs):
+            return _render(await call(**kwargs), serialize, status_code)
+
+    else:
+
+        @functools.wraps(call)
+        def endpoint(**kwargs):
+            return _render(call(**kwargs), serialize, status_code)
+
+    return endpoint
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        if FAST_JSON_RESPONSES:
+            # Returning a Response from the endpoint makes FastAPI skip its own
+            # response_model validation and encoding; the schema docs still
+            # come from response_model
+            self.dependant.call = fast_endpoint(
+                self.dependant.call, self.response_model, self.status_code or 200
+            )
+        self.dependant.call = profiler.bound(self.dependant.call)
+
+
+def default_response_class() -> type[Response]:
+    return ORJSONResponse if FAST_JSON_RESPONSES else JSONResponse
@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.utils import metrics
+from app.utils.config import env_bool, env_float, env_str
+from app.utils.logger import Logger
+
+SAMPLER_ENABLED = env_bool("SAMPLER_ENABLED")
+SAMPLER_HZ = env_float("SAMPLER_HZ", 10)
+# Without a directory the window only rotates in memory
+SAMPLER_DIR = env_str("SAMPLER_DIR")
+SAMPLER_ROTATE_SECONDS = env_float("SAMPLER_ROTATE_SECONDS", 600)
+
+NO_ROUTE = "<no route>"
+
+# Leaf frames of threads parked waiting, dropped so the stacks show where
+# the threads actually spend their time
+IDLE_FRAMES = {"threading.py:wait", "selectors.py:select", "thread.py:_worker"}
+
+
+def frame_name(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+class Sampler:
+    def __init__(
+        self,
+        hz: float = SAMPLER_HZ,
+        directory: str | None = SAMPLER_DIR,
+        rotate_seconds: float = SAMPLER_ROTATE_SECONDS,
+    ):
+        self.interval = 1 / hz
+        self.directory = directory
+        self.rotate_seconds = rotate_seconds
+        self.stacks: Counter = Counter()
+        self.window_started = time.time()
+        # Executor workers inherit the route of the code that submitted to them
+        self.thread_routes: dict[int, str] = {}
+        self._endpoints: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_routes(self, routes):
+        self._endpoints = {
+            route.endpoint.__code__: f"{method} {route.path}"
+            for route in routes
+            if hasattr(getattr(route, "endpoint", None), "__code__")
+            for method in sorted(getattr(route, "methods", None) or [""])
+        }
+
+    def route_of(self, frame) -> str | None:
+        while frame is not None:
+            route = self._endpoints.get(frame.f_code)
+            if route:
+                return route
+            frame = frame.f_back
+        return None
+
+    def current_route(self) -> str | None:
+        if not self.running:
+            return None
+        return self.route_of(sys._getframe(1))
+
+    def sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+
+            names = []
+            route = None
+            while frame is not None:
+                names.append(frame_name(frame))
+                route = route or self._endpoints.get(frame.f_code)
+                frame = frame.f_back
+            if names[0] in IDLE_FRAMES:
+                continue
+
+            route = route or self.thread_routes.get(thread_id) or NO_ROUTE
+            names.append(route)
+            stack = ";".join(reversed(names))
+            with self._lock:
+                self.stacks[stack] += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def rotate(self):
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+            started, self.window_started = self.window_started, time.time()
+
+        if not self.directory or not stacks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{int(started)}.folded")
+        with open(path, "w") as out:
+            for stack, count in stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+    def _run(self):
+        next_rotation = time.monotonic() + self.rotate_seconds
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            try:
+                self.sample()
+                if time.monotonic() >= next_rotation:
+                    next_rotation += self.rotate_seconds
+                    self.rotate()
+            except Exception as e:
+                Logger().err(f"Stack sampler failed: {str(e)}")
+            metrics.SAMPLER_SECONDS.inc(time.perf_counter() - start)
+
+    def start(self, routes):
+        if self.running:
+            return
+        self.set_routes(routes)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+        self.rotate()
+
+
+sampler = Sampler()
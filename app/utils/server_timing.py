@@ -0,0 +1,63 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.utils.config import env_bool
+
+SERVER_TIMING_ENABLED = env_bool("SERVER_TIMING_ENABLED")
+
+
+class Timings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, elapsed: float):
+        with self._lock:
+            self.durations[phase] = self.durations.get(phase, 0.0) + elapsed
+
+    def header(self) -> str:
+        total = time.perf_counter() - self.started
+        with self._lock:
+            phases = list(self.durations.items())
+        phases.append(("total", total))
+        return ", ".join(
+            f"{phase};dur={elapsed * 1000:.1f}" for phase, elapsed in phases
+        )
+
+
+_timings: ContextVar[Timings | None] = ContextVar("server_timing", default=None)
+# Phases already being timed further up the stack, so nested crud calls or a
+# hash handed to the cpu pool are not counted twice
+_active: ContextVar[frozenset] = ContextVar("server_timing_active", default=frozenset())
+
+
+def current() -> Timings | None:
+    return _timings.get()
+
+
+def activate(timings: Timings):
+    return _timings.set(timings)
+
+
+def deactivate(token):
+    _timings.reset(token)
+
+
+@contextmanager
+def timed(phase: str):
+    timings = _timings.get()
+    active = _active.get()
+    if timings is None or phase in active:
+        yield
+        return
+
+    token = _active.set(active | {phase})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+        _active.reset(token)
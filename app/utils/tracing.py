@@ -0,0 +1,234 @@
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+import requests
+
+from app.utils import server_timing
+from app.utils.config import env_bool, env_float, env_int, env_str
+from app.utils.logger import Logger
+
+TRACING_ENABLED = env_bool("TRACING_ENABLED")
+TRACING_SERVICE_NAME = env_str("TRACING_SERVICE_NAME", "users")
+# "file" appends JSON lines, "otlp" posts OTLP/JSON to a collector
+TRACING_EXPORTER = env_str("TRACING_EXPORTER", "file")
+TRACING_FILE = env_str("TRACING_FILE", "/tmp/traces.jsonl")
+TRACING_OTLP_ENDPOINT = env_str(
+    "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+TRACING_SAMPLE_RATE = env_float("TRACING_SAMPLE_RATE", 1.0)
+TRACING_EXPORT_SECONDS = env_float("TRACING_EXPORT_SECONDS", 5)
+TRACING_BUFFER_SIZE = env_int("TRACING_BUFFER_SIZE", 10000)
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: ContextVar["Span | None"] = ContextVar("span", default=None)
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None = None,
+        kind: str = "internal",
+        attributes: dict | None = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    def child(self, name: str, kind: str, attributes: dict | None = None) -> "Span":
+        return Span(name, self.trace_id, self.span_id, kind, attributes)
+
+    def finish(self):
+        self.end = time.time_ns()
+        spans.append(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "service": TRACING_SERVICE_NAME,
+        }
+
+
+# Finished spans waiting for the exporter, oldest dropped when full
+spans: deque = deque(maxlen=TRACING_BUFFER_SIZE)
+
+
+def current() -> Span | None:
+    return _current.get()
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    match = TRACEPARENT.match(value.strip().lower()) if value else None
+    if not match or match.group(1) == "0" * 32:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def start_trace(name: str, traceparent: str | None = None, **attributes) -> Span | None:
+    parent = parse_traceparent(traceparent)
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < TRACING_SAMPLE_RATE
+    if not sampled:
+        return None
+    return Span(name, trace_id, parent_id, "server", attributes)
+
+
+@contextmanager
+def activate(span: Span | None):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        if span is not None:
+            span.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        _current.reset(token)
+        if span is not None:
+            span.finish()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    parent = _current.get()
+    # Only requests that started a trace pay for child spans
+    if parent is None:
+        yield None
+        return
+    with activate(parent.child(name, kind, attributes)) as child:
+        yield child
+
+
+def traced(kind: str, name: str | None = None) -> Callable:
+    def decorator(fn: Callable) -> Callable:
+        if not TRACING_ENABLED and not server_timing.SERVER_TIMING_ENABLED:
+            return fn
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with server_timing.timed(kind), span(span_name, kind):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(headers: dict | None = None) -> dict:
+    headers = dict(headers or {})
+    parent = _current.get()
+    if parent is not None:
+        headers["traceparent"] = parent.traceparent
+    return headers
+
+
+class FileExporter:
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+
+    def export(self, batch: list[Span]):
+        with open(self.path, "a") as out:
+            for finished in batch:
+                out.write(json.dumps(finished.to_dict()) + "\n")
+
+
+class OtlpExporter:
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT):
+        self.endpoint = endpoint
+        self.session = requests.Session()
+
+    def _span(self, finished: Span) -> dict:
+        attributes = {"span.kind": finished.kind, **finished.attributes}
+        return {
+            "traceId": finished.trace_id,
+            "spanId": finished.span_id,
+            "parentSpanId": finished.parent_id or "",
+            "name": finished.name,
+            "kind": self.KINDS.get(finished.kind, 1),
+            "startTimeUnixNano": str(finished.start),
+            "endTimeUnixNano": str(finished.end),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": finished.error} if finished.error else {}
+            ),
+        }
+
+    def export(self, batch: list[Span]):
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": TRACING_SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.utils.tracing"},
+                            "spans": [self._span(finished) for finished in batch],
+                        }
+                    ],
+                }
+            ]
+        }
+        self.session.post(self.endpoint, json=payload, timeout=5).raise_for_status()
+
+
+_export_lock = threading.Lock()
+exporter = OtlpExporter() if TRACING_EXPORTER == "otlp" else FileExporter()
+
+
+def flush():
+    with _export_lock:
+        batch = []
+        while spans:
+            batch.append(spans.popleft())
+        if not batch:
+            return
+        try:
+            exporter.export(batch)
+        except Exception as e:
+            Logger().err(f"Could not export {len(batch)} spans: {str(e)}")
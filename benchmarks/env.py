@@ -0,0 +1,21 @@
+import os
+
+# Matches benchmarks/docker-compose.yml, any variable already set wins
+DEFAULTS = {
+    "POSTGRES_USER": "users",
+    "POSTGRES_PASSWORD": "users",
+    "POSTGRES_DB": "users",
+    "POSTGRES_SERVICE": "127.0.0.1:5432",
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "RECOVERY_PWD_CODE_EXPIRE_MINUTES": "30",
+}
+
+
+def apply_defaults(env: dict | None = None) -> dict:
+    env = os.environ if env is None else env
+    for name, value in DEFAULTS.items():
+        if not env.get(name):
+            env[name] = value
+    return env
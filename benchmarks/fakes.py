@@ -0,0 +1,159 @@
+import json
+import re
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PIN_PATTERN = re.compile(rb">\s*(\d{6})\s*<")
+
+
+class DownstreamHandler(BaseHTTPRequestHandler):
+    """Stand-in for the attractions service and the chatbot service."""
+
+    latency = 0.0
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _drain(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def do_PUT(self):
+        self._drain()
+        if self.path.startswith("/update_recommendations"):
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"detail": "Not found"})
+
+    def do_POST(self):
+        self._drain()
+        if self.path.startswith("/chatbot/create"):
+            self._reply(201, {"status": "created"})
+        else:
+            self._reply(404, {"detail": "Not found"})
+
+    def do_GET(self):
+        self._drain()
+        self._reply(200, {"status": "ok"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue, enough for smtplib login + sendmail."""
+
+    def _send(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self._send("220 localhost fake SMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.strip().upper()
+
+            if command.startswith(b"EHLO") or command.startswith(b"HELO"):
+                self._send("250-localhost")
+                self._send("250 AUTH PLAIN LOGIN")
+            elif command.startswith(b"AUTH"):
+                self._send("235 Authentication successful")
+            elif command.startswith(b"MAIL FROM"):
+                recipients = []
+                self._send("250 OK")
+            elif command.startswith(b"RCPT TO"):
+                address = line.split(b":", 1)[1].strip().strip(b"<>")
+                recipients.append(address.decode())
+                self._send("250 OK")
+            elif command == b"DATA":
+                self._send("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                self.server.store(recipients, data)
+                self._send("250 OK")
+            elif command == b"QUIT":
+                self._send("221 Bye")
+                return
+            else:
+                self._send("250 OK")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            lines.append(line)
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, SMTPHandler)
+        self._pins: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def store(self, recipients: list[str], data: bytes):
+        message = message_from_bytes(data)
+        body = b""
+        for part in message.walk():
+            payload = part.get_payload(decode=True)
+            if payload:
+                body += payload
+
+        match = PIN_PATTERN.search(body)
+        if not match:
+            return
+        with self._lock:
+            for recipient in recipients:
+                self._pins[recipient] = match.group(1).decode()
+
+    def last_pin(self, email: str) -> str | None:
+        with self._lock:
+            return self._pins.get(email)
+
+
+class Fakes:
+    """Downstream HTTP services and SMTP server running on local ports."""
+
+    def __init__(self, host: str = "127.0.0.1", downstream_latency: float = 0.0):
+        DownstreamHandler.latency = downstream_latency
+        self.http = ThreadingHTTPServer((host, 0), DownstreamHandler)
+        self.http.daemon_threads = True
+        self.smtp = FakeSMTPServer((host, 0))
+        self.host = host
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.http.server_address[1]}"
+
+    @property
+    def smtp_port(self) -> int:
+        return self.smtp.server_address[1]
+
+    def last_pin(self, email: str) -> str | None:
+        return self.smtp.last_pin(email)
+
+    def start(self) -> "Fakes":
+        for server in (self.http, self.smtp):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in (self.http, self.smtp):
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,485 @@
+import argparse
+import asyncio
+import io
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+import httpx
+
+from benchmarks import results
+from benchmarks.env import apply_defaults
+from benchmarks.fakes import Fakes
+
+DEFAULT_MIX = {
+    "signup": 2,
+    "login": 8,
+    "verify_id_token": 15,
+    "refresh_token": 5,
+    "update_profile": 5,
+    "delete_user": 1,
+    "get_user": 20,
+    "new_chat": 2,
+    "get_chat": 15,
+    "get_preferences": 10,
+    "upload_avatar": 2,
+    "update_fcm_token": 4,
+    "get_fcm_token": 6,
+    "init_recover_password": 1,
+    "recover_password": 1,
+    "update_password": 1,
+}
+
+PASSWORDS = ("bench-password-a", "bench-password-b")
+COMPARED_METRICS = ["rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    password: str
+    id: int | None = None
+    token: str | None = None
+    refresh_token: str | None = None
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def other_password(self) -> str:
+        return PASSWORDS[1] if self.password == PASSWORDS[0] else PASSWORDS[0]
+
+
+class Run:
+    def __init__(self, client: httpx.AsyncClient, fakes: Fakes | None):
+        self.client = client
+        self.fakes = fakes
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.recording = False
+
+    async def measure(self, name: str, method: str, url: str, ok=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            if self.recording:
+                self.errors[name] += 1
+                self.statuses[name]["transport_error"] += 1
+            return None
+        elapsed = time.perf_counter() - start
+
+        if self.recording:
+            self.latencies[name].append(elapsed)
+            self.statuses[name][str(response.status_code)] += 1
+            if response.status_code not in ok:
+                self.errors[name] += 1
+        return response
+
+    async def signup(self, user: VirtualUser, name: str | None = "signup"):
+        payload = {
+            "username": user.email.split("@")[0],
+            "email": user.email,
+            "password": user.password,
+            "city": "Buenos Aires",
+            "preferences": ["Museum", "Cafe"],
+            "fcm_token": "bench-fcm-token",
+        }
+        if name is None:
+            response = await self.client.post("/users/signup", json=payload)
+        else:
+            response = await self.measure(
+                name, "POST", "/users/signup", ok=(201,), json=payload
+            )
+        if response is not None and response.status_code == 201:
+            user.id = response.json()["id"]
+        return response
+
+    async def login(self, user: VirtualUser, name: str | None = "login"):
+        payload = {"email": user.email, "password": user.password}
+        if name is None:
+            response = await self.client.post("/users/login", json=payload)
+        else:
+            response = await self.measure(name, "POST", "/users/login", json=payload)
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            user.token = body["token"]
+            user.refresh_token = body["refresh_token"]
+        return response
+
+
+def new_user() -> VirtualUser:
+    return VirtualUser(
+        email=f"bench-{uuid.uuid4().hex[:12]}@example.com", password=PASSWORDS[0]
+    )
+
+
+# OPERATIONS
+
+
+async def op_signup(run: Run, user: VirtualUser):
+    await run.signup(new_user())
+
+
+async def op_login(run: Run, user: VirtualUser):
+    await run.login(user)
+
+
+async def op_verify_id_token(run: Run, user: VirtualUser):
+    await run.measure(
+        "verify_id_token", "GET", "/users/verify_id_token", headers=user.headers
+    )
+
+
+async def op_refresh_token(run: Run, user: VirtualUser):
+    response = await run.measure(
+        "refresh_token",
+        "POST",
+        "/users/refresh_token",
+        headers={"Authorization": f"Bearer {user.refresh_token}"},
+    )
+    if response is not None and response.status_code == 200:
+        body = response.json()
+        user.token = body["token"]
+        user.refresh_token = body["refresh_token"]
+
+
+async def op_update_profile(run: Run, user: VirtualUser):
+    await run.measure(
+        "update_profile",
+        "PATCH",
+        "/users",
+        headers=user.headers,
+        json={
+            "city": random.choice(["Buenos Aires", "Rosario", "Mendoza"]),
+            "preferences": random.sample(["Museum", "Cafe", "Park", "Library"], 2),
+        },
+    )
+
+
+async def op_delete_user(run: Run, user: VirtualUser):
+    disposable = new_user()
+    await run.signup(disposable, name=None)
+    await run.login(disposable, name=None)
+    await run.measure("delete_user", "DELETE", "/users", headers=disposable.headers)
+
+
+async def op_get_user(run: Run, user: VirtualUser):
+    await run.measure("get_user", "GET", f"/users/{user.id}")
+
+
+async def op_new_chat(run: Run, user: VirtualUser):
+    await run.measure(
+        "new_chat",
+        "POST",
+        "/users/chat",
+        json={
+            "user_id": user.id,
+            "thread_id": f"thread-{user.id}",
+            "assistant_id": f"assistant-{user.id}",
+        },
+    )
+
+
+async def op_get_chat(run: Run, user: VirtualUser):
+    # seed() stores chat ids for every user, otherwise the route cannot answer
+    await run.measure("get_chat", "GET", f"/users/{user.id}/chat")
+
+
+async def op_get_preferences(run: Run, user: VirtualUser):
+    await run.measure("get_preferences", "GET", f"/users/{user.id}/preferences")
+
+
+async def op_upload_avatar(run: Run, user: VirtualUser):
+    avatar = io.BytesIO(os.urandom(16 * 1024))
+    await run.measure(
+        "upload_avatar",
+        "POST",
+        "/users/avatar",
+        headers=user.headers,
+        files={"avatar": ("avatar.png", avatar, "image/png")},
+    )
+
+
+async def op_update_fcm_token(run: Run, user: VirtualUser):
+    await run.measure(
+        "update_fcm_token",
+        "POST",
+        "/users/fcm_token",
+        ok=(201,),
+        json={"user_id": user.id, "fcm_token": f"fcm-{uuid.uuid4().hex[:8]}"},
+    )
+
+
+async def op_get_fcm_token(run: Run, user: VirtualUser):
+    await run.measure("get_fcm_token", "GET", f"/users/{user.id}/fcm_token")
+
+
+async def op_init_recover_password(run: Run, user: VirtualUser):
+    await run.measure(
+        "init_recover_password",
+        "POST",
+        "/users/password/recover",
+        json={"email": user.email},
+    )
+
+
+async def op_recover_password(run: Run, user: VirtualUser):
+    await run.client.post("/users/password/recover", json={"email": user.email})
+    pin = run.fakes.last_pin(user.email) if run.fakes else None
+    new_password = user.other_password()
+
+    response = await run.measure(
+        "recover_password",
+        "PUT",
+        "/users/password/recover",
+        ok=(200,) if pin else (400,),
+        json={
+            "email": user.email,
+            "code": pin or "000000",
+            "new_password": new_password,
+        },
+    )
+    if response is not None and response.status_code == 200:
+        user.password = new_password
+
+
+async def op_update_password(run: Run, user: VirtualUser):
+    new_password = user.other_password()
+    response = await run.measure(
+        "update_password",
+        "PATCH",
+        "/users/password/update",
+        headers=user.headers,
+        json={"current_password": user.password, "new_password": new_password},
+    )
+    if response is not None and response.status_code == 200:
+        user.password = new_password
+
+
+OPERATIONS = {
+    name[len("op_") :]: fn for name, fn in globals().items() if name.startswith("op_")
+}
+
+
+# DRIVER
+
+
+async def seed(run: Run, count: int, concurrency: int) -> list[VirtualUser]:
+    users = [new_user() for _ in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def seed_user(user: VirtualUser):
+        async with semaphore:
+            await run.signup(user, name=None)
+            await run.login(user, name=None)
+            await run.client.post(
+                "/users/chat",
+                json={
+                    "user_id": user.id,
+                    "thread_id": f"thread-{user.id}",
+                    "assistant_id": f"assistant-{user.id}",
+                },
+            )
+
+    await asyncio.gather(*(seed_user(user) for user in users))
+    seeded = [user for user in users if user.id is not None and user.token]
+    if not seeded:
+        raise RuntimeError("Could not seed any user, is the service healthy?")
+    return seeded
+
+
+async def worker(run: Run, users: list[VirtualUser], mix: dict, deadline: float):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    index = 0
+    while time.perf_counter() < deadline:
+        user = users[index % len(users)]
+        index += 1
+        await OPERATIONS[random.choices(names, weights)[0]](run, user)
+
+
+async def drive(args, fakes: Fakes | None) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        run = Run(client, fakes)
+        users = await seed(
+            run, args.concurrency * args.users_per_worker, args.concurrency
+        )
+        # Every worker owns its users, so token rotation never races between workers
+        partitions = [
+            users[i :: args.concurrency] or users for i in range(args.concurrency)
+        ]
+
+        if args.warmup:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(
+                *(worker(run, part, args.mix, deadline) for part in partitions)
+            )
+
+        run.recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(worker(run, part, args.mix, deadline) for part in partitions)
+        )
+        elapsed = time.perf_counter() - started
+
+    report = {}
+    all_latencies = []
+    for name, samples in run.latencies.items():
+        all_latencies.extend(samples)
+        report[name] = {
+            **results.latency_summary(samples),
+            "rps": round(len(samples) / elapsed, 3),
+            "errors": run.errors[name],
+            "statuses": dict(run.statuses[name]),
+        }
+    report["all"] = {
+        **results.latency_summary(all_latencies),
+        "rps": round(len(all_latencies) / elapsed, 3),
+        "errors": sum(run.errors.values()),
+    }
+
+    return {
+        "meta": results.metadata(
+            kind="load",
+            concurrency=args.concurrency,
+            duration=args.duration,
+            server_workers=args.workers,
+            mix=args.mix,
+        ),
+        "results": report,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, fakes: Fakes) -> subprocess.Popen:
+    port = free_port()
+    env = {
+        **apply_defaults(dict(os.environ)),
+        "ATTRACTIONS_SERVICE": fakes.http_url,
+        "EXTERNAL_SERVICES": fakes.http_url,
+        "EMAIL_SENDER": "bench@example.com",
+        "EMAIL_PASSWORD": "bench",
+        "SMTP_HOST": fakes.host,
+        "SMTP_PORT": str(fakes.smtp_port),
+        "SMTP_SSL": "false",
+        # Every virtual user shares one client IP
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.server",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+        ],
+        env=env,
+    )
+    args.base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Benchmark server exited during startup")
+        try:
+            if httpx.get(f"{args.base_url}/docs", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+
+    process.terminate()
+    raise RuntimeError("Benchmark server did not become ready in 60 seconds")
+
+
+def parse_mix(value: str | None) -> dict:
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load benchmark")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--users-per-worker", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix(None),
+        help="Comma separated operation=weight list, e.g. login=5,get_user=20",
+    )
+    parser.add_argument("--downstream-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--base-url", help="Benchmark an already running service instead"
+    )
+    parser.add_argument("--output", default="load-results.json")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    fakes = None
+    server = None
+    if not args.base_url:
+        fakes = Fakes(downstream_latency=args.downstream_latency).start()
+        server = start_server(args, fakes)
+
+    try:
+        report = asyncio.run(drive(args, fakes))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+        if fakes:
+            fakes.stop()
+
+    results.save(args.output, report)
+    print(
+        f"{'operation':<24} {'count':>7} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} errors"
+    )
+    for name, values in sorted(report["results"].items()):
+        print(
+            f"{name:<24} {values['count']:>7} {values['rps']:>9.1f} "
+            f"{values['p50_ms']:>9.2f} {values['p95_ms']:>9.2f} "
+            f"{values['p99_ms']:>9.2f} {values['errors']}"
+        )
+
+    if args.baseline:
+        rows = results.compare(
+            report, results.load(args.baseline), COMPARED_METRICS, args.tolerance
+        )
+        results.print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
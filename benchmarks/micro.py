@@ -0,0 +1,461 @@
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+
+from benchmarks.env import apply_defaults
+
+apply_defaults()
+
+from app.auth import authentication as auth  # noqa: E402
+from app.auth import password as pwd  # noqa: E402
+from app.schemas.chat import Chat  # noqa: E402
+from app.schemas.users import User, UserCreate, UserUpdate  # noqa: E402
+from benchmarks import results  # noqa: E402
+
+COMPARED_METRICS = ["median_us", "ops_per_sec"]
+BENCHMARKS = []
+
+
+def benchmark(name: str, needs_db: bool = False):
+    def register(fn):
+        BENCHMARKS.append((name, fn, needs_db))
+        return fn
+
+    return register
+
+
+class Timer:
+    def __init__(self, rounds: int, min_time: float):
+        self.rounds = rounds
+        self.min_time = min_time
+
+    def _calibrate(self, fn) -> int:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= self.min_time:
+                return number
+            number *= 2
+
+    def run(self, fn, number: int | None = None) -> dict:
+        number = number or self._calibrate(fn)
+        per_op = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            per_op.append((time.perf_counter() - start) / number)
+        return summary(per_op, number)
+
+    def run_each(self, fn, args: list) -> dict:
+        # For operations that consume their input (delete) every call gets its own
+        per_op = []
+        for arg in args:
+            start = time.perf_counter()
+            fn(arg)
+            per_op.append(time.perf_counter() - start)
+        return summary(per_op, 1)
+
+
+def summary(per_op: list[float], number: int) -> dict:
+    median = statistics.median(per_op)
+    return {
+        "rounds": len(per_op),
+        "number": number,
+        "median_us": round(median * 1e6, 3),
+        "min_us": round(min(per_op) * 1e6, 3),
+        "max_us": round(max(per_op) * 1e6, 3),
+        "ops_per_sec": round(1 / median, 3) if median else 0.0,
+    }
+
+
+class FakeRow:
+    # Attribute-only object shaped like models.User, without a database
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def sample_row(user_id: int = 1) -> FakeRow:
+    return FakeRow(
+        id=user_id,
+        username="username",
+        email="username@example.com",
+        city="Buenos Aires",
+        birth_date=date(1999, 10, 31),
+        preferences=["Museum", "Cafe", "Park"],
+        avatar_link="https://storage.example.com/avatars/1",
+        thread_id="thread",
+        assistant_id="assistant",
+        fcm_token="fcm",
+        hashed_password="hash",
+    )
+
+
+SIGNUP_PAYLOAD = {
+    "username": "username",
+    "email": "username@example.com",
+    "birth_date": "1999-10-31",
+    "city": "Buenos Aires",
+    "preferences": ["Museum", "Cafe"],
+    "password": "password",
+    "fcm_token": "fcm",
+}
+
+
+# AUTH
+
+
+@benchmark("password.get_password_hash")
+def bench_hash(timer: Timer, db):
+    return timer.run(lambda: pwd.get_password_hash("benchmark-password"))
+
+
+@benchmark("password.verify_password")
+def bench_verify(timer: Timer, db):
+    hashed = pwd.get_password_hash("benchmark-password")
+    return timer.run(lambda: pwd.verify_password("benchmark-password", hashed))
+
+
+@benchmark("auth.create_access_token")
+def bench_create_token(timer: Timer, db):
+    return timer.run(lambda: auth.create_access_token({"sub": 1}, expires_delta=30))
+
+
+@benchmark("auth.authorize_token")
+def bench_authorize_token(timer: Timer, db):
+    token = auth.create_access_token({"sub": 1}, expires_delta=30)
+    return timer.run(lambda: auth.authorize_token(token))
+
+
+# SCHEMAS
+
+
+@benchmark("schemas.UserCreate.validate")
+def bench_user_create(timer: Timer, db):
+    return timer.run(lambda: UserCreate.model_validate(SIGNUP_PAYLOAD))
+
+
+@benchmark("schemas.User.from_orm")
+def bench_user_from_orm(timer: Timer, db):
+    row = sample_row()
+    return timer.run(lambda: User.model_validate(row, from_attributes=True))
+
+
+@benchmark("schemas.User.dump_json")
+def bench_user_dump(timer: Timer, db):
+    user = User.model_validate(sample_row(), from_attributes=True)
+    return timer.run(user.model_dump_json)
+
+
+@benchmark("schemas.User.from_orm_dump_json")
+def bench_user_round_trip(timer: Timer, db):
+    row = sample_row()
+    return timer.run(
+        lambda: User.model_validate(row, from_attributes=True).model_dump_json()
+    )
+
+
+# RESPONSES
+
+
+def _run_coroutine(coroutine):
+    # serialize_response never awaits when is_coroutine=True, no loop is needed
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response awaited unexpectedly")
+
+
+def _default_response(route, content) -> bytes:
+    from fastapi.routing import serialize_response
+
+    value = _run_coroutine(
+        serialize_response(field=route.response_field, response_content=content)
+    )
+    return route.response_class.value(value).body
+
+
+def _response_benchmark(timer: Timer, response_model, content, fast: bool):
+    from fastapi.routing import APIRoute
+
+    from app.utils.responses import serializer_for
+
+    if fast:
+        serialize = serializer_for(response_model)
+        return timer.run(lambda: serialize(content))
+
+    route = APIRoute("/", lambda: None, response_model=response_model)
+    return timer.run(lambda: _default_response(route, content))
+
+
+@benchmark("responses.default.User")
+def bench_default_user_response(timer: Timer, db):
+    return _response_benchmark(timer, User, sample_row(), fast=False)
+
+
+@benchmark("responses.fast.User")
+def bench_fast_user_response(timer: Timer, db):
+    return _response_benchmark(timer, User, sample_row(), fast=True)
+
+
+@benchmark("responses.default.Chat")
+def bench_default_chat_response(timer: Timer, db):
+    chat = Chat(user_id=1, thread_id="thread", assistant_id="assistant")
+    return _response_benchmark(timer, Chat, chat, fast=False)
+
+
+@benchmark("responses.fast.Chat")
+def bench_fast_chat_response(timer: Timer, db):
+    chat = Chat(user_id=1, thread_id="thread", assistant_id="assistant")
+    return _response_benchmark(timer, Chat, chat, fast=True)
+
+
+@benchmark("responses.default.preferences")
+def bench_default_preferences_response(timer: Timer, db):
+    return _response_benchmark(timer, list[str], ["Museum", "Cafe", "Park"], fast=False)
+
+
+@benchmark("responses.fast.preferences")
+def bench_fast_preferences_response(timer: Timer, db):
+    return _response_benchmark(timer, list[str], ["Museum", "Cafe", "Park"], fast=True)
+
+
+# CRUD
+
+
+class SeededDatabase:
+    def __init__(self, session, users: int):
+        from app.db import models
+
+        self.models = models
+        self.session = session
+        self.prefix = f"micro-{uuid.uuid4().hex[:8]}"
+        self.rows = [
+            models.User(
+                username=f"{self.prefix}-{i}",
+                email=f"{self.prefix}-{i}@example.com",
+                city="Buenos Aires",
+                birth_date=date(1999, 10, 31),
+                preferences=["Museum", "Cafe"],
+                hashed_password="hash",
+                thread_id="thread",
+                assistant_id="assistant",
+                fcm_token="fcm",
+            )
+            for i in range(users)
+        ]
+        session.add_all(self.rows)
+        session.commit()
+        self.ids = [row.id for row in self.rows]
+        self._next = 0
+
+    def next_id(self) -> int:
+        self._next = (self._next + 1) % len(self.ids)
+        return self.ids[self._next]
+
+    def new_email(self) -> str:
+        return f"{self.prefix}-{uuid.uuid4().hex[:12]}@example.com"
+
+    def cleanup(self):
+        self.session.rollback()
+        self.session.query(self.models.User).filter(
+            self.models.User.email.like(f"{self.prefix}-%")
+        ).delete(synchronize_session=False)
+        self.session.commit()
+
+
+def crud():
+    from app.db import user_crud
+
+    return user_crud
+
+
+@benchmark("user_crud.get_user", needs_db=True)
+def bench_get_user(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(lambda: user_crud.get_user(db.session, db.next_id()))
+
+
+@benchmark("user_crud.get_user_by_email", needs_db=True)
+def bench_get_user_by_email(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    email = db.rows[0].email
+    return timer.run(lambda: user_crud.get_user_by_email(db.session, email))
+
+
+@benchmark("user_crud.get_user_by_username", needs_db=True)
+def bench_get_user_by_username(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    username = db.rows[0].username
+    return timer.run(lambda: user_crud.get_user_by_username(db.session, username))
+
+
+@benchmark("user_crud.create_user", needs_db=True)
+def bench_create_user(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+
+    def create():
+        user = UserCreate.model_construct(
+            username="micro",
+            email=db.new_email(),
+            city="Buenos Aires",
+            birth_date=None,
+            preferences=["Cafe"],
+            password="hash",
+        )
+        user_crud.create_user(db.session, user)
+
+    return timer.run(create)
+
+
+@benchmark("user_crud.update_user", needs_db=True)
+def bench_update_user(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    cities = ["Rosario", "Mendoza"]
+
+    def update():
+        user_id = db.next_id()
+        user_crud.update_user(db.session, user_id, UserUpdate(city=cities[user_id % 2]))
+
+    return timer.run(update)
+
+
+@benchmark("user_crud.update_user.unchanged", needs_db=True)
+def bench_update_user_unchanged(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+
+    def update():
+        user_id = db.next_id()
+        db_user = user_crud.get_user(db.session, user_id)
+        user_crud.update_user(db.session, user_id, UserUpdate(city=db_user.city))
+
+    return timer.run(update)
+
+
+@benchmark("user_crud.update_user_fcm_token", needs_db=True)
+def bench_update_fcm_token(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(
+        lambda: user_crud.update_user_fcm_token(db.session, db.next_id(), "fcm-new")
+    )
+
+
+@benchmark("user_crud.update_user_pwd", needs_db=True)
+def bench_update_pwd(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(
+        lambda: user_crud.update_user_pwd(db.session, db.next_id(), "hash-new")
+    )
+
+
+@benchmark("user_crud.update_user_chat", needs_db=True)
+def bench_update_chat(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+
+    def update():
+        user_id = db.next_id()
+        chat = Chat(user_id=user_id, thread_id="thread", assistant_id="assistant")
+        user_crud.update_user_chat(db.session, chat)
+
+    return timer.run(update)
+
+
+@benchmark("user_crud.get_user_chat", needs_db=True)
+def bench_get_chat(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(lambda: user_crud.get_user_chat(db.session, db.next_id()))
+
+
+@benchmark("user_crud.get_user_preferences", needs_db=True)
+def bench_get_preferences(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(lambda: user_crud.get_user_preferences(db.session, db.next_id()))
+
+
+@benchmark("user_crud.get_user_fcm_token", needs_db=True)
+def bench_get_fcm_token(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    return timer.run(lambda: user_crud.get_user_fcm_token(db.session, db.next_id()))
+
+
+@benchmark("user_crud.delete_user", needs_db=True)
+def bench_delete_user(timer: Timer, db: SeededDatabase):
+    user_crud = crud()
+    victims = SeededDatabase(db.session, 50)
+    db.session.expunge_all()
+    try:
+        return timer.run_each(
+            lambda user_id: user_crud.delete_user(db.session, user_id), victims.ids
+        )
+    finally:
+        victims.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks")
+    parser.add_argument("--filter", default="", help="Only names containing this")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--no-db", action="store_true", help="Skip CRUD benchmarks")
+    parser.add_argument("--output", default="micro-results.json")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    selected = [
+        (name, fn, needs_db)
+        for name, fn, needs_db in BENCHMARKS
+        if args.filter in name and not (needs_db and args.no_db)
+    ]
+    timer = Timer(args.rounds, args.min_time)
+
+    db = None
+    session = None
+    if any(needs_db for _, _, needs_db in selected):
+        from app.db import models
+        from app.db.database import SessionLocal, engine
+
+        models.Base.metadata.create_all(bind=engine)
+        session = SessionLocal()
+        db = SeededDatabase(session, args.seed_users)
+
+    report = {}
+    try:
+        for name, fn, needs_db in selected:
+            report[name] = fn(timer, db)
+            values = report[name]
+            print(
+                f"{name:<36} {values['median_us']:>14.2f} us "
+                f"{values['ops_per_sec']:>14.1f} ops/s"
+            )
+    finally:
+        if db:
+            db.cleanup()
+            session.close()
+
+    output = {
+        "meta": results.metadata(
+            kind="micro", rounds=args.rounds, seed_users=args.seed_users
+        ),
+        "results": report,
+    }
+    results.save(args.output, output)
+
+    if args.baseline:
+        rows = results.compare(
+            output, results.load(args.baseline), COMPARED_METRICS, args.tolerance
+        )
+        results.print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime
+
+# Metrics where a higher value is an improvement; everything else is a latency
+HIGHER_IS_BETTER = {"rps", "ops_per_sec"}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def latency_summary(samples: list[float]) -> dict:
+    # Samples are seconds, the summary is milliseconds
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def metadata(**extra) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        **extra,
+    }
+
+
+def save(path: str, results: dict):
+    with open(path, "w") as out:
+        json.dump(results, out, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    with open(path) as source:
+        return json.load(source)
+
+
+def compare(
+    current: dict, baseline: dict, metrics: list[str], tolerance: float
+) -> list[dict]:
+    rows = []
+    for name, values in sorted(current["results"].items()):
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        for metric in metrics:
+            if metric not in values or not previous.get(metric):
+                continue
+            change = (values[metric] - previous[metric]) / previous[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            rows.append(
+                {
+                    "name": name,
+                    "metric": metric,
+                    "baseline": previous[metric],
+                    "current": values[metric],
+                    "change": change,
+                    "regression": worse > tolerance,
+                }
+            )
+    return rows
+
+
+def print_comparison(rows: list[dict]):
+    print(f"{'benchmark':<28} {'metric':<12} {'baseline':>12} {'current':>12} change")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<28} {row['metric']:<12} {row['baseline']:>12.3f} "
+            f"{row['current']:>12.3f} {row['change'] * 100:+6.1f}%{flag}"
+        )
@@ -0,0 +1,63 @@
+"""Runs the real application with Firebase storage replaced by a local fake.
+
+Everything else (Postgres, JWT, bcrypt, HTTP calls to the downstream services,
+SMTP) goes through the production code paths; point the environment at local
+stand-ins before starting it (see benchmarks/load.py).
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from app.ext import firebase as fb
+
+STORAGE_DIR = os.getenv("BENCH_STORAGE_DIR") or tempfile.mkdtemp(prefix="users-bench-")
+
+
+def _fake_setup() -> None:
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+
+
+def _fake_upload_image(folder, content_type, file, id) -> str:
+    path = os.path.join(STORAGE_DIR, folder, id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file, out)
+    return f"file://{path}"
+
+
+def _fake_delete_image(folder, id):
+    path = os.path.join(STORAGE_DIR, folder, id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+fb.setup = _fake_setup
+fb.upload_image = _fake_upload_image
+fb.delete_image = _fake_delete_image
+
+from app.main import app  # noqa: E402
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Users service benchmark server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "benchmarks.server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
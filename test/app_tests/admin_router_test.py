@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base
+from app.main import app as app_routers
+
+client = TestClient(app_routers)
+
+
+@patch("app.auth.dependencies.ADMIN_API_KEY", "secret")
+class TestAdminRoutes:
+
+    @patch("app.services.export_services.export_users")
+    def test_export_streams_ndjson(self, mock_export):
+        mock_export.return_value = iter([b'{"id":1}\n', b'{"id":2}\n'])
+
+        response = client.get(
+            "/admin/users/export?fields=email",
+            headers={"X-Admin-Key": "secret", "Accept-Encoding": "identity"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert "content-encoding" not in response.headers
+        assert response.text == '{"id":1}\n{"id":2}\n'
+        assert mock_export.call_args.args[0] == ["id", "email"]
+
+    @patch("app.services.export_services.export_users")
+    def test_export_is_gzipped_when_accepted(self, mock_export):
+        mock_export.return_value = iter([b'{"id":1}\n'])
+
+        response = client.get(
+            "/admin/users/export",
+            headers={"X-Admin-Key": "secret", "Accept-Encoding": "gzip"},
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == '{"id":1}\n'
+
+    def test_export_requires_admin_key(self):
+        response = client.get("/admin/users/export", headers={"X-Admin-Key": "nope"})
+
+        assert response.status_code == 403
+
+    def test_export_rejects_unknown_fields(self):
+        response = client.get(
+            "/admin/users/export?fields=hashed_password",
+            headers={"X-Admin-Key": "secret"},
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.services.import_services.import_users")
+    def test_import_users(self, mock_import):
+        mock_import.return_value = {"received": 1, "created": 1}
+
+        response = client.post(
+            "/admin/users/import?side_effects=false",
+            headers={"X-Admin-Key": "secret"},
+            files={"file": ("users.csv", b"email,password\n", "text/csv")},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"received": 1, "created": 1}
+        assert mock_import.call_args.args[1:] == ("csv", False)
+
+    @patch("app.services.import_services.side_effects")
+    @patch("app.auth.password.pwd_context.hash", lambda password: f"hashed:{password}")
+    def test_import_reads_a_real_upload(self, mock_side_effects):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)
+
+        with patch("app.services.import_services.SessionLocal", session):
+            response = client.post(
+                "/admin/users/import",
+                headers={"X-Admin-Key": "secret"},
+                files={
+                    "file": (
+                        "users.csv",
+                        "email,password,city\r\n"
+                        "ana@example.com,password,Córdoba\r\n"
+                        "not-an-email,password,\r\n".encode(),
+                        "text/csv",
+                    )
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.json()["received"] == 2
+        assert response.json()["created"] == 1
+        assert response.json()["errors"][0]["line"] == 3
+        with session() as db:
+            user = db.query(models.User).one()
+        assert (user.email, user.city) == ("ana@example.com", "Córdoba")
+        assert mock_side_effects.submit.called
+
+    def test_import_rejects_unknown_format(self):
+        response = client.post(
+            "/admin/users/import?format=xml",
+            headers={"X-Admin-Key": "secret"},
+            files={"file": ("users.xml", b"<users/>", "text/xml")},
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,144 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from app.middlewares.admission import (
+    AdmissionControlMiddleware,
+    Limiter,
+    parse_limits,
+    route_class,
+)
+
+
+def make_client(limits: str, cors: bool = False) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/users/{id}")
+    def get_user(id: str):
+        return {"id": id}
+
+    @app.post("/users/login")
+    def login():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionControlMiddleware, limits=limits)
+    if cors:
+        # Same order as in main
+        app.add_middleware(CORSMiddleware, allow_origins=["*"])
+    return TestClient(app)
+
+
+class TestAdmissionControl:
+
+    def test_parse_limits(self):
+        assert parse_limits("auth=4:16, reads=32") == {
+            "auth": (4, 16),
+            "reads": (32, 0),
+        }
+
+    def test_route_class(self):
+        assert route_class("POST", "/users/login") == "auth"
+        assert route_class("POST", "/users/avatar") == "uploads"
+        assert route_class("GET", "/users/{id}") == "reads"
+        assert route_class("PATCH", "/users") == "writes"
+
+    def test_admits_under_limit(self):
+        client = make_client("auth=1:0,reads=1:0")
+
+        response = client.get("/users/1")
+
+        assert response.status_code == 200
+
+    def test_sheds_full_class(self):
+        client = make_client("auth=0:0,reads=1:0")
+
+        response = client.post("/users/login")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        assert response.json()["detail"].startswith("SERVICE_OVERLOADED_ERROR")
+        assert client.get("/users/1").status_code == 200
+
+    def test_shed_response_has_cors_headers(self):
+        client = make_client("auth=0:0", cors=True)
+
+        response = client.post(
+            "/users/login", headers={"Origin": "https://app.example.com"}
+        )
+
+        assert response.status_code == 503
+        assert response.headers["access-control-allow-origin"] == "*"
+        assert response.headers["retry-after"] == "2"
+
+    def test_unclassified_route_is_not_limited(self):
+        client = make_client("auth=0:0")
+
+        assert client.get("/users/1").status_code == 200
+        assert client.get("/missing").status_code == 404
+
+    def test_queue_timeout(self):
+        async def run():
+            limiter = Limiter("reads", 1, 1, 0.01)
+            assert await limiter.acquire() is None
+            assert await limiter.acquire() == "queue_timeout"
+            limiter.release()
+            assert await limiter.acquire() is None
+
+        asyncio.run(run())
+
+    def test_queue_full(self):
+        async def run():
+            limiter = Limiter("reads", 1, 1, 1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            assert await limiter.acquire() == "queue_full"
+            limiter.release()
+            assert await waiter is None
+
+        asyncio.run(run())
+
+    def test_freed_slot_goes_to_the_oldest_waiter(self):
+        async def run():
+            limiter = Limiter("reads", 1, 2, 1)
+            await limiter.acquire()
+            order = []
+
+            async def queued(name: str):
+                assert await limiter.acquire() is None
+                order.append(name)
+
+            first = asyncio.create_task(queued("first"))
+            await asyncio.sleep(0)
+            limiter.release()
+            # Arrives after the release but before "first" got to run again
+            second = asyncio.create_task(queued("second"))
+            await first
+            await asyncio.sleep(0)
+            assert order == ["first"]
+
+            limiter.release()
+            await second
+            assert order == ["first", "second"]
+            assert limiter.active == 1
+
+        asyncio.run(run())
+
+    def test_cancelled_waiter_does_not_take_a_slot(self):
+        async def run():
+            limiter = Limiter("reads", 1, 2, 1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            limiter.release()
+
+            assert limiter.waiting == 0
+            assert limiter.active == 0
+            assert await limiter.acquire() is None
+
+        asyncio.run(run())
@@ -90,26 +90,33 @@ class TestAuthRoutes(unittest.TestCase):
 
         assert response.status_code == 400
 
-    @patch("app.services.users_services.auth_user")
-    def test_verify_id_token_success(self, mock_auth_user):
-        mock_auth_user.return_value = 1
+    @patch("app.auth.authentication.verify_token")
+    def test_verify_id_token_success(self, mock_verify_token):
+        mock_verify_token.return_value = {"sub": 1}
 
         token = "jwt_token"
         headers = {"Authorization": f"Bearer {token}"}
         response = client.get("/users/verify_id_token", headers=headers)
 
         assert response.status_code == 200
+        assert response.json() == 1
 
-    @patch("app.services.users_services.auth_user")
-    def test_verify_id_token_unauthorized(self, mock_auth_user):
-        mock_auth_user.side_effect = APIException(
-            code=INVALID_HEADER_ERROR, msg="INVALID_HEADER_ERROR"
-        )
-
+    def test_verify_id_token_unauthorized(self):
         response = client.get("/users/verify_id_token")
 
         assert response.status_code == 403
 
+    @patch("app.auth.authentication.verify_token")
+    def test_verify_id_token_expired(self, mock_verify_token):
+        mock_verify_token.side_effect = APIException(
+            code=EXPIRED_TOKEN_ERROR, msg="Signature has expired"
+        )
+
+        headers = {"Authorization": "Bearer jwt_token"}
+        response = client.get("/users/verify_id_token", headers=headers)
+
+        assert response.status_code == 401
+
     @patch("app.services.users_services.refresh_user_tokens")
     def test_refresh_token_success(self, mock_refresh_user_tokens):
         mock_tokens = {
@@ -134,3 +141,27 @@ class TestAuthRoutes(unittest.TestCase):
         response = client.post("/users/refresh_token")
 
         assert response.status_code == 403
+
+    @patch("app.auth.authentication.verify_token")
+    @patch("app.services.users_services.logout_user")
+    def test_logout_success(self, mock_logout_user, mock_verify_token):
+        mock_verify_token.return_value = {"sub": 1, "jti": "jti"}
+        mock_logout_user.return_value = None
+
+        headers = {"Authorization": "Bearer token"}
+        response = client.post("/users/logout", headers=headers)
+
+        assert response.status_code == 204
+        assert response.content == b""
+
+    @patch("app.auth.authentication.verify_token")
+    @patch("app.services.users_services.logout_user")
+    def test_logout_revoked_token(self, mock_logout_user, mock_verify_token):
+        mock_verify_token.side_effect = APIException(
+            code=INVALID_CREDENTIALS_ERROR, msg="Token has been revoked"
+        )
+
+        headers = {"Authorization": "Bearer token"}
+        response = client.post("/users/logout", headers=headers)
+
+        assert response.status_code == 401
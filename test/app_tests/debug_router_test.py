@@ -0,0 +1,23 @@
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.debug_router import router
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+@patch("app.auth.dependencies.ADMIN_API_KEY", "secret")
+class TestDebugRoutes:
+
+    def test_stacks(self):
+        response = client.get("/debug/stacks", headers={"X-Admin-Key": "secret"})
+
+        assert response.status_code == 200
+        assert "x-window-start" in response.headers
+
+    def test_stacks_require_admin_key(self):
+        assert client.get("/debug/stacks").status_code == 403
@@ -0,0 +1,59 @@
+from unittest.mock import Mock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app as app_routers
+from app.services import health_services
+
+client = TestClient(app_routers)
+
+
+class TestHealthRoutes:
+
+    def setup_method(self):
+        health_services._readiness = None
+
+    def test_liveness(self):
+        response = client.get("/healthz")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    @patch("app.services.health_services.checks")
+    def test_ready(self, mock_checks):
+        mock_checks.return_value = {"database": Mock()}
+
+        response = client.get("/readyz")
+
+        assert response.status_code == 200
+        assert response.json()["checks"] == {"database": "ok"}
+
+    @patch("app.services.health_services.checks")
+    def test_not_ready(self, mock_checks):
+        mock_checks.return_value = {"database": Mock(side_effect=Exception("down"))}
+
+        response = client.get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["checks"] == {"database": "unavailable"}
+
+    @patch("app.services.health_services.checks")
+    def test_readiness_is_cached(self, mock_checks):
+        check = Mock()
+        mock_checks.return_value = {"database": check}
+
+        health_services.readiness(now=100.0)
+        health_services.readiness(now=101.0)
+        health_services.readiness(now=100.0 + health_services.READINESS_CACHE_SECONDS)
+
+        assert check.call_count == 2
+
+    def test_saturation(self):
+        response = client.get("/saturation")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["in_flight"] == 1
+        assert body["threadpool"]["size"] > 0
+        assert set(body["executors"]["cpu"]) == {"workers", "active", "queued"}
+        assert "status" in body["db_pool"]
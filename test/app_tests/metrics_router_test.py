@@ -0,0 +1,21 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app as app_routers
+
+client = TestClient(app_routers)
+
+
+@patch("app.auth.dependencies.ADMIN_API_KEY", "secret")
+class TestMetricsRoutes:
+
+    def test_metrics(self):
+        response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "circuit_breaker_state" in response.text
+
+    def test_metrics_require_admin_key(self):
+        assert client.get("/metrics").status_code == 403
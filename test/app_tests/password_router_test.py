@@ -76,8 +76,14 @@ class TestPasswordRoutes:
 
         assert response.status_code == 404
 
+    @patch("app.auth.authentication.verify_token")
+    @patch("app.db.user_crud.get_user")
     @patch("app.services.password_services.update_password")
-    def test_update_password_success(self, mock_update_password):
+    def test_update_password_success(
+        self, mock_update_password, mock_get_user, mock_verify_token
+    ):
+        mock_verify_token.return_value = {"sub": 1}
+        mock_get_user.return_value = MagicMock(id=1)
         mock_update_password.return_value = 1
 
         update_data = {
@@ -93,8 +99,14 @@ class TestPasswordRoutes:
 
         assert response.status_code == 200
 
+    @patch("app.auth.authentication.verify_token")
+    @patch("app.db.user_crud.get_user")
     @patch("app.services.password_services.update_password")
-    def test_update_password_invalid_current_password(self, mock_update_password):
+    def test_update_password_invalid_current_password(
+        self, mock_update_password, mock_get_user, mock_verify_token
+    ):
+        mock_verify_token.return_value = {"sub": 1}
+        mock_get_user.return_value = MagicMock(id=1)
         mock_update_password.side_effect = APIException(
             code=WRONG_PASSWORD_ERROR, msg="Invalid current password"
         )
@@ -112,10 +124,13 @@ class TestPasswordRoutes:
 
         assert response.status_code == 400
 
+    @patch("app.auth.authentication.verify_token")
     @patch("app.services.password_services.update_password")
-    def test_update_password_user_not_authenticated(self, mock_update_password):
-        mock_update_password.side_effect = APIException(
-            code=INVALID_HEADER_ERROR, msg="Not authenticated"
+    def test_update_password_user_not_authenticated(
+        self, mock_update_password, mock_verify_token
+    ):
+        mock_verify_token.side_effect = APIException(
+            code=EXPIRED_TOKEN_ERROR, msg="Signature verification failed"
         )
 
         update_data = {
@@ -129,4 +144,28 @@ class TestPasswordRoutes:
             headers={"Authorization": "Bearer invalid_token"},
         )
 
-        assert response.status_code == 403
+        assert response.status_code == 401
+        mock_update_password.assert_not_called()
+
+    @patch("app.auth.authentication.verify_token")
+    @patch("app.db.user_crud.get_user")
+    @patch("app.services.password_services.update_password")
+    def test_update_password_user_not_found(
+        self, mock_update_password, mock_get_user, mock_verify_token
+    ):
+        mock_verify_token.return_value = {"sub": 1}
+        mock_get_user.return_value = None
+
+        update_data = {
+            "current_password": "current_password",
+            "new_password": "new_password",
+        }
+
+        response = client.patch(
+            "/users/password/update",
+            json=update_data,
+            headers={"Authorization": "Bearer token"},
+        )
+
+        assert response.status_code == 404
+        mock_update_password.assert_not_called()
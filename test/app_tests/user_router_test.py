@@ -15,9 +15,16 @@ client = TestClient(user_router)
 
 class TestUserRoutes:
 
+    @patch("app.auth.authentication.verify_token")
     @patch("app.services.users_services.update_user")
-    def test_update_user_profile_success(self, mock_update_user):
-        mock_user = User(id=1, username="username", email="username@example.com")
+    def test_update_user_profile_success(self, mock_update_user, mock_verify_token):
+        mock_verify_token.return_value = {"sub": 1}
+        mock_user = UpdatedUser(
+            id=1,
+            username="username",
+            email="username@example.com",
+            changed_fields=["username"],
+        )
         mock_update_user.return_value = mock_user
 
         updated_data = {"username": "username", "email": "username@example.com"}
@@ -26,6 +33,8 @@ class TestUserRoutes:
         )
 
         assert response.status_code == 200
+        assert response.json()["changed_fields"] == ["username"]
+        assert mock_update_user.call_args.args[1] == 1
 
     @patch("app.services.users_services.update_user")
     def test_update_user_profile_user_not_authenticated(self, mock_update_user):
@@ -38,8 +47,10 @@ class TestUserRoutes:
 
         assert response.status_code == 403
 
+    @patch("app.auth.authentication.verify_token")
     @patch("app.services.users_services.delete_user")
-    def test_delete_user_profile_success(self, mock_delete_user):
+    def test_delete_user_profile_success(self, mock_delete_user, mock_verify_token):
+        mock_verify_token.return_value = {"sub": 1}
         mock_user = User(id=1, username="username", email="username@example.com")
         mock_delete_user.return_value = mock_user
         response = client.delete("/users", headers={"Authorization": "Bearer token"})
@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth.dependencies import (
+    CurrentUser,
+    CurrentUserId,
+    TokenClaims,
+    get_current_user,
+)
+from app.db.database import get_db
+from app.utils.api_exception import APIException
+from app.utils.constants import EXPIRED_TOKEN_ERROR
+
+app = FastAPI()
+app.dependency_overrides[get_db] = lambda: Mock()
+
+
+def user_city(user: CurrentUser) -> str:
+    return user.city
+
+
+@app.get("/me")
+def me(
+    user_id: CurrentUserId,
+    claims: TokenClaims,
+    user: CurrentUser,
+    city: str = Depends(user_city),
+):
+    return {
+        "id": user_id,
+        "jti": claims["jti"],
+        "username": user.username,
+        "city": city,
+    }
+
+
+client = TestClient(app)
+
+
+class TestAuthDependencies(unittest.TestCase):
+
+    @patch("app.db.user_crud.get_user")
+    @patch("app.auth.authentication.verify_token")
+    def test_decodes_and_loads_once(self, mock_verify_token, mock_get_user):
+        mock_verify_token.return_value = {"sub": 1, "jti": "jti"}
+        mock_get_user.return_value = Mock(username="username", city="Buenos Aires")
+
+        response = client.get("/me", headers={"Authorization": "Bearer token"})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": 1,
+            "jti": "jti",
+            "username": "username",
+            "city": "Buenos Aires",
+        }
+        mock_verify_token.assert_called_once_with("token")
+        self.assertEqual(mock_get_user.call_count, 1)
+
+    @patch("app.db.user_crud.get_user")
+    @patch("app.auth.authentication.verify_token")
+    def test_reuses_request_state(self, mock_verify_token, mock_get_user):
+        request = Mock()
+        request.state.user = "cached"
+
+        self.assertEqual(get_current_user(request, 1, Mock()), "cached")
+        mock_get_user.assert_not_called()
+
+    def test_missing_header(self):
+        response = client.get("/me")
+
+        assert response.status_code == 403
+
+    @patch("app.auth.authentication.verify_token")
+    def test_invalid_scheme(self, mock_verify_token):
+        response = client.get("/me", headers={"Authorization": "bearer token"})
+
+        assert response.status_code == 403
+        mock_verify_token.assert_not_called()
+
+    @patch("app.auth.authentication.verify_token")
+    def test_invalid_token(self, mock_verify_token):
+        mock_verify_token.side_effect = APIException(
+            code=EXPIRED_TOKEN_ERROR, msg="Signature has expired"
+        )
+
+        response = client.get("/me", headers={"Authorization": "Bearer token"})
+
+        assert response.status_code == 401
+
+    @patch("app.db.user_crud.get_user")
+    @patch("app.auth.authentication.verify_token")
+    def test_user_not_found(self, mock_verify_token, mock_get_user):
+        mock_verify_token.return_value = {"sub": 1, "jti": "jti"}
+        mock_get_user.return_value = None
+
+        response = client.get("/me", headers={"Authorization": "Bearer token"})
+
+        assert response.status_code == 404
@@ -0,0 +1,146 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.recovery_store import MemoryStore, RedisStore, SQLStore
+from app.db import models
+from app.db.database import Base
+from app.schemas.password import PasswordRecoverCreate
+
+
+def recover(user_id: int = 1, expires_in: timedelta = timedelta(minutes=30)):
+    now = datetime.now()
+    return PasswordRecoverCreate.model_construct(
+        user_id=user_id,
+        emited_datetime=now,
+        expires_at=now + expires_in,
+        leftover_attempts=2,
+        pin=123456,
+    )
+
+
+class StoreContract:
+
+    def test_create_and_get(self):
+        self.store.create(self.db, recover())
+
+        state = self.store.get(self.db, 1)
+
+        self.assertEqual(state.pin, "123456")
+        self.assertEqual(state.leftover_attempts, 2)
+
+    def test_create_replaces_previous(self):
+        self.store.create(self.db, recover())
+        self.store.consume_attempt(self.db, 1)
+
+        self.store.create(self.db, recover())
+
+        self.assertEqual(self.store.get(self.db, 1).leftover_attempts, 2)
+
+    def test_consume_attempts(self):
+        self.store.create(self.db, recover())
+
+        first = self.store.consume_attempt(self.db, 1)
+        self.assertEqual((first.pin, first.leftover_attempts), ("123456", 1))
+        self.assertEqual(self.store.consume_attempt(self.db, 1).leftover_attempts, 0)
+        self.assertIsNone(self.store.consume_attempt(self.db, 1))
+
+    def test_expired_is_gone(self):
+        self.store.create(self.db, recover(expires_in=timedelta(seconds=-1)))
+
+        self.assertIsNone(self.store.get(self.db, 1))
+        self.assertIsNone(self.store.consume_attempt(self.db, 1))
+
+    def test_delete(self):
+        self.store.create(self.db, recover())
+
+        self.store.delete(self.db, 1)
+
+        self.assertIsNone(self.store.get(self.db, 1))
+
+
+class TestMemoryStore(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryStore()
+        self.db = None
+
+
+class TestSQLStore(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.store = SQLStore()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_create_returns_the_row(self):
+        db_recover = self.store.create(self.db, recover())
+
+        self.assertIsInstance(db_recover, models.PasswordRecover)
+
+
+class TestRedisStore(unittest.TestCase):
+
+    @patch("app.ext.redis.get_client")
+    def test_create_sets_native_expiry(self, mock_get_client):
+        pipe = mock_get_client.return_value.pipeline.return_value
+        data = recover()
+
+        RedisStore().create(None, data)
+
+        pipe.delete.assert_called_once_with("pwd_recover:1")
+        self.assertEqual(pipe.hset.call_args.kwargs["mapping"]["pin"], "123456")
+        pipe.expireat.assert_called_once_with("pwd_recover:1", data.expires_at)
+        pipe.execute.assert_called_once()
+
+    @patch("app.ext.redis.get_client")
+    def test_get(self, mock_get_client):
+        now = datetime.now().replace(microsecond=0)
+        mock_get_client.return_value.hgetall.return_value = {
+            b"pin": b"123456",
+            b"emited_datetime": now.isoformat().encode(),
+            b"expires_at": (now + timedelta(minutes=30)).isoformat().encode(),
+            b"leftover_attempts": b"2",
+        }
+
+        state = RedisStore().get(None, 1)
+
+        self.assertEqual(state.pin, "123456")
+        self.assertEqual(state.emited_datetime, now)
+        self.assertEqual(state.leftover_attempts, 2)
+
+    @patch("app.ext.redis.get_client")
+    def test_missing_key(self, mock_get_client):
+        mock_get_client.return_value.hgetall.return_value = {}
+        mock_get_client.return_value.eval.return_value = None
+
+        self.assertIsNone(RedisStore().get(None, 1))
+        self.assertIsNone(RedisStore().consume_attempt(None, 1))
+
+    @patch("app.ext.redis.get_client")
+    def test_consume_attempt_is_a_script(self, mock_get_client):
+        now = datetime.now().replace(microsecond=0).isoformat().encode()
+        mock_get_client.return_value.eval.return_value = [
+            b"pin",
+            b"123456",
+            b"emited_datetime",
+            now,
+            b"expires_at",
+            now,
+            b"leftover_attempts",
+            b"1",
+        ]
+
+        state = RedisStore().consume_attempt(None, 1)
+
+        self.assertEqual((state.pin, state.leftover_attempts), ("123456", 1))
+        self.assertEqual(
+            mock_get_client.return_value.eval.call_args[0][2], "pwd_recover:1"
+        )
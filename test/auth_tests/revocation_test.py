@@ -0,0 +1,76 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.revocation import Denylist, expiration
+from app.db import revocation_crud
+from app.db.database import Base
+
+
+class TestDenylist(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.now = datetime.now()
+
+    def tearDown(self):
+        self.db.close()
+
+    def revoke(self, jti: str, expires_in: timedelta, revoked_at: datetime):
+        revocation_crud.revoke_token(self.db, jti, self.now + expires_in, revoked_at)
+
+    def test_sync_loads_revoked_tokens(self):
+        denylist = Denylist(100, 0.01)
+        self.revoke("a", timedelta(hours=1), self.now)
+        self.revoke("b", timedelta(hours=1), self.now)
+
+        denylist.sync(self.db, self.now)
+
+        self.assertTrue(denylist.is_revoked("a"))
+        self.assertTrue(denylist.is_revoked("b"))
+        self.assertFalse(denylist.is_revoked("c"))
+        self.assertFalse(denylist.is_revoked(None))
+
+    def test_sync_is_incremental(self):
+        denylist = Denylist(100, 0.01)
+        self.revoke("a", timedelta(hours=1), self.now - timedelta(minutes=5))
+        denylist.sync(self.db, self.now)
+
+        self.revoke("b", timedelta(hours=1), self.now)
+        denylist.sync(self.db, self.now)
+
+        self.assertTrue(denylist.is_revoked("b"))
+        self.assertEqual(len(denylist), 2)
+
+    def test_expired_tokens_are_pruned(self):
+        denylist = Denylist(100, 0.01)
+        self.revoke("a", timedelta(minutes=1), self.now)
+        denylist.sync(self.db, self.now)
+
+        denylist.sync(self.db, self.now + timedelta(minutes=2))
+
+        self.assertFalse(denylist.is_revoked("a"))
+        self.assertEqual(len(denylist), 0)
+
+    def test_filter_grows_past_capacity(self):
+        denylist = Denylist(4, 0.01)
+        for i in range(20):
+            denylist.add(f"jti-{i}", self.now + timedelta(hours=1))
+
+        self.assertTrue(all(denylist.is_revoked(f"jti-{i}") for i in range(20)))
+
+    def test_revoking_twice(self):
+        self.revoke("a", timedelta(hours=1), self.now)
+        self.revoke("a", timedelta(hours=1), self.now)
+
+        self.assertEqual(revocation_crud.delete_expired(self.db, self.now), 0)
+
+    def test_expiration_roundtrip(self):
+        exp = datetime(2030, 1, 1, 12, 0)
+        payload = {"exp": int((exp - datetime(1970, 1, 1)).total_seconds())}
+
+        self.assertEqual(expiration(payload), exp)
@@ -0,0 +1,38 @@
+import unittest
+
+from app.auth.token_families import MemoryBackend
+
+
+class TestMemoryBackend(unittest.TestCase):
+
+    def test_advances_generations(self):
+        backend = MemoryBackend()
+
+        self.assertTrue(backend.advance("family", 0, 60))
+        self.assertTrue(backend.advance("family", 1, 60))
+        self.assertTrue(backend.advance("family", 2, 60))
+
+    def test_detects_reused_generation(self):
+        backend = MemoryBackend()
+        backend.advance("family", 0, 60)
+        backend.advance("family", 1, 60)
+
+        self.assertFalse(backend.advance("family", 0, 60))
+        self.assertFalse(backend.advance("family", 1, 60))
+
+    def test_forget_family(self):
+        backend = MemoryBackend()
+        backend.advance("family", 0, 60)
+        backend.forget("family")
+
+        self.assertTrue(backend.advance("family", 0, 60))
+
+    def test_bounded_size(self):
+        backend = MemoryBackend(size=2)
+        backend.advance("a", 0, 60)
+        backend.advance("b", 0, 60)
+        backend.advance("c", 0, 60)
+
+        # The least recently refreshed family was evicted
+        self.assertTrue(backend.advance("a", 0, 60))
+        self.assertFalse(backend.advance("c", 0, 60))
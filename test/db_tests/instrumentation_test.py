@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from app.db import instrumentation
+from app.utils import request_context
+
+
+class TestQueryInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        instrumentation.setup(self.engine)
+        self.ctx = request_context.RequestContext(
+            {"type": "http", "method": "GET", "path": "/users/1", "headers": []}
+        )
+        self.token = request_context.activate(self.ctx)
+
+    def tearDown(self):
+        request_context.deactivate(self.token)
+
+    def test_counts_statements_per_request(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+        self.assertEqual(self.ctx.query_count, 2)
+        self.assertGreater(self.ctx.query_time, 0)
+
+    @patch("app.db.instrumentation.SQL_SLOW_QUERY_MS", 0)
+    @patch("app.db.instrumentation.Logger")
+    def test_logs_slow_statements_with_route(self, mock_logger):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        message = mock_logger.return_value.warn.call_args[0][0]
+        self.assertIn("GET /users/1", message)
+        self.assertIn("SELECT 1", message)
+
+    @patch("app.db.instrumentation.SQL_DEV_MODE", True)
+    @patch("app.db.instrumentation.Logger")
+    def test_flags_repeated_statements(self, mock_logger):
+        with self.engine.connect() as conn:
+            for user_id in range(instrumentation.SQL_REPEATED_QUERY_THRESHOLD):
+                conn.execute(text("SELECT :id"), {"id": user_id})
+
+        instrumentation.report(self.ctx)
+
+        message = mock_logger.return_value.warn.call_args[0][0]
+        self.assertIn("Possible N+1", message)
+
+    @patch("app.db.instrumentation.Logger")
+    def test_no_repeated_statement_warning_outside_dev_mode(self, mock_logger):
+        with self.engine.connect() as conn:
+            for user_id in range(instrumentation.SQL_REPEATED_QUERY_THRESHOLD):
+                conn.execute(text("SELECT :id"), {"id": user_id})
+
+        instrumentation.report(self.ctx)
+
+        mock_logger.return_value.warn.assert_not_called()
@@ -0,0 +1,41 @@
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import migrations
+
+
+class TestMigrations(unittest.TestCase):
+
+    def test_upgrades_existing_users_table(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(
+                text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR)")
+            )
+
+        migrations.upgrade(engine)
+        migrations.upgrade(engine)
+
+        inspector = inspect(engine)
+        columns = {column["name"] for column in inspector.get_columns("users")}
+        indexes = {index["name"] for index in inspector.get_indexes("users")}
+        self.assertIn("deleted_at", columns)
+        self.assertIn("updated_at", columns)
+        self.assertIn("ix_users_email_active", indexes)
+
+    def test_upgrades_existing_password_recover_table(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(
+                text("CREATE TABLE password_recover (user_id INTEGER PRIMARY KEY)")
+            )
+
+        migrations.upgrade(engine)
+
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("password_recover")}
+        indexes = {i["name"] for i in inspector.get_indexes("password_recover")}
+        self.assertIn("expires_at", columns)
+        self.assertIn("ix_password_recover_expires_at", indexes)
+        self.assertFalse(inspector.has_table("users"))
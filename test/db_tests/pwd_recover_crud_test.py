@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models, pwd_recover_crud
+from app.db.database import Base
+
+
+class TestPasswordRecoverCrud(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.now = datetime.now()
+
+    def tearDown(self):
+        self.db.close()
+
+    def add(self, user_id: int, expires_at: datetime | None):
+        self.db.add(
+            models.PasswordRecover(
+                user_id=user_id,
+                pin="123456",
+                emited_datetime=self.now,
+                expires_at=expires_at,
+            )
+        )
+        self.db.commit()
+
+    def test_expired_recover_is_not_loaded(self):
+        self.add(1, self.now + timedelta(minutes=30))
+        self.add(2, self.now - timedelta(seconds=1))
+        self.add(3, None)
+
+        self.assertIsNotNone(pwd_recover_crud.get_recover(self.db, 1))
+        self.assertIsNone(pwd_recover_crud.get_recover(self.db, 2))
+        self.assertIsNone(pwd_recover_crud.get_recover(self.db, 3))
+
+    def test_delete_recover_removes_expired_rows(self):
+        self.add(1, self.now - timedelta(seconds=1))
+
+        self.assertTrue(pwd_recover_crud.delete_recover(self.db, 1))
+        self.assertFalse(pwd_recover_crud.delete_recover(self.db, 1))
+
+    def test_delete_expired_in_batches(self):
+        for user_id in range(1, 6):
+            self.add(user_id, self.now - timedelta(minutes=user_id))
+        self.add(6, None)
+        self.add(7, self.now + timedelta(minutes=30))
+
+        self.assertEqual(pwd_recover_crud.delete_expired(self.db, self.now, 4), 4)
+        self.assertEqual(pwd_recover_crud.delete_expired(self.db, self.now, 4), 2)
+        self.assertEqual(pwd_recover_crud.delete_expired(self.db, self.now, 4), 0)
+        self.assertEqual(self.db.query(models.PasswordRecover).count(), 1)
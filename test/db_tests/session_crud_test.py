@@ -0,0 +1,88 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models, session_crud, user_crud
+from app.db.database import Base
+
+
+class TestSessionCrud(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add(models.User(id=1, username="username", email="user@example.com"))
+        self.db.commit()
+        self.expires_at = datetime.now() + timedelta(days=1)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_sessions_per_device(self):
+        session_crud.create_session(self.db, "a", 1, "hash_a", self.expires_at, "web")
+        session_crud.create_session(self.db, "b", 1, "hash_b", self.expires_at)
+
+        self.assertEqual(session_crud.get_session(self.db, "a").device, "web")
+        self.assertEqual(session_crud.get_session(self.db, "b").hashed_token, "hash_b")
+
+    def test_rotate_session(self):
+        session_crud.create_session(self.db, "a", 1, "hash_a", self.expires_at)
+
+        self.assertTrue(
+            session_crud.rotate_session(
+                self.db, "a", 1, "hash_a", "hash_a2", self.expires_at
+            )
+        )
+        # The old token was consumed by the first rotation
+        self.assertFalse(
+            session_crud.rotate_session(
+                self.db, "a", 1, "hash_a", "hash_a3", self.expires_at
+            )
+        )
+
+    def test_rotate_expired_session(self):
+        expired = datetime.now() - timedelta(seconds=1)
+        session_crud.create_session(self.db, "a", 1, "hash_a", expired)
+
+        self.assertFalse(
+            session_crud.rotate_session(
+                self.db, "a", 1, "hash_a", "hash_a2", self.expires_at
+            )
+        )
+
+    def test_delete_user_sessions(self):
+        session_crud.create_session(self.db, "a", 1, "hash_a", self.expires_at)
+        session_crud.create_session(self.db, "b", 1, "hash_b", self.expires_at)
+
+        self.assertEqual(session_crud.delete_user_sessions(self.db, 1), 2)
+        self.assertFalse(session_crud.delete_session(self.db, "a"))
+
+    def test_deleted_user_sessions_are_gone(self):
+        session_crud.create_session(self.db, "a", 1, "hash_a", self.expires_at)
+        session_crud.create_session(self.db, "b", 1, "hash_b", self.expires_at)
+
+        _, session_ids = user_crud.delete_user(self.db, 1)
+
+        self.assertEqual(sorted(session_ids), ["a", "b"])
+        self.assertIsNone(session_crud.get_session(self.db, "a"))
+        self.assertFalse(
+            session_crud.rotate_session(
+                self.db, "a", 1, "hash_a", "hash_a2", self.expires_at
+            )
+        )
+
+    def test_deleted_user_cannot_rotate(self):
+        session_crud.create_session(self.db, "a", 1, "hash_a", self.expires_at)
+        # A row left over by a delete made before sessions were removed with it
+        self.db.get(models.User, 1).deleted_at = datetime.now()
+        self.db.commit()
+
+        self.assertIsNone(session_crud.get_session(self.db, "a"))
+        self.assertFalse(
+            session_crud.rotate_session(
+                self.db, "a", 1, "hash_a", "hash_a2", self.expires_at
+            )
+        )
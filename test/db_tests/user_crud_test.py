@@ -0,0 +1,132 @@
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models, user_crud
+from app.db.database import Base
+from app.schemas.users import UserUpdate
+
+
+class TestUpdateUser(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add(
+            models.User(
+                id=1,
+                username="username",
+                email="user@example.com",
+                city="Buenos Aires",
+                birth_date=date(1999, 10, 31),
+                preferences=["Cafe"],
+            )
+        )
+        self.db.commit()
+
+        self.statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: self.statements.append(statement),
+        )
+
+    def tearDown(self):
+        self.db.close()
+
+    def updates(self) -> list[str]:
+        return [s for s in self.statements if s.startswith("UPDATE")]
+
+    def test_updates_only_changed_columns(self):
+        db_user, changed = user_crud.update_user_fields(
+            self.db, 1, {"city": "Rosario", "username": "username"}
+        )
+
+        self.assertEqual(changed, ["city"])
+        self.assertEqual(db_user.city, "Rosario")
+        self.assertEqual(len(self.updates()), 1)
+        self.assertIn("city", self.updates()[0])
+        self.assertNotIn("username", self.updates()[0])
+
+    def test_unchanged_update_does_not_write(self):
+        db_user, changed = user_crud.update_user_fields(
+            self.db, 1, {"city": "Buenos Aires", "preferences": ["Cafe"]}
+        )
+
+        self.assertEqual(changed, [])
+        self.assertEqual(db_user.city, "Buenos Aires")
+        self.assertEqual(self.updates(), [])
+
+    def test_update_clears_sent_fields(self):
+        db_user = user_crud.update_user(self.db, 1, UserUpdate(city=None))
+
+        self.assertIsNone(db_user.city)
+        self.assertEqual(db_user.preferences, ["Cafe"])
+
+    def test_update_does_not_reload_the_row(self):
+        db_user, _ = user_crud.update_user_fields(self.db, 1, {"city": "Rosario"})
+        statements = len(self.statements)
+
+        self.assertEqual((db_user.city, db_user.username), ("Rosario", "username"))
+        self.assertIsNotNone(db_user.updated_at)
+        self.assertEqual(len(self.statements), statements)
+        selects = [s for s in self.statements if s.startswith("SELECT")]
+        self.assertEqual(len(selects), 1)
+
+    def test_update_to_a_taken_email(self):
+        self.db.add(models.User(id=2, email="taken@example.com"))
+        self.db.commit()
+
+        with self.assertRaises(IntegrityError):
+            user_crud.update_user_fields(self.db, 1, {"email": "taken@example.com"})
+
+    def test_update_missing_user(self):
+        db_user, changed = user_crud.update_user_fields(self.db, 2, {"city": "Rosario"})
+
+        self.assertIsNone(db_user)
+        self.assertEqual(changed, [])
+
+
+class TestSoftDelete(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add(models.User(id=1, username="username", email="user@example.com"))
+        self.db.add(models.PasswordRecover(user_id=1, pin="123456"))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_delete_marks_user(self):
+        db_user, _ = user_crud.delete_user(self.db, 1)
+
+        self.assertEqual(db_user.email, "user@example.com")
+        self.assertIsNotNone(db_user.deleted_at)
+        self.assertIsNone(user_crud.get_user(self.db, 1))
+        self.assertIsNone(user_crud.get_user_by_email(self.db, "user@example.com"))
+        self.assertEqual(user_crud.delete_user(self.db, 1), (None, []))
+
+    def test_email_reusable_after_delete(self):
+        user_crud.delete_user(self.db, 1)
+        self.db.add(models.User(id=2, username="other", email="user@example.com"))
+        self.db.commit()
+
+        self.assertEqual(user_crud.get_user_by_email(self.db, "user@example.com").id, 2)
+
+    def test_purge_users(self):
+        user_crud.delete_user(self.db, 1)
+
+        deleted = user_crud.get_deleted_users(self.db, datetime.now(), 10)
+        purged = user_crud.purge_users(self.db, [user_id for user_id, _ in deleted])
+
+        self.assertEqual(deleted, [(1, None)])
+        self.assertEqual(purged, 1)
+        self.assertIsNone(self.db.get(models.PasswordRecover, 1))
+        self.assertEqual(user_crud.get_deleted_users(self.db, datetime.now(), 10), [])
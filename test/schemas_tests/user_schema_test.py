@@ -77,7 +77,6 @@ class TestUserUpdate(unittest.TestCase):
             "birth_date": date(1999, 10, 31),
             "city": "Buenos Aires",
             "preferences": ["Cafe", "Aquarium"],
-            "refresh_token": "refresh_token",
             "avatar_link": "avatar.jpg",
         }
 
@@ -88,7 +87,6 @@ class TestUserUpdate(unittest.TestCase):
         self.assertEqual(user.birth_date, date(1999, 10, 31))
         self.assertEqual(user.city, "Buenos Aires")
         self.assertEqual(user.preferences, ["Cafe", "Aquarium"])
-        self.assertEqual(user.refresh_token, "refresh_token")
         self.assertEqual(user.avatar_link, "avatar.jpg")
 
     def test_invalid_avatar_link(self):
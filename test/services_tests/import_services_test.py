@@ -0,0 +1,135 @@
+import io
+import unittest
+from unittest.mock import patch
+
+import orjson
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import password as pwd
+from app.db import models, user_crud
+from app.db.database import Base
+from app.services import import_services as srv
+from app.utils.api_exception import APIException
+from app.utils.constants import DATABASE_ERROR
+
+HASH = pwd.pwd_context.hash("password")
+
+
+def ndjson(*records) -> io.BytesIO:
+    return io.BytesIO(b"".join(orjson.dumps(record) + b"\n" for record in records))
+
+
+@patch.object(srv, "side_effects")
+@patch("app.auth.password.pwd_context.hash", lambda password: f"hashed:{password}")
+class TestImportServices(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.session = sessionmaker(bind=engine)
+        with self.session() as db:
+            db.add(models.User(email="taken@example.com"))
+            db.commit()
+        patcher = patch.object(srv, "SessionLocal", self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def emails(self) -> dict:
+        with self.session() as db:
+            return dict(db.query(models.User.email, models.User.hashed_password))
+
+    def test_imports_ndjson_in_chunks(self, mock_side_effects):
+        file = ndjson(
+            *(
+                {"email": f"user{i}@example.com", "password": "password", "city": "A"}
+                for i in range(5)
+            )
+        )
+
+        report = srv.import_users(file, "ndjson", chunk_size=2)
+
+        self.assertEqual(report["received"], 5)
+        self.assertEqual(report["created"], 5)
+        self.assertEqual(self.emails()["user0@example.com"], "hashed:password")
+        self.assertEqual(mock_side_effects.submit.call_count, 3)
+
+    def test_reports_conflicts_and_errors(self, mock_side_effects):
+        file = ndjson(
+            {"email": "taken@example.com", "password": "password"},
+            {"email": "new@example.com", "hashed_password": HASH},
+            {"email": "new@example.com", "password": "password"},
+            {"email": "not-an-email", "password": "password"},
+            {"email": "other@example.com"},
+            {"email": "plain@example.com", "hashed_password": "plain"},
+        )
+
+        report = srv.import_users(file, "ndjson", with_side_effects=False)
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(self.emails()["new@example.com"], HASH)
+        self.assertEqual(
+            [(c["line"], c["reason"]) for c in report["conflicts"]],
+            [(3, "Duplicated in file"), (1, "Email already used")],
+        )
+        self.assertEqual([e["line"] for e in report["errors"]], [4, 5, 6])
+        mock_side_effects.submit.assert_not_called()
+
+    def test_imports_csv(self, mock_side_effects):
+        file = io.BytesIO(
+            b"email,password,username,birth_date,preferences\n"
+            b"a@example.com,password,a,2000-01-31,museums;parks\n"
+            b'b@example.com,password,,,"[""food""]"\n'
+        )
+
+        report = srv.import_users(file, "csv")
+
+        self.assertEqual(report["created"], 2)
+        with self.session() as db:
+            users = {u.email: u for u in db.query(models.User)}
+        self.assertEqual(users["a@example.com"].preferences, ["museums", "parks"])
+        self.assertEqual(users["b@example.com"].preferences, ["food"])
+        self.assertIsNone(users["b@example.com"].username)
+        created = mock_side_effects.submit.call_args.args[1]
+        self.assertEqual(
+            [user.email for _, user in created], ["a@example.com", "b@example.com"]
+        )
+
+    def test_hashes_off_the_shared_cpu_pool(self, _):
+        file = ndjson({"email": "a@example.com", "password": "password"})
+
+        with patch.object(srv.hash_pool, "map", wraps=srv.hash_pool.map) as mock_map:
+            srv.import_users(file, "ndjson")
+
+        mock_map.assert_called_once()
+
+    def test_database_error_reports_progress(self, _):
+        file = ndjson(
+            *(
+                {"email": f"user{i}@example.com", "password": "password"}
+                for i in range(5)
+            )
+        )
+        copy_users = user_crud.copy_users
+
+        def fail_second_chunk(db, rows):
+            if rows[0]["email"] == "user2@example.com":
+                raise SQLAlchemyError("connection lost")
+            return copy_users(db, rows)
+
+        with patch("app.db.user_crud.copy_users", fail_second_chunk):
+            with self.assertRaises(APIException) as context:
+                srv.import_users(file, "ndjson", chunk_size=2)
+
+        self.assertEqual(context.exception.code, DATABASE_ERROR)
+        self.assertIn(
+            "2 lines processed, 2 users created, 2 lines failed from line 3",
+            str(context.exception),
+        )
+
+    def test_import_format(self, _):
+        self.assertEqual(srv.import_format(None, "users.CSV"), "csv")
+        self.assertEqual(srv.import_format(None, "users.jsonl"), "ndjson")
+        with self.assertRaises(APIException):
+            srv.import_format("xml", "users.xml")
@@ -1,9 +1,13 @@
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from unittest.mock import Mock, call, patch
 
 import app
 from app.auth.authentication import *
 from app.auth.password import *
+from app.auth.recovery_store import MemoryStore
 from app.schemas.password import *
 from app.schemas.users import *
 from app.services.password_services import *
@@ -14,8 +18,6 @@ from app.utils.constants import *
 
 class TestPassword(unittest.TestCase):
 
-    @patch("app.auth.authentication.get_current_user")
-    @patch("app.db.user_crud.get_user")
     @patch("app.auth.password.verify_password")
     @patch("app.auth.password.get_password_hash")
     @patch("app.services.users_services.update_password")
@@ -24,29 +26,34 @@ class TestPassword(unittest.TestCase):
         mock_update_password,
         mock_get_password_hash,
         mock_verify_password,
-        mock_get_user,
-        mock_get_current_user,
     ):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid token"
-        )
-        current_password = "current-password"
-        new_password = "new-password"
+        db_user = Mock(id=1, hashed_password="hashed-current-password")
 
-        mock_get_current_user.return_value = 1
-        mock_get_user.return_value = Mock(
-            id=1, hashed_password="hashed-current-password"
-        )
         mock_verify_password.return_value = True
         mock_get_password_hash.return_value = "hashed-new-password"
         mock_update_password.return_value = Mock(id=1)
 
-        user = app.services.users_services.update_password(
-            mock_db, credentials, current_password, new_password
+        user_id = app.services.password_services.update_password(
+            mock_db, db_user, "current-password", "new-password"
         )
 
-        self.assertEqual(user.id, 1)
+        self.assertEqual(user_id, 1)
+        mock_update_password.assert_called_once_with(mock_db, 1, "hashed-new-password")
+
+    @patch("app.auth.password.verify_password")
+    def test_update_password_wrong_password(self, mock_verify_password):
+        mock_db = Mock(spec=Session)
+        db_user = Mock(id=1, hashed_password="hashed-current-password")
+
+        mock_verify_password.return_value = False
+
+        with self.assertRaises(APIException) as context:
+            app.services.password_services.update_password(
+                mock_db, db_user, "wrong-password", "new-password"
+            )
+
+        self.assertEqual(context.exception.code, WRONG_PASSWORD_ERROR)
 
     def test_update_password_invalid_user(self):
         mock_db = Mock(spec=Session)
@@ -68,75 +75,215 @@ class TestPassword(unittest.TestCase):
 
 class TestToken(unittest.TestCase):
 
-    @patch("app.auth.authentication.get_current_user")
-    @patch("app.db.user_crud.get_user")
-    @patch("app.services.users_services.create_session_tokens")
-    def test_refresh_user_tokens_success(
-        self, mock_create_session_tokens, mock_get_user, mock_get_current_user
-    ):
+    @patch("app.auth.authentication.decode_token")
+    @patch("app.db.session_crud.rotate_session")
+    def test_refresh_user_tokens_success(self, mock_rotate_session, mock_decode_token):
         mock_db = Mock(spec=Session)
         credentials = HTTPAuthorizationCredentials(
             scheme="Bearer", credentials="valid_refresh_token"
         )
-        mock_user = Mock(spec=User, refresh_token="valid_refresh_token")
-        mock_token = Mock(spec=Token)
 
-        mock_get_current_user.return_value = 1
-        mock_get_user.return_value = mock_user
-        mock_create_session_tokens.return_value = mock_token
+        mock_decode_token.return_value = {"sub": 1, "sid": "session", "typ": "refresh"}
+        mock_rotate_session.return_value = True
 
         token = app.services.users_services.refresh_user_tokens(mock_db, credentials)
 
-        self.assertEqual(token, mock_token)
+        self.assertEqual(token.token_type, "jwt")
+        self.assertNotEqual(token.refresh_token, "valid_refresh_token")
+        args = mock_rotate_session.call_args.args
+        self.assertEqual(args[1:3], ("session", 1))
+        self.assertEqual(args[3], hash_token("valid_refresh_token"))
+        self.assertEqual(args[4], hash_token(token.refresh_token))
 
-    @patch("app.auth.authentication.authorize_token")
-    def test_auth_user_success(self, mock_authorize_token):
+    def test_refresh_user_tokens_invalid_scheme(self):
+        mock_db = Mock(spec=Session)
         credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
+            scheme="Basic", credentials="invalid_refresh_token"
         )
-        mock_authorize_token.return_value = 1
 
-        result = app.services.users_services.auth_user(credentials)
+        with self.assertRaises(APIException) as context:
+            app.services.users_services.refresh_user_tokens(mock_db, credentials)
 
-        self.assertEqual(result, 1)
+        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
 
-    def test_auth_user_invalid_scheme(self):
+    @patch("app.auth.authentication.decode_token")
+    @patch("app.db.session_crud.rotate_session")
+    def test_refresh_user_tokens_invalid_refresh_token(
+        self, mock_rotate_session, mock_decode_token
+    ):
+        mock_db = Mock(spec=Session)
         credentials = HTTPAuthorizationCredentials(
-            scheme="Basic", credentials="invalid_token"
+            scheme="Bearer", credentials="invalid_refresh_token"
         )
+        mock_decode_token.return_value = {"sub": 1, "sid": "session", "typ": "refresh"}
+        mock_rotate_session.return_value = False
 
         with self.assertRaises(APIException) as context:
-            app.services.users_services.auth_user(credentials)
+            app.services.users_services.refresh_user_tokens(mock_db, credentials)
 
-        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
 
-    def test_refresh_user_tokens_invalid_scheme(self):
+    @patch("app.auth.authentication.decode_token")
+    @patch("app.db.session_crud.rotate_session")
+    def test_refresh_user_tokens_without_session(
+        self, mock_rotate_session, mock_decode_token
+    ):
         mock_db = Mock(spec=Session)
         credentials = HTTPAuthorizationCredentials(
-            scheme="Basic", credentials="invalid_refresh_token"
+            scheme="Bearer", credentials="access_token"
         )
+        mock_decode_token.return_value = {"sub": 1}
 
         with self.assertRaises(APIException) as context:
             app.services.users_services.refresh_user_tokens(mock_db, credentials)
 
-        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+        mock_rotate_session.assert_not_called()
+
+    @patch("app.services.users_services.REFRESH_TOKEN_MODE", "stateless")
+    @patch("app.auth.token_families._backend", None)
+    @patch("app.db.session_crud.delete_session")
+    @patch("app.db.session_crud.rotate_session")
+    @patch("app.db.session_crud.get_session")
+    def test_refresh_user_tokens_stateless(
+        self, mock_get_session, mock_rotate_session, mock_delete_session
+    ):
+        mock_db = Mock(spec=Session)
+        expires_at = datetime.now() + timedelta(days=1)
+        mock_get_session.return_value = Mock(user_id=1, expires_at=expires_at)
+        refresh_token, _ = app.services.users_services.new_refresh_token(
+            1, "session", 0, expires_at
+        )
 
-    @patch("app.auth.authentication.get_current_user")
-    @patch("app.db.user_crud.get_user")
-    def test_refresh_user_tokens_invalid_refresh_token(
-        self, mock_get_user, mock_get_current_user
+        first = app.services.users_services.refresh_user_tokens(
+            mock_db,
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=refresh_token),
+        )
+        second = app.services.users_services.refresh_user_tokens(
+            mock_db,
+            HTTPAuthorizationCredentials(
+                scheme="Bearer", credentials=first.refresh_token
+            ),
+        )
+
+        self.assertEqual(decode_token(second.refresh_token)["gen"], 2)
+        mock_rotate_session.assert_not_called()
+        mock_delete_session.assert_not_called()
+
+    @patch("app.services.users_services.REFRESH_TOKEN_MODE", "stateless")
+    @patch("app.auth.token_families._backend", None)
+    @patch("app.db.session_crud.delete_session")
+    @patch("app.db.session_crud.get_session")
+    def test_refresh_user_tokens_stateless_reuse(
+        self, mock_get_session, mock_delete_session
     ):
         mock_db = Mock(spec=Session)
+        expires_at = datetime.now() + timedelta(days=1)
+        mock_get_session.return_value = Mock(user_id=1, expires_at=expires_at)
+        refresh_token, _ = app.services.users_services.new_refresh_token(
+            1, "session", 0, expires_at
+        )
         credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="invalid_refresh_token"
+            scheme="Bearer", credentials=refresh_token
         )
-        mock_get_current_user.return_value = 1
-        mock_get_user.return_value = Mock(refresh_token="valid_refresh_token")
 
+        app.services.users_services.refresh_user_tokens(mock_db, credentials)
         with self.assertRaises(APIException) as context:
             app.services.users_services.refresh_user_tokens(mock_db, credentials)
 
         self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+        mock_delete_session.assert_called_once_with(mock_db, "session")
+
+    @patch("app.services.users_services.REFRESH_TOKEN_MODE", "stateless")
+    @patch("app.db.session_crud.get_session")
+    def test_refresh_user_tokens_stateless_revoked(self, mock_get_session):
+        mock_db = Mock(spec=Session)
+        mock_get_session.return_value = None
+        refresh_token, _ = app.services.users_services.new_refresh_token(1, "session")
+
+        with self.assertRaises(APIException) as context:
+            app.services.users_services.refresh_user_tokens(
+                mock_db,
+                HTTPAuthorizationCredentials(
+                    scheme="Bearer", credentials=refresh_token
+                ),
+            )
+
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+
+    @patch("app.auth.revocation.revoke")
+    @patch("app.db.session_crud.delete_session")
+    def test_logout_user(self, mock_delete_session, mock_revoke):
+        mock_db = Mock(spec=Session)
+        token = app.services.users_services.new_access_token(1, "session")
+        claims = verify_token(token)
+
+        app.services.users_services.logout_user(mock_db, claims)
+
+        jti = claims["jti"]
+        revoked = [call.args[:2] for call in mock_revoke.call_args_list]
+        self.assertEqual(revoked, [(mock_db, jti), (mock_db, "sid:session")])
+        mock_delete_session.assert_called_once_with(mock_db, "session")
+
+    def test_logged_out_session_tokens_are_rejected(self):
+        token = app.services.users_services.new_access_token(1, "session")
+        self.addCleanup(app.auth.revocation.denylist._revoked.clear)
+
+        app.auth.revocation.denylist.add(
+            "sid:session", datetime.now() + timedelta(minutes=5)
+        )
+
+        with self.assertRaises(APIException) as context:
+            verify_token(token)
+
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+
+    @patch("app.auth.revocation.is_revoked")
+    def test_revoked_access_token(self, mock_is_revoked):
+        token = app.services.users_services.new_access_token(1, "session")
+        mock_is_revoked.return_value = True
+
+        with self.assertRaises(APIException) as context:
+            authorize_token(token)
+
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+        mock_is_revoked.assert_called_once_with(decode_token(token)["jti"])
+
+    def test_refresh_token_is_not_a_bearer_token(self):
+        refresh_token, _ = app.services.users_services.new_refresh_token(1, "session")
+
+        with self.assertRaises(APIException) as context:
+            verify_token(refresh_token)
+
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+
+    @patch("app.db.session_crud.rotate_session")
+    def test_access_token_does_not_refresh(self, mock_rotate_session):
+        token = app.services.users_services.new_access_token(1, "session")
+
+        with self.assertRaises(APIException) as context:
+            app.services.users_services.refresh_user_tokens(
+                Mock(spec=Session),
+                HTTPAuthorizationCredentials(scheme="Bearer", credentials=token),
+            )
+
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
+        mock_rotate_session.assert_not_called()
+
+    @patch("app.db.session_crud.create_session")
+    def test_create_session_tokens(self, mock_create_session):
+        mock_db = Mock(spec=Session)
+        mock_user = Mock(spec=User, id=1)
+
+        token = app.services.users_services.create_session_tokens(
+            mock_db, mock_user, "Pixel 7"
+        )
+
+        args = mock_create_session.call_args.args
+        self.assertEqual(args[2], 1)
+        self.assertEqual(args[3], hash_token(token.refresh_token))
+        self.assertEqual(mock_create_session.call_args.kwargs["device"], "Pixel 7")
+        self.assertEqual(decode_token(token.refresh_token)["sid"], args[1])
 
 
 class TestRecoverPassword(unittest.TestCase):
@@ -226,6 +373,7 @@ class TestRecoverPassword(unittest.TestCase):
         self.assertEqual(result.user_id, mock_user.id)
         self.assertEqual(result.leftover_attempts, 5)
 
+    @patch("app.db.user_crud.update_user_pwd")
     @patch("app.db.user_crud.get_user_by_email")
     @patch("app.db.pwd_recover_crud.get_recover")
     @patch("app.db.pwd_recover_crud.delete_recover")
@@ -240,6 +388,7 @@ class TestRecoverPassword(unittest.TestCase):
         mock_delete_recover,
         mock_get_recover,
         mock_get_user_by_email,
+        mock_update_user_pwd,
     ):
         mock_db = Mock()
         mock_user = Mock()
@@ -254,7 +403,7 @@ class TestRecoverPassword(unittest.TestCase):
         mock_db_recover.emited_datetime = datetime.now() - timedelta(minutes=20)
         mock_db_recover.pin = "1234"
         mock_db_recover.leftover_attempts = 2
-        mock_get_recover.return_value = mock_db_recover
+        mock_update_recover_attempts.return_value = mock_db_recover
 
         mock_get_password_hash.return_value = "hashed_password"
 
@@ -287,10 +436,16 @@ class TestRecoverPassword(unittest.TestCase):
     @patch("app.db.user_crud.get_user_by_email")
     @patch("app.db.pwd_recover_crud.get_recover")
     @patch("app.db.pwd_recover_crud.delete_recover")
+    @patch("app.db.pwd_recover_crud.update_recover_attemps")
     def test_recover_password_recovery_not_initiated(
-        self, mock_delete_recover, mock_get_recover, mock_get_user_by_email
+        self,
+        mock_update_recover_attempts,
+        mock_delete_recover,
+        mock_get_recover,
+        mock_get_user_by_email,
     ):
         mock_db = Mock()
+        mock_update_recover_attempts.return_value = None
         mock_user = Mock()
         mock_user.id = 1
         mock_get_user_by_email.return_value = mock_user
@@ -325,7 +480,7 @@ class TestRecoverPassword(unittest.TestCase):
         mock_db_recover.emited_datetime = datetime.now() - timedelta(minutes=20)
         mock_db_recover.pin = "1234"
         mock_db_recover.leftover_attempts = 0
-        mock_get_recover.return_value = mock_db_recover
+        mock_update_recover_attempts.return_value = mock_db_recover
 
         mock_recover_data = UpdateRecoverPassword(
             email="username@example.com", code="12354", new_password="new_password"
@@ -335,3 +490,76 @@ class TestRecoverPassword(unittest.TestCase):
             app.services.password_services.recover_password(mock_db, mock_recover_data)
 
         self.assertEqual(context.exception.code, INVALID_RECOVERY_CODE_ERROR)
+        mock_delete_recover.assert_called_once_with(mock_db, 1)
+
+    @patch("app.services.password_services.RECOVERY_ATTEMPTS", 3)
+    @patch("app.services.password_services.send_email")
+    def test_concurrent_guesses_are_limited(self, mock_send_email):
+        guesses = 20
+        store = MemoryStore()
+        arrived = threading.Barrier(guesses)
+        compared = []
+
+        class Pin(str):
+            __hash__ = str.__hash__
+
+            def __eq__(self, other):
+                compared.append(other)
+                return str.__eq__(self, other)
+
+        def get_user_by_email(db, email):
+            # Every guess reaches the store at the same time
+            arrived.wait()
+            return Mock(id=1)
+
+        def guess(code: str):
+            try:
+                app.services.password_services.recover_password(
+                    None,
+                    UpdateRecoverPassword(
+                        email="username@example.com",
+                        code=code,
+                        new_password="new_password",
+                    ),
+                )
+            except APIException as e:
+                return e.code
+
+        with patch("app.services.password_services.get_store", return_value=store):
+            with patch("app.db.user_crud.get_user_by_email", return_value=Mock(id=1)):
+                init_recover_password(None, "username@example.com")
+            store._states[1].pin = Pin(store._states[1].pin)
+
+            with patch("app.db.user_crud.get_user_by_email", get_user_by_email):
+                with ThreadPoolExecutor(guesses) as pool:
+                    codes = list(pool.map(guess, [f"{i:06}x" for i in range(guesses)]))
+
+        self.assertEqual(len(compared), 3)
+        self.assertEqual(
+            codes.count(INVALID_RECOVERY_CODE_ERROR)
+            + codes.count(RECOVERY_NOT_INITIATED_ERROR),
+            guesses,
+        )
+
+    @patch("app.services.password_services.EXPIRE_MINUTES", 10)
+    @patch("app.db.user_crud.get_user_by_email")
+    @patch("app.db.pwd_recover_crud.delete_recover")
+    @patch("app.db.pwd_recover_crud.new_pwd_recover")
+    @patch("app.services.password_services.send_email")
+    def test_init_recover_password_sets_expiry(
+        self,
+        mock_send_email,
+        mock_new_pwd_recover,
+        mock_delete_recover,
+        mock_get_user_by_email,
+    ):
+        mock_get_user_by_email.return_value = Mock(id=1)
+
+        init_recover_password(Mock(), "username@example.com")
+
+        # The previous recovery is replaced inside new_pwd_recover
+        mock_delete_recover.assert_not_called()
+        recover = mock_new_pwd_recover.call_args[0][1]
+        self.assertEqual(
+            recover.expires_at - recover.emited_datetime, timedelta(minutes=10)
+        )
@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from google.api_core.exceptions import NotFound
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models, user_crud
+from app.db.database import Base
+from app.services import purge_services
+
+AVATAR_URL = "https://storage.googleapis.com/bucket/avatars/{}%20avatar.png"
+
+
+class TestPurgeDeletedUsers(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        for user_id in range(1, 6):
+            self.db.add(
+                models.User(
+                    id=user_id,
+                    email=f"user{user_id}@example.com",
+                    avatar_link=AVATAR_URL.format(user_id),
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    @patch("app.services.purge_services.USER_PURGE_BATCH_SIZE", 2)
+    @patch("app.ext.firebase.delete_image")
+    def test_purges_in_batches(self, mock_delete_image):
+        for user_id in (1, 2, 3):
+            user_crud.delete_user(self.db, user_id)
+
+        purged = purge_services.purge_deleted_users(
+            self.db, datetime.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(purged, 3)
+        mock_delete_image.assert_any_call("avatars", "1 avatar.png")
+        self.assertEqual(mock_delete_image.call_count, 3)
+        self.assertIsNone(self.db.get(models.User, 1))
+        self.assertIsNotNone(self.db.get(models.User, 4))
+
+    @patch("app.ext.firebase.delete_image")
+    def test_missing_avatar_does_not_block(self, mock_delete_image):
+        user_crud.delete_user(self.db, 1)
+        mock_delete_image.side_effect = NotFound("gone")
+
+        purged = purge_services.purge_deleted_users(
+            self.db, datetime.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(purged, 1)
+
+    @patch("app.ext.firebase.delete_image")
+    def test_storage_failure_retries_later(self, mock_delete_image):
+        user_crud.delete_user(self.db, 1)
+        mock_delete_image.side_effect = Exception("Storage unavailable")
+
+        purged = purge_services.purge_deleted_users(
+            self.db, datetime.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(purged, 0)
+        self.assertIsNotNone(self.db.get(models.User, 1))
+
+    @patch("app.services.purge_services.USER_PURGE_GRACE_SECONDS", 3600)
+    @patch("app.ext.firebase.delete_image")
+    def test_grace_period(self, mock_delete_image):
+        user_crud.delete_user(self.db, 1)
+
+        self.assertEqual(purge_services.purge_deleted_users(self.db), 0)
+
+
+class TestPurgeExpiredRecoveries(unittest.TestCase):
+
+    @patch("app.services.purge_services.RECOVERY_PURGE_BATCH_SIZE", 2)
+    @patch("app.db.pwd_recover_crud.delete_expired")
+    def test_purges_until_a_short_batch(self, mock_delete_expired):
+        mock_delete_expired.side_effect = [2, 2, 1]
+        now = datetime.now()
+
+        purged = purge_services.purge_expired_recoveries("db", now)
+
+        self.assertEqual(purged, 5)
+        mock_delete_expired.assert_called_with("db", now, 2)
+        self.assertEqual(mock_delete_expired.call_count, 3)
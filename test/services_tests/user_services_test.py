@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import Mock, patch
 
+from sqlalchemy.exc import IntegrityError
+
 import app
 from app.auth.authentication import *
 from app.auth.password import *
@@ -41,122 +43,150 @@ class TestGetUser(unittest.TestCase):
 
 class TestDeleteUser(unittest.TestCase):
 
-    @patch("app.auth.authentication.get_current_user")
+    @patch("app.auth.revocation.revoke_session")
+    @patch("app.auth.token_families.get_backend")
     @patch("app.db.user_crud.delete_user")
-    def test_delete_user(self, mock_delete_user, mock_get_current_user):
+    def test_delete_user(self, mock_delete_user, mock_get_backend, mock_revoke):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
-        )
 
-        mock_get_current_user.return_value = 1
-        mock_delete_user.return_value = User(id=1, username="username")
+        mock_delete_user.return_value = (User(id=1, username="username"), ["a"])
 
-        user = app.services.users_services.delete_user(mock_db, credentials)
+        user = app.services.users_services.delete_user(mock_db, 1)
 
         self.assertEqual(user.id, 1)
         self.assertEqual(user.username, "username")
+        mock_delete_user.assert_called_once_with(mock_db, 1)
+        mock_get_backend.return_value.forget.assert_called_once_with("a")
+        self.assertEqual(mock_revoke.call_args.args[:2], (mock_db, "a"))
 
-    @patch("app.auth.authentication.get_current_user")
+    @patch("app.db.revocation_crud.revoke_token")
+    @patch("app.auth.token_families.get_backend")
     @patch("app.db.user_crud.delete_user")
-    def test_delete_user_not_authenticated(
-        self, mock_delete_user, mock_get_current_user
+    def test_deleted_user_access_token_is_rejected(
+        self, mock_delete_user, mock_get_backend, mock_revoke_token
     ):
-        mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Basic", credentials="invalid_token"
-        )
+        self.addCleanup(app.auth.revocation.denylist._revoked.clear)
+        token = app.services.users_services.new_access_token(1, "a")
+        mock_delete_user.return_value = (User(id=1, username="username"), ["a"])
 
-        mock_get_current_user.return_value = None
+        app.services.users_services.delete_user(Mock(spec=Session), 1)
 
         with self.assertRaises(APIException) as context:
-            app.services.users_services.delete_user(mock_db, credentials)
+            verify_token(token)
 
-        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
+        self.assertEqual(context.exception.code, INVALID_CREDENTIALS_ERROR)
 
-    @patch("app.auth.authentication.get_current_user")
     @patch("app.db.user_crud.delete_user")
-    def test_delete_user_user_not_exists(self, mock_delete_user, mock_get_current_user):
+    def test_delete_user_user_not_exists(self, mock_delete_user):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
-        )
 
-        mock_get_current_user.return_value = 1
-        mock_delete_user.return_value = None
+        mock_delete_user.return_value = (None, [])
 
         with self.assertRaises(APIException) as context:
-            app.services.users_services.delete_user(mock_db, credentials)
+            app.services.users_services.delete_user(mock_db, 1)
 
         self.assertEqual(context.exception.code, USER_DOES_NOT_EXISTS_ERROR)
 
 
 class TestUpdateUser(unittest.TestCase):
 
-    @patch("app.auth.authentication.get_current_user")
-    @patch("app.db.user_crud.update_user")
+    @patch("app.db.user_crud.update_user_fields")
     @patch("app.services.users_services.update_recommendations")
     def test_update_user_success(
-        self, mock_update_recommendations, mock_update_user, mock_get_current_user
+        self, mock_update_recommendations, mock_update_user_fields
     ):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
-        )
         updated_user_data = UserBase(preferences=["Nigth club"], city="Buenos Aires")
-        mock_updated_user = Mock(spec=User)
-        mock_updated_user.preferences = [
-            "Museum",
-            "Cafe",
-        ]
-        mock_updated_user.city = "Buenos Aires"
-
-        mock_get_current_user.return_value = 1
-        mock_update_user.return_value = mock_updated_user
-
-        user = app.services.users_services.update_user(
-            mock_db, credentials, updated_user_data
+        mock_updated_user = User(
+            id=1, city="Buenos Aires", preferences=["Museum", "Cafe"]
         )
 
+        mock_update_user_fields.return_value = (mock_updated_user, ["preferences"])
+
+        user = app.services.users_services.update_user(mock_db, 1, updated_user_data)
+
         self.assertEqual(user.preferences, mock_updated_user.preferences)
         self.assertEqual(user.city, mock_updated_user.city)
+        self.assertEqual(user.changed_fields, ["preferences"])
+        mock_update_user_fields.assert_called_once_with(
+            mock_db, 1, {"preferences": ["Nigth club"], "city": "Buenos Aires"}
+        )
+        mock_update_recommendations.assert_called_once_with(
+            1, "Buenos Aires", ["Museum", "Cafe"]
+        )
 
-    def test_update_user_invalid_scheme(self):
+    @patch("app.db.user_crud.update_user_fields")
+    @patch("app.services.users_services.update_recommendations")
+    def test_update_user_only_sent_fields(
+        self, mock_update_recommendations, mock_update_user_fields
+    ):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Basic", credentials="invalid_token"
+        updated_user_data = UserBase(birth_date=None)
+
+        mock_update_user_fields.return_value = (User(id=1), ["birth_date"])
+
+        app.services.users_services.update_user(mock_db, 1, updated_user_data)
+
+        mock_update_user_fields.assert_called_once_with(
+            mock_db, 1, {"birth_date": None}
         )
-        updated_user_data = UserBase(preferences=["Cafe"], city="Buenos Aires")
+        mock_update_recommendations.assert_not_called()
+
+    @patch("app.db.user_crud.update_user_fields")
+    def test_update_user_cannot_clear_required_fields(self, mock_update_user_fields):
+        for field in ("email", "username", "preferences"):
+            with self.assertRaises(APIException) as context:
+                app.services.users_services.update_user(
+                    Mock(spec=Session), 1, UserBase(**{field: None})
+                )
+
+            self.assertEqual(context.exception.code, INVALID_UPDATE_REQUEST_ERROR)
+        mock_update_user_fields.assert_not_called()
+
+    @patch("app.db.user_crud.update_user_fields")
+    def test_update_user_email_taken(self, mock_update_user_fields):
+        mock_db = Mock(spec=Session)
+        mock_update_user_fields.side_effect = IntegrityError("UPDATE", {}, None)
 
         with self.assertRaises(APIException) as context:
             app.services.users_services.update_user(
-                mock_db, credentials, updated_user_data
+                mock_db, 1, UserBase(email="taken@example.com")
             )
 
-        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
+        self.assertEqual(context.exception.code, USER_EXISTS_ERROR)
+        mock_db.rollback.assert_called_once()
 
-    @patch("app.auth.authentication.get_current_user")
-    @patch("app.db.user_crud.update_user")
-    def test_update_user_user_not_exists(self, mock_update_user, mock_get_current_user):
+    @patch("app.db.user_crud.update_user_fields")
+    @patch("app.services.users_services.update_recommendations")
+    def test_update_user_unchanged(
+        self, mock_update_recommendations, mock_update_user_fields
+    ):
+        mock_db = Mock(spec=Session)
+        updated_user_data = UserBase(city="Buenos Aires")
+
+        mock_update_user_fields.return_value = (User(id=1, city="Buenos Aires"), [])
+
+        user = app.services.users_services.update_user(mock_db, 1, updated_user_data)
+
+        self.assertEqual(user.changed_fields, [])
+        mock_update_recommendations.assert_not_called()
+
+    @patch("app.db.user_crud.update_user_fields")
+    def test_update_user_user_not_exists(self, mock_update_user_fields):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
-        )
         updated_user_data = UserBase(preferences=["Aquarium"], city="Buenos Aires")
 
-        mock_get_current_user.return_value = 1
-        mock_update_user.return_value = None
+        mock_update_user_fields.return_value = (None, [])
 
         with self.assertRaises(APIException) as context:
-            app.services.users_services.update_user(
-                mock_db, credentials, updated_user_data
-            )
+            app.services.users_services.update_user(mock_db, 1, updated_user_data)
 
         self.assertEqual(context.exception.code, USER_DOES_NOT_EXISTS_ERROR)
 
 
 class TestNewUser(unittest.TestCase):
 
+    @patch("app.db.user_crud.update_user_fcm_token")
     @patch("app.db.user_crud.get_user_by_email")
     @patch("app.db.user_crud.create_user")
     @patch("app.services.users_services.update_recommendations")
@@ -167,6 +197,7 @@ class TestNewUser(unittest.TestCase):
         mock_update_recommendations,
         mock_create_user,
         mock_get_user_by_email,
+        mock_update_user_fcm_token,
     ):
         mock_db = Mock(spec=Session)
         user_data = {
@@ -321,61 +352,37 @@ class TestGetUserPreferences(unittest.TestCase):
 
 class TestUpdateAvatar(unittest.TestCase):
 
-    @patch("app.services.users_services.auth.get_current_user")
     @patch("app.ext.firebase.upload_image")
     @patch("app.db.user_crud.update_user")
-    def test_update_avatar_success(
-        self, mock_update_user, mock_upload_image, mock_get_current_user
-    ):
+    def test_update_avatar_success(self, mock_update_user, mock_upload_image):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="valid_token"
-        )
         avatar = Mock(spec=UploadFile)
         avatar.content_type = "image/png"
         avatar.filename = "avatar.png"
         avatar.file = Mock()
 
-        mock_get_current_user.return_value = 1
         mock_upload_image.return_value = "http://image.url/avatar.png"
         mock_update_user.return_value = Mock(spec=User)
 
-        result = app.services.users_services.update_avatar(mock_db, credentials, avatar)
+        result = app.services.users_services.update_avatar(mock_db, 1, avatar)
 
         self.assertIsInstance(result, User)
-
-    @patch("app.services.users_services.auth.get_current_user")
-    def test_update_avatar_invalid_scheme(self, mock_get_current_user):
-        mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Basic", credentials="valid_token"
+        self.assertEqual(
+            mock_update_user.call_args.args[2].avatar_link,
+            "http://image.url/avatar.png",
         )
-        avatar = Mock(spec=UploadFile)
-
-        with self.assertRaises(APIException) as context:
-            app.services.users_services.update_avatar(mock_db, credentials, avatar)
-
-        self.assertEqual(context.exception.code, INVALID_HEADER_ERROR)
 
-    @patch("app.services.users_services.auth.get_current_user")
     @patch("app.ext.firebase.upload_image")
-    def test_update_avatar_get_current_user_failure(
-        self, mock_upload_image, mock_get_current_user
-    ):
+    def test_update_avatar_upload_failure(self, mock_upload_image):
         mock_db = Mock(spec=Session)
-        credentials = HTTPAuthorizationCredentials(
-            scheme="Bearer", credentials="invalid_token"
-        )
         avatar = Mock(spec=UploadFile)
 
-        mock_get_current_user.side_effect = APIException(
-            code=USER_DOES_NOT_EXISTS_ERROR, msg="USER_DOES_NOT_EXISTS_ERROR"
-        )
+        mock_upload_image.side_effect = Exception("Storage unavailable")
 
         with self.assertRaises(APIException) as context:
-            app.services.users_services.update_avatar(mock_db, credentials, avatar)
+            app.services.users_services.update_avatar(mock_db, 1, avatar)
 
-        self.assertEqual(context.exception.code, USER_DOES_NOT_EXISTS_ERROR)
+        self.assertEqual(context.exception.code, UNKNOWN_ERROR)
 
 
 class TestFcmToken(unittest.TestCase):
@@ -429,3 +436,24 @@ class TestFcmToken(unittest.TestCase):
             app.services.users_services.update_fcm_token(mock_db, user_id, token)
 
         self.assertEqual(context.exception.code, USER_DOES_NOT_EXISTS_ERROR)
+
+
+class TestDownstream(unittest.TestCase):
+
+    @patch("app.ext.downstream.attractions.request")
+    def test_update_recommendations_downstream_failure(self, mock_request):
+        mock_request.side_effect = DownstreamError("attractions timed out")
+
+        app.services.users_services.update_recommendations(1, "Rosario", ["Cafe"])
+
+        mock_request.assert_called_once()
+
+    @patch("app.ext.downstream.chatbot.request")
+    def test_create_assistant(self, mock_request):
+        mock_request.return_value = Mock(status_code=201)
+
+        app.services.users_services.create_assistant(1)
+
+        mock_request.assert_called_once_with(
+            "POST", "/chatbot/create", params={"user_id": 1}
+        )
@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from app.services import warmup_services
+
+
+class TestWarmUp(unittest.TestCase):
+
+    @patch("app.services.warmup_services.engine")
+    def test_database_holds_connections_together(self, mock_engine):
+        calls = []
+        mock_engine.connect.side_effect = lambda: Mock(
+            execute=lambda _: calls.append("execute"),
+            close=lambda: calls.append("close"),
+        )
+
+        warmup_services.warm_database(3)
+
+        self.assertEqual(calls, ["execute"] * 3 + ["close"] * 3)
+
+    @patch("app.services.warmup_services.downstream")
+    def test_downstream_errors_are_not_fatal(self, mock_downstream):
+        mock_downstream.attractions = Mock(base_url="http://attractions")
+        mock_downstream.attractions.session.head.side_effect = ConnectionError()
+        mock_downstream.chatbot = Mock(base_url="")
+
+        warmup_services.warm_downstream()
+
+        mock_downstream.attractions.session.head.assert_called_once()
+        mock_downstream.chatbot.session.head.assert_not_called()
+        mock_downstream.attractions.breaker.record_failure.assert_not_called()
+
+    @patch("app.services.warmup_services.RATE_LIMIT_BACKEND", "memory")
+    @patch("app.services.warmup_services.REFRESH_GENERATION_BACKEND", "memory")
+    def test_redis_skipped_when_unused(self):
+        with patch("app.ext.redis.get_client") as mock_client:
+            warmup_services.warm_redis()
+
+        mock_client.assert_not_called()
+
+    @patch("app.services.warmup_services.serializer_for")
+    def test_serializers(self, mock_serializer_for):
+        routes = [Mock(response_model=int), Mock(response_model=None), object()]
+
+        warmup_services.warm_serializers(routes)
+
+        mock_serializer_for.assert_called_once_with(int)
+
+    @patch("app.services.warmup_services.warm_serializers")
+    @patch("app.services.warmup_services.warm_crypto")
+    @patch("app.services.warmup_services.warm_redis")
+    @patch("app.services.warmup_services.warm_storage")
+    @patch("app.services.warmup_services.warm_downstream")
+    @patch("app.services.warmup_services.warm_database")
+    def test_failed_step_does_not_stop_the_rest(self, mock_database, *steps):
+        mock_database.side_effect = Exception("database down")
+
+        warmup_services.warm_up([])
+
+        for step in steps:
+            step.assert_called_once()
+        self.assertTrue(warmup_services.warmed_up)
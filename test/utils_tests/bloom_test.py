@@ -0,0 +1,24 @@
+import unittest
+
+from app.utils.bloom import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"key-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertEqual(len(bloom), 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"key-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+
+        self.assertLess(false_positives, 300)
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import weakref
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from app.utils import executors
+from app.utils.executors import InstrumentedExecutor
+
+
+def sample(name: str, executor: str) -> float:
+    return REGISTRY.get_sample_value(name, {"executor": executor})
+
+
+class TestInstrumentedExecutor:
+
+    def test_run_uses_worker_thread(self):
+        pool = InstrumentedExecutor("test-run", 1)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        assert name.startswith("test-run")
+        assert sample("executor_workers", "test-run") == 1
+        assert sample("executor_active", "test-run") == 0
+        assert sample("executor_queued", "test-run") == 0
+        assert sample("executor_wait_seconds_count", "test-run") == 1
+        pool.shutdown()
+
+    def test_nested_run_is_inline(self):
+        pool = InstrumentedExecutor("test-nested", 1)
+
+        result = pool.run(lambda: pool.run(lambda: 42))
+
+        assert result == 42
+        pool.shutdown()
+
+    def test_exception_propagates(self):
+        pool = InstrumentedExecutor("test-error", 1)
+
+        def fail():
+            raise ValueError("boom")
+
+        try:
+            pool.run(fail)
+            assert False
+        except ValueError:
+            pass
+        assert sample("executor_active", "test-error") == 0
+        pool.shutdown()
+
+    def test_run_async(self):
+        pool = InstrumentedExecutor("test-async", 2)
+
+        result = asyncio.run(pool.run_async(lambda x, y: x + y, 1, y=2))
+
+        assert result == 3
+        pool.shutdown()
+
+    @patch.object(executors, "_executors", weakref.WeakSet())
+    def test_shutdown_stops_every_pool(self):
+        # Created outside app.utils.executors, like the import pools
+        pool = InstrumentedExecutor("test-shutdown", 1)
+        started = threading.Event()
+        release = threading.Event()
+        pool.submit(lambda: started.set() or release.wait(1))
+        queued = pool.submit(lambda: None)
+        started.wait(1)
+
+        executors.shutdown()
+        release.set()
+
+        assert queued.cancelled()
+        try:
+            pool.submit(lambda: None)
+            assert False
+        except RuntimeError:
+            pass
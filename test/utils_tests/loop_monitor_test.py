@@ -0,0 +1,63 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from app.utils.loop_monitor import LoopMonitor
+
+
+def blocking_handler():
+    time.sleep(0.2)
+
+
+class TestLoopMonitor:
+
+    @patch("app.utils.loop_monitor.Logger")
+    def test_reports_blocking_route_and_stack(self, mock_logger):
+        monitor = LoopMonitor(threshold=0.05, interval=0.01, sample_rate=1.0)
+
+        async def request():
+            monitor.track({"type": "http", "method": "POST", "path": "/users/avatar"})
+            blocking_handler()
+
+        async def run():
+            monitor.start(debug=False)
+            await asyncio.sleep(0.03)
+            await asyncio.create_task(request())
+            await asyncio.sleep(0.03)
+            monitor.stop()
+
+        asyncio.run(run())
+
+        mock_logger.return_value.warn.assert_called_once()
+        message = mock_logger.return_value.warn.call_args[0][0]
+        assert "POST /users/avatar" in message
+        assert "blocking_handler" in message
+
+    @patch("app.utils.loop_monitor.Logger")
+    def test_quiet_when_loop_is_free(self, mock_logger):
+        monitor = LoopMonitor(threshold=0.05, interval=0.01, sample_rate=1.0)
+
+        async def run():
+            monitor.start(debug=False)
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+            monitor.stop()
+
+        asyncio.run(run())
+
+        mock_logger.return_value.warn.assert_not_called()
+
+    @patch("app.utils.loop_monitor.Logger")
+    def test_sampling_skips_stack(self, mock_logger):
+        monitor = LoopMonitor(threshold=0.05, interval=0.01, sample_rate=0.0)
+
+        async def run():
+            monitor.start(debug=False)
+            await asyncio.sleep(0.03)
+            time.sleep(0.2)
+            await asyncio.sleep(0.03)
+            monitor.stop()
+
+        asyncio.run(run())
+
+        mock_logger.return_value.warn.assert_not_called()
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middlewares.profiler import ProfilerMiddleware
+from app.utils import profiler
+
+SECRET = "profiler-secret"
+
+
+def busy_handler():
+    end = time.perf_counter() + 0.1
+    while time.perf_counter() < end:
+        pass
+    profiler.record_call("attractions", "PUT", "/update_recommendations", 0.01)
+    return {"ok": True}
+
+
+def make_client(directory: str) -> TestClient:
+    app = FastAPI()
+    with patch("app.utils.profiler.PROFILER_ENABLED", True):
+        app.get("/users/slow")(profiler.bound(busy_handler))
+    app.add_middleware(ProfilerMiddleware, directory=directory)
+    return TestClient(app)
+
+
+class TestProfiler:
+
+    def test_valid_signature(self):
+        header = profiler.sign(int(time.time()) + 60, SECRET)
+
+        assert profiler.valid_signature(header, SECRET)
+        assert not profiler.valid_signature(header, "other")
+        assert not profiler.valid_signature(header + "0", SECRET)
+
+    def test_expired_signature(self):
+        header = profiler.sign(int(time.time()) - 1, SECRET)
+
+        assert not profiler.valid_signature(header, SECRET)
+
+    def test_no_secret_disables_header(self):
+        assert not profiler.valid_signature(profiler.sign(2**40, SECRET), None)
+
+    @patch("app.utils.profiler.PROFILER_SAMPLE_RATE", 0.0)
+    def test_unprofiled_request(self, tmp_path):
+        client = make_client(str(tmp_path))
+
+        response = client.get("/users/slow")
+
+        assert response.status_code == 200
+        assert "x-profile" not in response.headers
+        assert os.listdir(tmp_path) == []
+
+    @patch("app.utils.profiler.PROFILER_SECRET", SECRET)
+    def test_signed_request_writes_profile(self, tmp_path):
+        client = make_client(str(tmp_path))
+        header = profiler.sign(int(time.time()) + 60, SECRET)
+
+        response = client.get(
+            "/users/slow",
+            headers={"X-Debug-Profile": header, "X-Request-Id": "abc123"},
+        )
+
+        assert response.status_code == 200
+        name = response.headers["x-profile"]
+        assert name.endswith("GET_users_slow-abc123")
+        base = tmp_path / name
+        assert "busy_handler" in (base.parent / f"{name}.wall.folded").read_text()
+        summary = json.loads((base.parent / f"{name}.json").read_text())
+        assert summary["route"] == "GET /users/slow"
+        assert summary["calls"][0]["service"] == "attractions"
+
+    @patch("app.utils.profiler.PROFILER_SECRET", SECRET)
+    def test_hostile_request_id_stays_in_the_directory(self, tmp_path):
+        directory = tmp_path / "profiles"
+        directory.mkdir()
+        client = make_client(str(directory))
+        header = profiler.sign(int(time.time()) + 60, SECRET)
+
+        response = client.get(
+            "/users/slow",
+            headers={
+                "X-Debug-Profile": header,
+                "X-Request-Id": "../../etc/" + "x" * 200,
+            },
+        )
+
+        assert response.status_code == 200
+        name = response.headers["x-profile"]
+        assert "/" not in name and ".." not in name
+        assert name.endswith("GET_users_slow-etc_" + "x" * 60)
+        assert f"{name}.json" in os.listdir(directory)
+        assert os.listdir(tmp_path) == ["profiles"]
@@ -0,0 +1,118 @@
+import unittest
+import uuid
+from unittest.mock import patch
+
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app.main import app as routers
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryBackend, parse_limit, retry_after
+
+client = TestClient(routers)
+
+
+class TestSlidingWindow(unittest.TestCase):
+
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit("5/60"), (5, 60))
+
+    def test_allows_up_to_limit(self):
+        backend = MemoryBackend()
+
+        waits = [backend.hit("key", 3, 60) for _ in range(3)]
+
+        self.assertEqual(waits, [0, 0, 0])
+        self.assertGreater(backend.hit("key", 3, 60), 0)
+
+    def test_keys_are_independent(self):
+        backend = MemoryBackend()
+        backend.hit("a", 1, 60)
+
+        self.assertEqual(backend.hit("b", 1, 60), 0)
+
+    def test_previous_window_weighs_in(self):
+        self.assertEqual(retry_after(2, 4, 30, 3, 60), 15)
+        self.assertEqual(retry_after(2, 4, 59, 3, 60), 0)
+
+    def test_retry_after_until_window_end(self):
+        self.assertEqual(retry_after(5, 0, 20, 3, 60), 40)
+
+
+class TestRateLimitedRoutes(unittest.TestCase):
+
+    @patch("app.utils.rate_limit.login_rate_limit.per_email", (2, 60))
+    @patch("app.routes.auth_router.srv.new_login")
+    def test_login_limited_per_email(self, mock_new_login):
+        mock_new_login.return_value = {
+            "token": "access_token",
+            "refresh_token": "refresh_token",
+            "token_type": "bearer",
+        }
+        body = {"email": f"{uuid.uuid4().hex}@example.com", "password": "password"}
+
+        statuses = [client.post("/users/login", json=body) for _ in range(3)]
+
+        self.assertEqual([r.status_code for r in statuses], [200, 200, 429])
+        self.assertIn("Retry-After", statuses[-1].headers)
+        self.assertEqual(mock_new_login.call_count, 2)
+
+    @patch("app.utils.rate_limit.recover_rate_limit.per_email", (1, 900))
+    @patch("app.routes.password_router.srv.init_recover_password")
+    def test_recover_limited_before_service(self, mock_init_recover_password):
+        body = {"email": f"{uuid.uuid4().hex}@example.com"}
+        client.post("/users/password/recover", json=body)
+        mock_init_recover_password.reset_mock()
+
+        response = client.post("/users/password/recover", json=body)
+
+        self.assertEqual(response.status_code, 429)
+        mock_init_recover_password.assert_not_called()
+
+    @patch("app.utils.rate_limit.RATE_LIMIT_ENABLED", False)
+    @patch("app.utils.rate_limit.login_rate_limit.per_email", (0, 60))
+    @patch("app.routes.auth_router.srv.new_login")
+    def test_disabled(self, mock_new_login):
+        mock_new_login.return_value = {
+            "token": "access_token",
+            "refresh_token": "refresh_token",
+            "token_type": "bearer",
+        }
+        body = {"email": f"{uuid.uuid4().hex}@example.com", "password": "password"}
+
+        self.assertEqual(client.post("/users/login", json=body).status_code, 200)
+
+
+class TestClientIp(unittest.TestCase):
+
+    def request(self, peer: str, forwarded: str | None = None) -> Request:
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+    def test_untrusted_peer_is_the_client(self):
+        with patch.object(rate_limit, "trusted_proxies", []):
+            ip = rate_limit._client_ip(self.request("10.0.0.5", "1.2.3.4"))
+
+        self.assertEqual(ip, "10.0.0.5")
+
+    def test_forwarded_for_from_trusted_proxy(self):
+        proxies = rate_limit.parse_proxies("10.0.0.0/16")
+        with patch.object(rate_limit, "trusted_proxies", proxies):
+            ip = rate_limit._client_ip(
+                self.request("10.0.0.5", "6.6.6.6, 1.2.3.4, 10.0.1.1")
+            )
+
+        self.assertEqual(ip, "1.2.3.4")
+
+    @patch("app.utils.rate_limit.RATE_LIMIT_PER_IP", False)
+    @patch("app.utils.rate_limit.login_rate_limit.per_ip", (0, 60))
+    @patch("app.routes.auth_router.srv.new_login")
+    def test_per_ip_off_without_proxies(self, mock_new_login):
+        mock_new_login.return_value = {
+            "token": "access_token",
+            "refresh_token": "refresh_token",
+            "token_type": "bearer",
+        }
+        body = {"email": f"{uuid.uuid4().hex}@example.com", "password": "password"}
+
+        self.assertEqual(client.post("/users/login", json=body).status_code, 200)
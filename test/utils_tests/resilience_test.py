@@ -0,0 +1,176 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from app.utils import metrics
+from app.utils.resilience import (
+    Bulkhead,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    DownstreamClient,
+    DownstreamError,
+)
+
+
+def state_metric(name: str) -> float:
+    return metrics.CIRCUIT_STATE.labels(name)._value.get()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    @patch("app.utils.resilience.time.monotonic")
+    def test_opens_after_consecutive_failures(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        breaker = CircuitBreaker("test-open", failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(state_metric("test-open"), CircuitBreaker.OPEN)
+
+    @patch("app.utils.resilience.time.monotonic")
+    def test_success_resets_failures(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        breaker = CircuitBreaker("test-reset", failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @patch("app.utils.resilience.time.monotonic")
+    def test_half_open_probe_closes(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        breaker = CircuitBreaker("test-probe", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 11
+        self.assertTrue(breaker.allow())
+        # Only one probe at a time while half-open
+        self.assertFalse(breaker.allow())
+        self.assertEqual(state_metric("test-probe"), CircuitBreaker.HALF_OPEN)
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    @patch("app.utils.resilience.time.monotonic")
+    def test_half_open_probe_failure_reopens(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        breaker = CircuitBreaker("test-reopen", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 11
+        breaker.allow()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        mock_monotonic.return_value = 15
+        self.assertFalse(breaker.allow())
+
+
+class TestBulkhead(unittest.TestCase):
+
+    def test_rejects_when_full(self):
+        bulkhead = Bulkhead("test-bulkhead", max_concurrent=1)
+
+        with bulkhead.acquire():
+            with self.assertRaises(BulkheadFullError):
+                with bulkhead.acquire():
+                    pass
+
+        with bulkhead.acquire():
+            pass
+
+    def test_waits_for_a_slot(self):
+        bulkhead = Bulkhead("test-bulkhead-wait", max_concurrent=1, max_wait=1.0)
+        released = threading.Event()
+
+        def hold():
+            with bulkhead.acquire():
+                released.wait(0.05)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        with bulkhead.acquire():
+            pass
+        holder.join()
+
+
+class TestDownstreamClient(unittest.TestCase):
+
+    def client(self, name: str) -> DownstreamClient:
+        return DownstreamClient(
+            name,
+            "http://downstream/",
+            connect_timeout=0.5,
+            read_timeout=1.0,
+            breaker=CircuitBreaker(name, failure_threshold=2, reset_timeout=30),
+            bulkhead=Bulkhead(name, max_concurrent=2),
+        )
+
+    def test_request_uses_timeouts(self):
+        client = self.client("test-client-ok")
+        client.session.request = Mock(return_value=Mock(status_code=200))
+
+        response = client.request("PUT", "/update", json={"a": 1})
+
+        self.assertEqual(response.status_code, 200)
+        client.session.request.assert_called_once_with(
+            "PUT", "http://downstream/update", timeout=(0.5, 1.0), json={"a": 1}
+        )
+
+    def test_failures_open_the_circuit(self):
+        client = self.client("test-client-timeout")
+        client.session.request = Mock(side_effect=requests.Timeout())
+
+        for _ in range(2):
+            with self.assertRaises(DownstreamError):
+                client.request("GET", "/")
+        with self.assertRaises(CircuitOpenError):
+            client.request("GET", "/")
+
+        self.assertEqual(client.session.request.call_count, 2)
+
+    def test_server_errors_count_as_failures(self):
+        client = self.client("test-client-5xx")
+        client.session.request = Mock(return_value=Mock(status_code=503))
+
+        client.request("GET", "/")
+        client.request("GET", "/")
+
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    @patch("app.utils.resilience.time.monotonic")
+    def test_half_open_probe_survives_full_bulkhead(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        client = self.client("test-client-half-open")
+        client.session.request = Mock(return_value=Mock(status_code=200))
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+
+        mock_monotonic.return_value = 31
+        with client.bulkhead.acquire(), client.bulkhead.acquire():
+            with self.assertRaises(BulkheadFullError):
+                client.request("GET", "/")
+
+        # The rejected probe gave its slot back, the next one gets through
+        self.assertEqual(client.request("GET", "/").status_code, 200)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_unexpected_errors_count_as_failures(self):
+        client = self.client("test-client-unexpected")
+        client.session.request = Mock(side_effect=ValueError("bad url"))
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                client.request("GET", "/")
+
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
@@ -0,0 +1,80 @@
+import json
+import unittest
+from datetime import date
+from types import SimpleNamespace
+
+from fastapi.responses import Response
+
+from app.schemas.chat import Chat
+from app.schemas.token import Token
+from app.schemas.users import User
+from app.utils.responses import fast_endpoint, serializer_for
+
+
+def db_user():
+    return SimpleNamespace(
+        id=1,
+        username="username",
+        email="username@example.com",
+        birth_date=date(1999, 10, 31),
+        city="CABA",
+        preferences=["Cafe"],
+        avatar_link=None,
+        hashed_password="hashed",
+    )
+
+
+class TestSerializers(unittest.TestCase):
+
+    def test_orm_object_matches_validated_output(self):
+        expected = User.model_validate(db_user()).model_dump(mode="json")
+
+        content = json.loads(serializer_for(User)(db_user()))
+
+        self.assertEqual(content, expected)
+        self.assertNotIn("hashed_password", content)
+
+    def test_model_instance(self):
+        chat = Chat(user_id=1, thread_id="thread_id", assistant_id="assistant_id")
+
+        content = json.loads(serializer_for(Chat)(chat))
+
+        self.assertEqual(content, chat.model_dump())
+
+    def test_dict_is_validated(self):
+        data = {"token": "token", "refresh_token": "refresh", "token_type": "jwt"}
+
+        content = json.loads(serializer_for(Token)(data))
+
+        self.assertEqual(content, data)
+
+    def test_generic_response_model(self):
+        self.assertEqual(
+            serializer_for(list[str])(["Cafe", "Museum"]), b'["Cafe","Museum"]'
+        )
+
+    def test_without_response_model(self):
+        self.assertEqual(
+            json.loads(serializer_for(None)({"user_id": 1})), {"user_id": 1}
+        )
+
+    def test_serializers_are_cached(self):
+        self.assertIs(serializer_for(User), serializer_for(User))
+
+
+class TestFastEndpoint(unittest.TestCase):
+
+    def test_wraps_result_in_response(self):
+        endpoint = fast_endpoint(lambda id: db_user(), User, 201)
+
+        response = endpoint(id=1)
+
+        self.assertIsInstance(response, Response)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.body)["username"], "username")
+
+    def test_keeps_responses_untouched(self):
+        original = Response(status_code=204)
+        endpoint = fast_endpoint(lambda: original, User, 200)
+
+        self.assertIs(endpoint(), original)
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from app.utils.sampler import NO_ROUTE, Sampler
+
+
+def get_user(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def parked(stop: threading.Event):
+    stop.wait()
+
+
+def run_in_thread(target) -> threading.Event:
+    stop = threading.Event()
+    threading.Thread(target=target, args=(stop,), daemon=True).start()
+    time.sleep(0.02)
+    return stop
+
+
+def make_sampler(**kwargs) -> Sampler:
+    sampler = Sampler(hz=100, **kwargs)
+    sampler.set_routes(
+        [SimpleNamespace(endpoint=get_user, path="/users/{id}", methods={"GET"})]
+    )
+    return sampler
+
+
+class TestSampler:
+
+    def test_attributes_stacks_to_route(self):
+        sampler = make_sampler()
+        stop = run_in_thread(get_user)
+
+        sampler.sample()
+        stop.set()
+
+        lines = sampler.collapsed().splitlines()
+        assert any(
+            line.startswith("GET /users/{id};") and "sampler_test.py:get_user" in line
+            for line in lines
+        )
+
+    def test_skips_idle_threads(self):
+        sampler = make_sampler()
+        stop = run_in_thread(parked)
+
+        sampler.sample()
+        stop.set()
+
+        assert "sampler_test.py:parked" not in sampler.collapsed()
+
+    def test_unknown_route(self):
+        sampler = make_sampler()
+        sampler.set_routes([])
+        stop = run_in_thread(get_user)
+
+        sampler.sample()
+        stop.set()
+
+        assert f"{NO_ROUTE};" in sampler.collapsed()
+
+    def test_rotate_writes_window(self, tmp_path):
+        sampler = make_sampler(directory=str(tmp_path))
+        stop = run_in_thread(get_user)
+        sampler.sample()
+        stop.set()
+
+        sampler.rotate()
+
+        files = os.listdir(tmp_path)
+        assert len(files) == 1 and files[0].endswith(".folded")
+        assert "get_user" in (tmp_path / files[0]).read_text()
+        assert sampler.collapsed() == ""
+
+    def test_background_thread(self):
+        sampler = make_sampler()
+        stop = run_in_thread(get_user)
+
+        sampler.start(
+            [SimpleNamespace(endpoint=get_user, path="/users/{id}", methods={"GET"})]
+        )
+        time.sleep(0.1)
+        sampler.stop()
+        stop.set()
+
+        assert not sampler.running
@@ -0,0 +1,65 @@
+import re
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middlewares.server_timing import ServerTimingMiddleware
+from app.utils import server_timing, tracing
+
+
+def durations(header: str) -> dict[str, float]:
+    return {
+        name: float(value)
+        for name, value in re.findall(r"([\w-]+);dur=([\d.]+)", header)
+    }
+
+
+def query():
+    time.sleep(0.02)
+
+
+def nested_query():
+    query_step()
+    query_step()
+
+
+with patch("app.utils.server_timing.SERVER_TIMING_ENABLED", True):
+    query_step = tracing.traced("db")(query)
+    traced_nested_query = tracing.traced("db")(nested_query)
+
+
+class TestServerTiming:
+
+    def test_header(self):
+        app = FastAPI()
+
+        @app.get("/users/{id}")
+        def get_user(id: int):
+            query_step()
+            return {"id": id}
+
+        app.add_middleware(ServerTimingMiddleware)
+
+        response = TestClient(app).get("/users/1")
+
+        phases = durations(response.headers["server-timing"])
+        assert phases["db"] >= 20
+        assert phases["total"] >= phases["db"]
+
+    def test_nested_phase_counted_once(self):
+        timings = server_timing.Timings()
+        token = server_timing.activate(timings)
+        try:
+            traced_nested_query()
+        finally:
+            server_timing.deactivate(token)
+
+        assert 0.04 <= timings.durations["db"] < 0.06
+
+    def test_no_timings_outside_a_request(self):
+        with server_timing.timed("db"):
+            pass
+
+        assert server_timing.current() is None
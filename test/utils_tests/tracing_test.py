@@ -0,0 +1,116 @@
+import json
+from unittest.mock import Mock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middlewares.tracing import TracingMiddleware
+from app.utils import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def lookup(user_id):
+    return {"id": user_id}
+
+
+def traced_lookup():
+    with patch("app.utils.tracing.TRACING_ENABLED", True):
+        return tracing.traced("db")(lookup)
+
+
+class TestTracing:
+
+    def setup_method(self):
+        tracing.spans.clear()
+
+    def test_parse_traceparent(self):
+        assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+            TRACE_ID,
+            PARENT_ID,
+            True,
+        )
+        assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+        assert tracing.parse_traceparent("garbage") is None
+        assert tracing.parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+
+    def test_traced_is_a_no_op_when_disabled(self):
+        assert tracing.traced("db")(lookup) is lookup
+
+    def test_child_spans_and_errors(self):
+        fn = traced_lookup()
+        root = tracing.start_trace("GET /users/{id}", f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        try:
+            with tracing.activate(root):
+                fn(1)
+                with tracing.span("boom", "internal"):
+                    raise ValueError("bad")
+        except ValueError:
+            pass
+
+        child, failed, server = list(tracing.spans)
+        assert server.trace_id == TRACE_ID and server.parent_id == PARENT_ID
+        assert child.name == "tracing_test.lookup" and child.kind == "db"
+        assert child.parent_id == server.span_id
+        assert failed.error == "ValueError: bad"
+
+    def test_no_spans_outside_a_trace(self):
+        traced_lookup()(1)
+
+        assert not tracing.spans
+
+    def test_unsampled_parent(self):
+        assert tracing.start_trace("x", f"00-{TRACE_ID}-{PARENT_ID}-00") is None
+
+    def test_inject(self):
+        root = tracing.start_trace("x", f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        with tracing.activate(root):
+            headers = tracing.inject({"a": "b"})
+
+        assert headers == {"a": "b", "traceparent": f"00-{TRACE_ID}-{root.span_id}-01"}
+
+    def test_middleware_names_server_span_after_route(self):
+        app = FastAPI()
+        app.get("/users/{user_id}")(traced_lookup())
+        app.add_middleware(TracingMiddleware)
+
+        response = TestClient(app).get(
+            "/users/7", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+
+        assert response.status_code == 200
+        child, server = list(tracing.spans)
+        assert server.name == "GET /users/{user_id}"
+        assert server.attributes["http.status_code"] == 200
+        assert child.parent_id == server.span_id
+        assert child.trace_id == TRACE_ID
+
+    def test_file_export(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        root = tracing.start_trace("x")
+        with tracing.activate(root):
+            pass
+
+        with patch("app.utils.tracing.exporter", tracing.FileExporter(str(path))):
+            tracing.flush()
+
+        line = json.loads(path.read_text())
+        assert line["span_id"] == root.span_id
+        assert not tracing.spans
+
+    def test_otlp_export(self):
+        exporter = tracing.OtlpExporter("http://collector/v1/traces")
+        exporter.session = Mock()
+        root = tracing.start_trace("x")
+        with tracing.activate(root):
+            pass
+
+        exporter.export(list(tracing.spans))
+
+        payload = exporter.session.post.call_args.kwargs["json"]
+        span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["spanId"] == root.span_id
+        assert span["kind"] == 2